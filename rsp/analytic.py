@@ -0,0 +1,128 @@
+import numpy as np
+from . import constants as c
+from .rf_datacube import matchfilter, number_range_bins
+from .windows import get_window
+from .trajectory import target_range_and_rangerate
+from .waveform_helpers import waveform_sample_indices
+from .rdm_helpers import pulse_return_indices
+
+# Analytic RDMs of point targets ############################################################
+# - the skin return pulses landing in one range bin, processed by rdm.gen, are separable: the
+#   match filter output of the pulse (the waveform's autocorrelation) in range times the
+#   windowed DFT of their slow-time phases (a windowed Dirichlet kernel) in Doppler
+# - only a local patch is synthesized, the match filter support in range and doppler_bins
+#   Doppler bins around the target, outside it the RDM holds only noise (the Doppler
+#   window's far sidelobes are dropped)
+# - pulses are grouped by the range bin they land in, so range migration and trajectories
+#   only add a few range responses to the patch
+# - pulses are placed on the CPI's flat time index as in rdm.gen: returns before the first
+#   sample start at it, pulses running past the last range bin continue at the first range
+#   bins of the next pulse, pulses returning after the CPI are dropped and ambiguous ranges fold
+
+DEFAULT_ANALYTIC = {"doppler_bins": 32}
+
+
+def analytic_params(spec):
+    """Analytic mode dict with the defaults filled in"""
+    return {**DEFAULT_ANALYTIC, **(spec if isinstance(spec, dict) else {})}
+
+
+def range_response(samples, mf_pulse, row: int, Nr: int):
+    """Rows and match filter output of pulse samples starting at datacube row"""
+    M = mf_pulse.size
+    start = max(row - M, 0)
+    column = np.zeros((min(row + samples.size + M, Nr) - start, 1), dtype=complex)
+    column[row - start : row - start + samples.size, 0] = samples
+    matchfilter(column, mf_pulse, pedantic=False)
+    return np.arange(start, start + column.shape[0]), column[:, 0]
+
+
+def pulse_pieces(first, M: int, Nr: int, Np: int):
+    """Pieces of pulses of M samples starting at flat time indices first (the CPI's samples
+    run down the range bins then across pulses), as in rdm_helpers.inject_pulses
+    outputs:\n
+    pulse : index of the pulse of each piece\n
+    col, row : pulse and range bin of the first sample of each piece\n
+    a, b : samples [a, b) of the pulse in the piece\n
+    """
+    assert M <= Nr, "Error: pulses longer than the PRI are not analytic"
+    # samples kept past the end of the CPI, a prefix of each pulse
+    _, keep = waveform_sample_indices(Nr * Np, first, M)
+    kept = keep.sum(axis=1)
+    row, col = first % Nr, first // Nr
+    in_row = np.minimum(kept, Nr - row)  # samples before the end of the range bins
+    pulse = np.arange(first.size)
+    head, tail = in_row > 0, kept > in_row
+    return (
+        np.concatenate([pulse[head], pulse[tail]]),
+        np.concatenate([col[head], col[tail] + 1]),
+        np.concatenate([row[head], np.zeros(tail.sum(), dtype=int)]),
+        np.concatenate([np.zeros(head.sum(), dtype=int), in_row[tail]]),
+        np.concatenate([in_row[head], kept[tail]]),
+    )
+
+
+def doppler_response(slowtime, weights, f_bins, PRF: float):
+    """Windowed DFT of the slow-time returns at frequencies f_bins [Hz]"""
+    m = np.arange(slowtime.size)
+    return np.exp(-2j * c.PI * np.outer(f_bins, m) / PRF) @ (weights * slowtime)
+
+
+def skin_patch(target: dict, radar: dict, wvf: dict, mf_pulse, weights, f_axis, spec=None):
+    """Rows, Doppler bins and (rows, bins) RDM patch of a unit voltage skin return
+    f_axis: frequency [Hz] of every Doppler bin of the RDM"""
+    params = analytic_params(spec)
+    Np, PRF, fs = radar["Npulses"], radar["PRF"], radar["sampRate"]
+    Nr = number_range_bins(fs, PRF)
+
+    # pulse return times and phases as in rdm_helpers.add_skin
+    t_slow_axis = np.arange(Np) / PRF
+    tgt_range_ar, tgt_rangeRate_ar = target_range_and_rangerate(target, t_slow_axis)
+    delay = 2 * tgt_range_ar / c.C
+    phase = np.exp(-2j * c.PI * radar["fcar"] * delay)
+    first = pulse_return_indices(t_slow_axis + delay - wvf["pulse_width"] / 2, radar, Nr * Np)
+    pulse, col, row, a, b = pulse_pieces(first, wvf["pulse"].size, Nr, Np)
+
+    # Doppler bins nearest the target's (aliased) mean Doppler and its neighbors
+    f_target = -2 * radar["fcar"] / c.C * tgt_rangeRate_ar.mean()  # f = -2* fc/c Rdot
+    if len(f_axis) <= params["doppler_bins"]:
+        bins = np.arange(len(f_axis))
+    else:
+        k = np.argmin(abs((f_axis - f_target + PRF / 2) % PRF - PRF / 2))
+        bins = (k + np.arange(params["doppler_bins"]) - params["doppler_bins"] // 2) % len(f_axis)
+
+    # the pulse pieces landing in each range bin, a few when the target migrates over the CPI
+    # or its pulses cross the end of the range bins
+    responses = []
+    for r, a_r, b_r in np.unique(np.stack([row, a, b], axis=1), axis=0):
+        same = (row == r) & (a == a_r) & (b == b_r)
+        slowtime = np.zeros(Np, dtype=complex)
+        np.add.at(slowtime, col[same], phase[pulse[same]])  # returns before the CPI stack
+        rows, range_patch = range_response(wvf["pulse"][a_r:b_r], mf_pulse, r, Nr)
+        responses.append(
+            (rows, range_patch, doppler_response(slowtime, weights, f_axis[bins], PRF))
+        )
+
+    if not responses:  # every pulse returns after the CPI
+        return np.arange(0), bins, np.zeros((0, bins.size), dtype=complex)
+    rows = np.arange(min(r[0][0] for r in responses), max(r[0][-1] for r in responses) + 1)
+    patch = np.zeros((rows.size, bins.size), dtype=complex)
+    for r_rows, range_patch, doppler in responses:
+        patch[r_rows - rows[0]] += np.outer(range_patch, doppler)
+    return rows, bins, patch
+
+
+def analytic_rdm(groups, radar: dict, wvf: dict, mf_pulse, doppler_window, rdot_axis, spec=None):
+    """Signal RDM of the skin returns of each (target, returns, SNR_volt) group
+    rdot_axis: range rate of every Doppler bin of the RDM (full or zoomed)"""
+    f_axis = -2 * radar["fcar"] / c.C * np.asarray(rdot_axis)  # f = -2* fc/c Rdot
+    weights = get_window(doppler_window, radar["Npulses"]).weights
+    Nr = number_range_bins(radar["sampRate"], radar["PRF"])
+    rdm = np.zeros((Nr, f_axis.size), dtype=np.complex64)
+
+    for target, returns, SNR_volt in groups:
+        for returnItem in returns:
+            assert returnItem["type"] == "skin", "Error: analytic RDMs only have skin returns"
+            rows, bins, patch = skin_patch(target, radar, wvf, mf_pulse, weights, f_axis, spec)
+            rdm[np.ix_(rows, bins)] += SNR_volt * patch
+    return rdm
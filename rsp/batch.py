@@ -0,0 +1,258 @@
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, as_completed, wait
+from . import rdm
+from .scene import Scene
+from .cache import hash_inputs
+from .datacube_io import save_rdm
+from .reports import ReportFile, TRUTH_DTYPE, DETECTION_DTYPE, cpi_reports
+
+# Resumable batch runs of scenario files ###################################################
+# - a scenario is a JSON file with the rdm.gen inputs of a set of jobs:
+#     radar, waveform (or a list of waveforms), targets, return_list, seeds (a list or
+#     {"start": s, "count": n}), options (rdm.gen keyword arguments)
+#   and output settings (see DEFAULT_SCENARIO), see examples/scenario.json
+# - there is one job per (waveform, target, seed), or per (waveform, seed) when "scene" is
+#   true and the targets are run together as a Scene
+# - jobs run in a process pool, results are written by the main process as they complete:
+#     rdm/<job>.rdc       RDM files (see datacube_io), unless "save" is null
+#     truth.rpt           truth and detection reports (see reports.py), if "reports"
+#     detections.rpt
+#     jobs.jsonl          one line per completed job with its timing, the checkpoint
+# - each job is identified by the hash of its inputs, a rerun skips the jobs in jobs.jsonl
+#   so an interrupted run resumes where it stopped, jobs whose inputs changed are rerun
+# - installed as the rsp console command, see main
+
+DEFAULT_SCENARIO = {
+    "return_list": [{"type": "skin"}],
+    "seeds": [0],
+    "scene": False,
+    "options": {},
+    "save": "total",  # "total", "signal", "both" or None
+    "precision": None,  # RDM file precision, see datacube_io
+    "compression": None,
+    "reports": True,
+    "cfar": None,  # detection report CFAR, see detection.ca_cfar
+}
+SAVES = {"total", "signal", "both", None}
+
+
+def load_scenario(path):
+    """Scenario dict of a scenario file with the defaults filled in"""
+    with open(path) as f:
+        scenario = {**DEFAULT_SCENARIO, **json.load(f)}
+
+    assert "radar" in scenario and "targets" in scenario, "Error: scenario needs radar and targets"
+    if "waveform" in scenario:
+        scenario["waveforms"] = [scenario.pop("waveform")]
+    assert scenario.get("waveforms"), "Error: scenario needs a waveform"
+    if isinstance(scenario["seeds"], dict):
+        seeds = scenario["seeds"]
+        scenario["seeds"] = list(
+            range(seeds.get("start", 0), seeds.get("start", 0) + seeds["count"])
+        )
+    assert scenario["save"] in SAVES, f"Error: save {scenario['save']} not in {SAVES}"
+    return scenario
+
+
+def scenario_jobs(scenario: dict):
+    """Jobs of a scenario, each a dict of rdm.gen inputs with its index and key"""
+    if scenario["scene"]:
+        targets = [("scene", scenario["targets"])]
+    else:
+        targets = list(enumerate(scenario["targets"]))
+
+    jobs = []
+    for w, waveform in enumerate(scenario["waveforms"]):
+        for t, target in targets:
+            for seed in scenario["seeds"]:
+                job = {
+                    "job": len(jobs),
+                    "waveform_index": w,
+                    "target_index": t,
+                    "seed": seed,
+                    "target": target,
+                    "radar": scenario["radar"],
+                    "waveform": waveform,
+                    "return_list": scenario["return_list"],
+                    "options": scenario["options"],
+                }
+                inputs = [target, scenario["radar"], waveform, scenario["return_list"], seed]
+                job["key"] = hash_inputs(*inputs, scenario["options"])
+                jobs.append(job)
+    return jobs
+
+
+def run_job(job: dict, reports: bool = True, cfar=None):
+    """Run one job, returns the job, rdm.gen outputs, reports and the run time [s]"""
+    radar, waveform, return_list = job["radar"], job["waveform"], job["return_list"]
+    target = Scene(job["target"]) if job["target_index"] == "scene" else job["target"]
+
+    t0 = time.perf_counter()
+    outputs = rdm.gen(
+        target, radar, waveform, return_list, seed=job["seed"], plot=False, **job["options"]
+    )
+    seconds = time.perf_counter() - t0
+
+    job_reports = None
+    if reports:
+        job_reports = cpi_reports(
+            job["job"], target, radar, waveform, return_list, *outputs[:3], cfar=cfar
+        )
+    scene = job["target_index"] == "scene"
+    metadata = {"radar": radar, "waveform": waveform}
+    metadata["target"] = {"scene": job["target"]} if scene else job["target"]
+    return job, outputs, job_reports, seconds, metadata
+
+
+class JobLog:
+    """Completed jobs of a run, one JSON line per job appended and flushed to disk"""
+
+    def __init__(self, path):
+        self.path = path
+        self.records = []
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                lines = f.read().split(b"\n")
+            # the last line is empty, or partial when the run was killed while writing it
+            complete = lines[:-1]
+            self.records = [json.loads(line) for line in complete]
+            with open(path, "r+b") as f:
+                f.truncate(sum(len(line) + 1 for line in complete))
+        self.completed = {record["key"] for record in self.records}
+
+    def write(self, record: dict):
+        """Append a job record"""
+        with open(self.path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.records.append(record)
+        self.completed.add(record["key"])
+
+
+def _as_completed(function, items, workers: int, *args):
+    """function(item, *args) of each item in completion order, at most 2 * workers in flight"""
+    if workers <= 1:
+        for item in items:
+            yield function(item, *args)
+        return
+
+    items = iter(items)
+    with ProcessPoolExecutor(workers) as pool:
+        try:
+            running = set()
+            for item in items:
+                running.add(pool.submit(function, item, *args))
+                if len(running) >= 2 * workers:
+                    done, running = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+            for future in as_completed(running):
+                yield future.result()
+        finally:
+            pool.shutdown(cancel_futures=True)
+
+
+def _save(path, outputs, scenario: dict, metadata: dict):
+    """Write the RDMs of a job, through a temporary file so partial files are never read"""
+    rdot_axis, r_axis, total_dc, signal_dc = outputs
+    saves = {"total": [("", total_dc)], "signal": [("", signal_dc)]}
+    saves["both"] = [("", total_dc), ("_signal", signal_dc)]
+    files = []
+    for suffix, data in saves[scenario["save"]]:
+        file = f"{path}{suffix}.rdc"
+        kwargs = {"precision": scenario["precision"], "compression": scenario["compression"]}
+        save_rdm(file + ".tmp", rdot_axis, r_axis, data, **metadata, **kwargs)
+        os.replace(file + ".tmp", file)
+        files.append(os.path.basename(file))
+    return files
+
+
+def run_scenario(
+    scenario: dict, directory, workers: int = 1, restart: bool = False, limit: int = None, log=print
+):
+    """Run the jobs of a scenario not yet completed in directory, see the top of the file
+    limit: stop after this many jobs, a later run continues
+    returns the records of the jobs run"""
+    os.makedirs(os.path.join(directory, "rdm"), exist_ok=True)
+    paths = {
+        name: os.path.join(directory, name)
+        for name in ["jobs.jsonl", "truth.rpt", "detections.rpt"]
+    }
+    if restart:
+        for path in paths.values():
+            if os.path.exists(path):
+                os.remove(path)
+
+    job_log = JobLog(paths["jobs.jsonl"])
+    jobs = scenario_jobs(scenario)
+    pending = [job for job in jobs if job["key"] not in job_log.completed]
+    log(f"{len(jobs)} jobs, {len(jobs) - len(pending)} done before")
+    pending = pending[:limit]
+
+    report_files = None
+    if scenario["reports"]:
+        # drop the records of a job that was interrupted before it was logged
+        last = job_log.records[-1] if job_log.records else {}
+        report_files = []
+        for name, dtype in [("truth.rpt", TRUTH_DTYPE), ("detections.rpt", DETECTION_DTYPE)]:
+            report_file = ReportFile(paths[name], dtype)
+            report_file.truncate(last.get(name, 0))
+            report_files.append(report_file)
+
+    records = []
+    t0 = time.perf_counter()
+    results = _as_completed(run_job, pending, workers, scenario["reports"], scenario["cfar"])
+    for job, outputs, job_reports, seconds, metadata in results:
+        record = {
+            "job": job["job"],
+            "key": job["key"],
+            "waveform": job["waveform_index"],
+            "target": job["target_index"],
+            "seed": job["seed"],
+            "seconds": round(seconds, 6),
+        }
+        if scenario["save"] is not None:
+            path = os.path.join(directory, "rdm", f"{job['job']:06d}")
+            record["files"] = _save(path, outputs, scenario, metadata)
+        if report_files is not None:
+            for name, report_file, report in zip(
+                ["truth.rpt", "detections.rpt"], report_files, job_reports
+            ):
+                record[name] = report_file.append(report)
+            record["detections"] = len(job_reports[1])
+        job_log.write(record)
+        records.append(record)
+        log(f"job {job['job']} ({len(records)}/{len(pending)}): {seconds:.3f} s")
+
+    if records:
+        log(f"ran {len(records)} jobs in {time.perf_counter() - t0:.1f} s")
+    return records
+
+
+def main(argv=None):
+    """rsp console command, run a scenario file"""
+    parser = argparse.ArgumentParser(prog="rsp", description="Run the rdm.gen jobs of a scenario")
+    parser.add_argument("scenario", help="scenario JSON file")
+    parser.add_argument("-o", "--out", help="output directory (default: the scenario name)")
+    parser.add_argument("-j", "--workers", type=int, default=1, help="worker processes")
+    parser.add_argument("-n", "--limit", type=int, help="stop after this many jobs")
+    parser.add_argument("--restart", action="store_true", help="rerun the completed jobs")
+    args = parser.parse_args(argv)
+
+    scenario = load_scenario(args.scenario)
+    directory = args.out or os.path.splitext(os.path.basename(args.scenario))[0]
+    try:
+        run_scenario(scenario, directory, args.workers, args.restart, args.limit)
+    except KeyboardInterrupt:
+        print("interrupted, rerun to resume", file=sys.stderr)
+        return 130
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+import numpy as np
+from . import constants as c
+
+# Array radars and digital beamforming ######################################################
+# - radar key "array" makes datacubes (range x pulse x channel), one channel per element
+#     {"elements": N, "spacing": 0.5}: uniform linear array along y, spacing in wavelengths
+#     {"positions": (Nc, 3) array}: element positions [m]
+# - boresight is along x, y is across in azimuth and z is up
+# - targets have optional keys azimuth and elevation [rad] (default boresight), their returns
+#   get per-element steering phases at injection
+# - beamforming is one matrix multiply of the datacube with a (Nc, Nbeams) weight matrix
+
+
+def number_channels(radar: dict):
+    """Number of array channels, None for single channel radars"""
+    if "array" not in radar:
+        return None
+    return len(element_positions(radar["array"], radar["fcar"]))
+
+
+def element_positions(array: dict, fcar: float):
+    """(Nc, 3) element positions [m]"""
+    if "positions" in array:
+        return np.atleast_2d(np.asarray(array["positions"], dtype=float))
+    spacing = array.get("spacing", 0.5) * c.C / fcar
+    positions = np.zeros((array["elements"], 3))
+    positions[:, 1] = (np.arange(array["elements"]) - (array["elements"] - 1) / 2) * spacing
+    return positions
+
+
+def direction(azimuth, elevation=0):
+    """(..., 3) unit vectors toward azimuth and elevation [rad]"""
+    azimuth, elevation = np.broadcast_arrays(np.asarray(azimuth), np.asarray(elevation))
+    return np.stack(
+        [
+            np.cos(elevation) * np.cos(azimuth),
+            np.cos(elevation) * np.sin(azimuth),
+            np.sin(elevation),
+        ],
+        axis=-1,
+    )
+
+
+def steering_vectors(array: dict, fcar: float, azimuth, elevation=0):
+    """(Nc, Nbeams) phases of a plane wave from each direction at each element"""
+    u = np.atleast_2d(direction(azimuth, elevation))
+    return np.exp(2j * c.PI * fcar / c.C * element_positions(array, fcar) @ u.T)
+
+
+def target_steering(target: dict, radar: dict):
+    """(Nc,) steering phases of the target's returns"""
+    azimuth, elevation = target.get("azimuth", 0), target.get("elevation", 0)
+    return steering_vectors(radar["array"], radar["fcar"], azimuth, elevation)[:, 0]
+
+
+def beam_weights(array: dict, fcar: float, azimuth, elevation=0):
+    """(Nc, Nbeams) conventional beam weights, unity norm so noise power is unchanged"""
+    a = steering_vectors(array, fcar, azimuth, elevation)
+    return a / np.sqrt(a.shape[0])
+
+
+def beamform(dc, weights):
+    """Form all beams at once: (..., Nc) datacube @ conj(weights) -> (..., Nbeams)"""
+    return dc @ np.conj(weights)
@@ -0,0 +1,204 @@
+import os
+import json
+import hashlib
+import inspect
+import tempfile
+from collections import OrderedDict
+import numpy as np
+from . import __version__
+
+try:  # POSIX only, without it concurrent writers are not serialized
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# keys rdm.gen fills into its input dicts, they are derived from the other keys
+DERIVED_KEYS = {"pulse", "time_BW_product", "pulse_width", "Npulses"}
+
+
+class UncacheableInput(Exception):
+    """Inputs holding a callable without a stable cache key"""
+
+
+def callable_key(function):
+    """Stable key of a callable input (a trajectory or a VBM function)
+    - callables with a cache_key attribute are keyed by it, e.g. the parameters a closure
+      captures: trajectory.cache_key = {"acceleration": 9.8}
+    - named module level functions are keyed by their qualified name
+    - other callables (closures, lambdas, partials, bound methods) can differ in what they
+      capture under the same name, they raise UncacheableInput"""
+    key = getattr(function, "cache_key", None)
+    if key is not None:
+        return {"callable": normalize(key)}
+    name = getattr(function, "__qualname__", "")
+    named = inspect.isfunction(function) and "<" not in name and function.__closure__ is None
+    if not (named or inspect.isbuiltin(function)):
+        raise UncacheableInput(
+            f"{name or function!r} has no stable cache key, give it a cache_key attribute"
+        )
+    return f"{function.__module__}.{name}"
+
+
+def normalize(obj):
+    """Convert rdm.gen inputs to a JSON-able form that is stable across runs"""
+    if isinstance(obj, dict):
+        return {str(k): normalize(v) for k, v in sorted(obj.items()) if k not in DERIVED_KEYS}
+    if isinstance(obj, (list, tuple)):
+        return [normalize(v) for v in obj]
+    if isinstance(obj, np.ndarray):
+        digest = hashlib.sha256(np.ascontiguousarray(obj).tobytes()).hexdigest()
+        return {"ndarray": [str(obj.dtype), list(obj.shape), digest]}
+    if isinstance(obj, np.generic):
+        return normalize(obj.item())
+    if isinstance(obj, float):
+        return repr(obj)  # exact round trip
+    if callable(obj):
+        return callable_key(obj)
+    if hasattr(obj, "as_dict"):  # specs.Spec, the same as its dict
+        return normalize(obj.as_dict())
+    if hasattr(obj, "targets"):  # Scene
+        return {"scene": normalize(obj.targets)}
+    return obj
+
+
+def hash_inputs(*args):
+    """Stable hash of normalized inputs and the library version"""
+    text = json.dumps([__version__, normalize(list(args))], sort_keys=True)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class RDMCache:
+    """Persistent cache of rdm.gen results shared by processes using the same directory
+    - entries are written to a temporary file and renamed, so readers never see partial files
+    - least recently used entries are evicted when the directory exceeds max_bytes
+    """
+
+    suffix = ".npz"
+
+    def __init__(self, directory, max_bytes: int = 2**30):
+        self.directory = os.fspath(directory)
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+
+    def key(self, target, radar, waveform, return_list, seed, **options):
+        """Cache key of an rdm.gen call, options are the processing options by name, unset
+        (None) options are left out so new options keep the keys of runs not using them"""
+        options = {name: value for name, value in options.items() if value is not None}
+        return hash_inputs(target, radar, waveform, return_list, seed, options)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + self.suffix)
+
+    def get(self, key):
+        """Cached (rdot_axis, r_axis, total_dc, signal_dc) or None"""
+        path = self._path(key)
+        try:
+            with np.load(path) as data:
+                result = tuple(data[name] for name in ["rdot_axis", "r_axis", "total", "signal"])
+            os.utime(path)  # mark as recently used
+        except (FileNotFoundError, OSError, KeyError, ValueError):
+            return None  # missing, evicted or unreadable entries are misses
+        return result
+
+    def put(self, key, rdot_axis, r_axis, total_dc, signal_dc):
+        """Store a result then evict least recently used entries"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, rdot_axis=rdot_axis, r_axis=r_axis, total=total_dc, signal=signal_dc)
+        os.replace(tmp_path, self._path(key))
+        self.evict()
+
+    def _lock(self):
+        """Open and lock the directory lock file, closing it releases the lock"""
+        f = open(os.path.join(self.directory, ".lock"), "w")
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        return f
+
+    def entries(self):
+        """(mtime, size, path) of every entry, oldest first"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(self.suffix):
+                path = os.path.join(self.directory, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+        return sorted(entries)
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes"""
+        with self._lock():
+            entries = self.entries()
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+
+    def clear(self):
+        """Remove every entry"""
+        with self._lock():
+            for _, _, path in self.entries():
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def size(self):
+        """Total bytes of cached entries"""
+        return sum(size for _, size, _ in self.entries())
+
+
+class ComponentCache:
+    """In-memory cache of processed RDM components (see the rdm.gen components option)
+    - the processing chain is linear, so an RDM is the sum of its processed returns and its
+      processed noise, a rerun only processes the components whose inputs changed
+    - components are stored read-only, least recently used ones are evicted past max_bytes
+    """
+
+    def __init__(self, max_bytes: int = 2**30):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, *args):
+        """Key of a component from its inputs"""
+        return hash_inputs(*args)
+
+    def get(self, key):
+        """Cached (rdot_axis, rdm) or None"""
+        result = self._entries.get(key)
+        if result is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)  # mark as recently used
+        self.hits += 1
+        return result
+
+    def put(self, key, rdot_axis, rdm):
+        """Store a processed component then evict least recently used components"""
+        for ar in [rdot_axis, rdm]:
+            ar.flags.writeable = False
+        self._entries[key] = (rdot_axis, rdm)
+        self._entries.move_to_end(key)
+        while self.nbytes() > self.max_bytes and len(self._entries) > 1:
+            self._entries.popitem(last=False)
+
+    def nbytes(self):
+        """Total bytes of cached components"""
+        return sum(rdot.nbytes + rdm.nbytes for rdot, rdm in self._entries.values())
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        """Remove every component"""
+        self._entries.clear()
@@ -0,0 +1,130 @@
+import numpy as np
+from . import fft_backend as fft
+from . import constants as c
+from .noise import unity_var_complex_noise
+from .pulse_doppler_radar import range_unambiguous
+from .range_equation import snr_range_eqn
+from .rf_datacube import number_range_bins
+from .beamforming import steering_vectors
+
+# Ground clutter return ####################################################################
+# - return dict {"type": "clutter"} with optional keys (defaults in DEFAULT_CLUTTER)
+#     gamma: constant-gamma reflectivity (linear), sigma0 = gamma * sin(grazing angle)
+#     height: radar height above a flat earth [m]
+#     beamwidth: azimuth beamwidth [rad]
+#     sigma_v: standard deviation of the clutter internal motion [m/s] (Gaussian spectrum)
+#     rdot: mean clutter range rate [m/s], e.g. from platform motion
+#     max_range: farthest clutter [m], default the 4/3 earth radar horizon
+#     azimuths: azimuths [rad] of the patches the beam footprint is split into, default [0]
+#     platform_speed: radar speed along the array axis y [m/s], a patch at azimuth phi has
+#                     range rate rdot - platform_speed * sin(phi) (airborne clutter ridge)
+# - every fast-time sample of the PRI is a clutter patch scaled by the range equation, patches
+#   from every ambiguous range add once their pulse has been sent
+# - all range bins, pulses and azimuths are generated at once, no Python loops over them
+# - array datacubes get the steering phases of each azimuth patch (see beamforming.py)
+
+DEFAULT_CLUTTER = {"gamma": 10 ** (-20 / 10), "height": 100, "beamwidth": 0.05, "sigma_v": 0.5}
+EARTH_RADIUS_4_3 = 4 / 3 * 6.371e6  # effective earth radius [m]
+
+
+def clutter_params(returnInfo: dict):
+    """Clutter return dict with the defaults filled in"""
+    params = {**DEFAULT_CLUTTER, "rdot": 0.0, "azimuths": [0.0], "platform_speed": 0.0}
+    params.update(returnInfo)
+    if "max_range" not in params:
+        params["max_range"] = np.sqrt(2 * EARTH_RADIUS_4_3 * params["height"])
+    return params
+
+
+def clutter_rcs(R, gamma: float, height: float, beamwidth: float, dR: float):
+    """Constant-gamma RCS of the ground patch at range R with range extent dR
+    sigma = gamma sin(psi) * R beamwidth dR sec(psi) for grazing angle psi (flat earth)
+    patches closer than the radar height have no clutter"""
+    R = np.asarray(R, dtype=float)
+    sin_psi = np.divide(height, R, out=np.ones_like(R), where=R > height)
+    tan_psi = sin_psi / np.sqrt(np.maximum(1 - sin_psi**2, 1e-12))
+    return np.where(R > height, gamma * tan_psi * R * beamwidth * dR, 0.0)
+
+
+def clutter_snr(radar: dict, wvf: dict, params: dict, Nr: int):
+    """Single-pulse SNR of the clutter patch of each fast-time sample in each ambiguous range
+    outputs (K+1, Nr) array, row k is the patch at range (sample + k * Nr) * dR"""
+    dR = c.C / (2 * radar["sampRate"])
+    K = int(np.ceil(params["max_range"] / range_unambiguous(radar["PRF"])))
+    R = (np.arange(K + 1)[:, np.newaxis] * Nr + np.arange(Nr)) * dR
+    R[R > params["max_range"]] = 0  # beyond the horizon
+
+    sigma = clutter_rcs(R, params["gamma"], params["height"], params["beamwidth"], dR)
+    R_safe = np.where(sigma > 0, R, 1.0)
+    snr = snr_range_eqn(
+        radar["txPower"],
+        radar["txGain"],
+        radar["rxGain"],
+        sigma,
+        c.C / radar["fcar"],
+        R_safe,
+        wvf["bw"],
+        radar["noiseFig"],
+        radar["totalLosses"],
+        radar["opTemp"],
+        wvf["time_BW_product"],
+    )
+    return np.where(sigma > 0, snr, 0.0)
+
+
+def clutter_spectrum(Np: int, PRF: float, fcar: float, sigma_v: float, rdot=0.0):
+    """Unity mean power Gaussian slow-time spectrum in FFT order, aliased into [-PRF/2, PRF/2)
+    rdot may be an array of mean range rates, giving a (Np, rdot.size) spectrum per column"""
+    f = fft.fftfreq(Np, 1 / PRF)
+    f_mean = -2 * fcar / c.C * np.asarray(rdot)  # f = -2* fc/c Rdot
+    sigma_f = max(2 * fcar / c.C * sigma_v, PRF / Np / 10)  # at least a tenth of a bin
+    df = (np.subtract.outer(f, f_mean) + PRF / 2) % PRF - PRF / 2
+    S = np.exp(-(df**2) / (2 * sigma_f**2))
+    return S / np.mean(S, axis=0)
+
+
+def clutter_slowtime(Nr: int, Np: int, S):
+    """(Nr, Np, ...) unit-variance complex Gaussian slow-time processes with power spectrum S
+    S: (Np, ...) spectra, one process per range bin for each trailing column of S"""
+    W = fft.fft(unity_var_complex_noise((Nr,) + np.shape(S)), axis=1)
+    W *= np.sqrt(S)
+    return fft.ifft(W, axis=1, overwrite_x=True)
+
+
+def add_clutter(signal_dc, wvf: dict, radar: dict, returnInfo: dict, rows=None):
+    """Add constant-gamma ground clutter to the datacube
+    rows: range bin of each datacube row for range gated datacubes"""
+    params = clutter_params(returnInfo)
+    Nr = number_range_bins(radar["sampRate"], radar["PRF"])
+    Np = radar["Npulses"]
+
+    # patch amplitudes, the ambiguous ranges add once their pulse has been sent
+    snr = np.cumsum(clutter_snr(radar, wvf, params, Nr), axis=0)
+    amp = np.sqrt(snr[np.minimum(np.arange(Np), snr.shape[0] - 1)].T / Np)
+
+    # the footprint power is split evenly over the azimuth patches
+    azimuths = np.atleast_1d(np.asarray(params["azimuths"], dtype=float))
+    rdot = params["rdot"] - params["platform_speed"] * np.sin(azimuths)
+    S = clutter_spectrum(Np, radar["PRF"], radar["fcar"], params["sigma_v"], rdot)
+    patches = amp[..., np.newaxis] / np.sqrt(azimuths.size) * clutter_slowtime(Nr, Np, S)
+
+    # sum the azimuth patches into each channel with one matrix multiply
+    if signal_dc.ndim == 3:
+        steering = steering_vectors(radar["array"], radar["fcar"], azimuths)
+    else:
+        steering = np.ones((1, azimuths.size))
+    patches = patches @ steering.T
+
+    # each patch echoes the pulse, timed from its start as in add_skin, one fast-time
+    # convolution over the whole CPI (time runs down range bins then across pulses)
+    s = int(np.rint(wvf["pulse_width"] / 2 * radar["sampRate"]))
+    N = Nr * Np
+    Nfft = fft.next_fast_len(N + wvf["pulse"].size - 1)
+    X = fft.fft(patches.transpose(1, 0, 2).reshape(N, -1), Nfft, axis=0)
+    X *= fft.fft(wvf["pulse"], Nfft)[:, np.newaxis]
+    echoes = fft.ifft(X, axis=0, overwrite_x=True)[s : s + N]
+    echoes = echoes.reshape(Np, Nr, -1).transpose(1, 0, 2)
+
+    if signal_dc.ndim == 2:
+        echoes = echoes[..., 0]
+    signal_dc += echoes if rows is None else echoes[rows]
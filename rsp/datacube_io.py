@@ -0,0 +1,233 @@
+import json
+import zlib
+import numpy as np
+
+# Chunked datacube and RDM file format #####################################################
+# - file layout: MAGIC, data blocks, JSON footer, footer length (uint64), MAGIC
+# - the 2-D array is stored in chunks, each chunk is a C ordered block that may be zlib
+#   compressed, uncompressed chunks are memory mapped so partial reads only touch their bytes
+# - axes are stored as uncompressed float64 blocks, metadata dicts (radar, target, waveform)
+#   are stored in the footer, metadata_to_json and metadata_from_json convert them (also used
+#   by reports.py)
+# - precision:
+#   None        store the input dtype
+#   "complex64" store complex values in single precision
+#   "db16"      store 20*log10(|x|) as float16, a lossy compact form for RDMs
+
+MAGIC = b"RSPCUBE1"
+PRECISIONS = {None, "complex64", "db16"}
+COMPRESSIONS = {None, "zlib"}
+
+
+def metadata_to_json(obj):
+    """Convert metadata to JSON-able values, arrays are tagged so they can be restored"""
+    if isinstance(obj, dict):
+        return {str(k): metadata_to_json(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [metadata_to_json(v) for v in obj]
+    if isinstance(obj, np.ndarray):
+        if np.iscomplexobj(obj):
+            return {
+                "__ndarray__": str(obj.dtype),
+                "real": obj.real.tolist(),
+                "imag": obj.imag.tolist(),
+            }
+        return {"__ndarray__": str(obj.dtype), "real": obj.tolist()}
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if callable(obj):
+        return f"{getattr(obj, '__module__', '')}.{getattr(obj, '__qualname__', repr(obj))}"
+    return obj
+
+
+def metadata_from_json(obj):
+    """Inverse of metadata_to_json"""
+    if isinstance(obj, dict):
+        if "__ndarray__" in obj:
+            ar = np.array(obj["real"])
+            if "imag" in obj:
+                ar = ar + 1j * np.array(obj["imag"])
+            return ar.astype(obj["__ndarray__"])
+        return {k: metadata_from_json(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [metadata_from_json(v) for v in obj]
+    return obj
+
+
+def _encode(data, precision):
+    """Cast data to its storage dtype"""
+    if precision == "complex64":
+        return data.astype(np.complex64)
+    if precision == "db16":
+        mag = np.abs(data)
+        mag[mag == 0] = np.finfo(np.float32).tiny
+        return (20 * np.log10(mag)).astype(np.float16)
+    return data
+
+
+def write_cube(
+    path,
+    data,
+    axes: dict = None,
+    metadata: dict = None,
+    chunks: tuple = (256, 256),
+    compression: str = None,
+    precision: str = None,
+    level: int = 6,
+):
+    """Write a 2-D datacube or RDM with chunked storage
+    axes: dict of axis name -> (dimension, axis array), e.g. {"range": (0, r_axis)}
+    metadata: dict of JSON-able dicts, e.g. {"radar": radar, "waveform": waveform}
+    """
+    assert data.ndim == 2, "Error: only 2-D datacubes are supported"
+    assert precision in PRECISIONS, f"Error: {precision=} not in {PRECISIONS}"
+    assert compression in COMPRESSIONS, f"Error: {compression=} not in {COMPRESSIONS}"
+
+    stored = _encode(np.asarray(data), precision)
+    Nr, Np = stored.shape
+    cr, cp = min(chunks[0], Nr), min(chunks[1], Np)
+
+    footer = {
+        "shape": [Nr, Np],
+        "dtype": stored.dtype.str,
+        "precision": precision,
+        "compression": compression,
+        "chunks": [cr, cp],
+        "chunk_index": [],
+        "axes": {},
+        "metadata": metadata_to_json(metadata or {}),
+    }
+
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+
+        for i in range(0, Nr, cr):
+            row = []
+            for j in range(0, Np, cp):
+                block = np.ascontiguousarray(stored[i : i + cr, j : j + cp]).tobytes()
+                if compression == "zlib":
+                    block = zlib.compress(block, level)
+                row.append([f.tell(), len(block)])
+                f.write(block)
+            footer["chunk_index"].append(row)
+
+        for name, (dim, axis) in (axes or {}).items():
+            axis = np.asarray(axis, dtype=np.float64)
+            footer["axes"][name] = [dim, f.tell(), axis.size]
+            f.write(axis.tobytes())
+
+        text = json.dumps(footer).encode()
+        f.write(text)
+        f.write(np.uint64(len(text)).tobytes())
+        f.write(MAGIC)
+
+
+class CubeFile:
+    """Reader for files written by write_cube
+    - read(rows, cols) loads only the chunks overlapping the index window
+    - read_window(**intervals) selects the window with the stored axes, e.g. range=(1e3, 2e3)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            assert f.read(len(MAGIC)) == MAGIC, f"Error: {path} is not a datacube file"
+            f.seek(-(8 + len(MAGIC)), 2)
+            footer_size = int(np.frombuffer(f.read(8), dtype=np.uint64)[0])
+            assert f.read(len(MAGIC)) == MAGIC, f"Error: {path} is truncated"
+            f.seek(-(8 + len(MAGIC) + footer_size), 2)
+            self._footer = json.loads(f.read(footer_size))
+
+        self.shape = tuple(self._footer["shape"])
+        self.dtype = np.dtype(self._footer["dtype"])
+        self.precision = self._footer["precision"]
+        self.compression = self._footer["compression"]
+        self.chunks = tuple(self._footer["chunks"])
+        self.metadata = metadata_from_json(self._footer["metadata"])
+        self.axes = {
+            name: np.memmap(path, np.float64, "r", offset, (size,))
+            for name, (_, offset, size) in self._footer["axes"].items()
+        }
+        self.axis_dims = {name: dim for name, (dim, _, _) in self._footer["axes"].items()}
+
+    def _chunk(self, i, j):
+        """Chunk (i, j) memory mapped or decompressed"""
+        offset, nbytes = self._footer["chunk_index"][i][j]
+        shape = (
+            min(self.chunks[0], self.shape[0] - i * self.chunks[0]),
+            min(self.chunks[1], self.shape[1] - j * self.chunks[1]),
+        )
+        if self.compression == "zlib":
+            with open(self.path, "rb") as f:
+                f.seek(offset)
+                block = zlib.decompress(f.read(nbytes))
+            return np.frombuffer(block, dtype=self.dtype).reshape(shape)
+        return np.memmap(self.path, self.dtype, "r", offset, shape)
+
+    def read(self, rows: slice = slice(None), cols: slice = slice(None)):
+        """Read a contiguous window of the array, in the stored precision
+        db16 files return the dB magnitude"""
+        r0, r1, _ = rows.indices(self.shape[0])
+        c0, c1, _ = cols.indices(self.shape[1])
+        cr, cp = self.chunks
+        out = np.empty((max(r1 - r0, 0), max(c1 - c0, 0)), dtype=self.dtype)
+
+        for i in range(r0 // cr, (r1 - 1) // cr + 1 if r1 > r0 else 0):
+            for j in range(c0 // cp, (c1 - 1) // cp + 1 if c1 > c0 else 0):
+                chunk = self._chunk(i, j)
+                # overlap of the chunk and the window in file coordinates
+                a0, a1 = max(r0, i * cr), min(r1, i * cr + chunk.shape[0])
+                b0, b1 = max(c0, j * cp), min(c1, j * cp + chunk.shape[1])
+                out[a0 - r0 : a1 - r0, b0 - c0 : b1 - c0] = chunk[
+                    a0 - i * cr : a1 - i * cr, b0 - j * cp : b1 - j * cp
+                ]
+
+        return out
+
+    def read_window(self, **intervals):
+        """Read the window within the (min, max) interval of each named axis
+        returns the windowed axes dict and data"""
+        index = [slice(None), slice(None)]
+        for name, (lo, hi) in intervals.items():
+            axis = self.axes[name]
+            inside = np.flatnonzero((axis >= lo) & (axis <= hi))
+            if inside.size:
+                index[self.axis_dims[name]] = slice(inside[0], inside[-1] + 1)
+            else:
+                index[self.axis_dims[name]] = slice(0, 0)
+
+        axes = {
+            name: np.array(axis[index[self.axis_dims[name]]]) for name, axis in self.axes.items()
+        }
+        return axes, self.read(*index)
+
+
+def save_rdm(path, rdot_axis, r_axis, rdm, radar=None, target=None, waveform=None, **kwargs):
+    """Write an rdm.gen result with its axes and configuration dicts"""
+    metadata = {"radar": radar, "target": target, "waveform": waveform}
+    axes = {"range": (0, r_axis), "rangeRate": (1, rdot_axis)}
+    write_cube(path, rdm, axes, {k: v for k, v in metadata.items() if v is not None}, **kwargs)
+
+
+def save_datacube(path, dc, r_axis=None, radar=None, target=None, waveform=None, **kwargs):
+    """Write a raw (range x pulse) datacube with its fast-time axis and configuration dicts"""
+    metadata = {"radar": radar, "target": target, "waveform": waveform}
+    axes = {}
+    if r_axis is not None:
+        axes["range"] = (0, r_axis)
+    if radar is not None:
+        axes["pulse_time"] = (1, np.arange(dc.shape[1]) / radar["PRF"])
+    write_cube(path, dc, axes, {k: v for k, v in metadata.items() if v is not None}, **kwargs)
+
+
+def load_rdm(path, range_interval=None, rangeRate_interval=None):
+    """Read an RDM written by save_rdm, optionally only a range and range-rate window
+    returns rdot_axis, r_axis, rdm, metadata"""
+    cube = CubeFile(path)
+    intervals = {}
+    if range_interval is not None:
+        intervals["range"] = range_interval
+    if rangeRate_interval is not None:
+        intervals["rangeRate"] = rangeRate_interval
+    axes, rdm = cube.read_window(**intervals)
+    return axes["rangeRate"], axes["range"], rdm, cube.metadata
@@ -0,0 +1,251 @@
+import numpy as np
+from scipy import ndimage, stats
+from . import fft_backend as fft
+from . import constants as c
+from .specs import prepare
+from .rdm_helpers import add_skin, snr_onepulse
+from .rf_datacube import dataCube, matchfilter
+from .windows import get_window, weighted_pulse
+
+# Detection performance (Pd / Pfa) Monte Carlo #############################################
+# - a point target with Swerling 0-IV RCS fluctuation in noise, processed as in rdm.gen (match
+#   filter, slow-time window, Doppler FFT) and detected with a cell averaging CFAR along range
+# - snr is the single-pulse SNR of the range equation (see rdm_helpers.snr_onepulse), the
+#   target voltage is sqrt(snr / Npulses) as in rdm.gen
+# - trials are stacked arrays, the full mode synthesizes and processes every trial's datacube,
+#   the fast mode only samples the target's cell and its CFAR reference cells from the known
+#   statistics of the processing chain (range correlated Gaussian noise, the target's range
+#   and Doppler responses), the fast mode ignores range migration
+# - Swerling II and IV draw an independent complex gain per pulse (uniform phase), so their
+#   returns decorrelate pulse to pulse and do not integrate coherently
+# - Pd and Pfa come with Clopper-Pearson confidence intervals
+
+DEFAULT_CFAR = {"guard": 2, "train": 8, "pfa": 1e-4}  # guard and training cells each side
+
+SWERLING = {
+    0: {"dof": None, "per_pulse": False},  # constant RCS
+    1: {"dof": 2, "per_pulse": False},  # exponential power, constant over the CPI
+    2: {"dof": 2, "per_pulse": True},  # exponential power, independent pulses
+    3: {"dof": 4, "per_pulse": False},  # chi-square 4 DOF power, constant over the CPI
+    4: {"dof": 4, "per_pulse": True},  # chi-square 4 DOF power, independent pulses
+}
+
+
+def swerling_amplitudes(model: int, trials: int, Np: int, rng):
+    """(trials, Np) complex voltage gains of the target's returns with unit mean power"""
+    assert model in SWERLING, f"Error: Swerling model {model} not in {list(SWERLING)}"
+    if model == 0:
+        return np.ones((trials, Np), dtype=complex)
+    n = Np if SWERLING[model]["per_pulse"] else 1
+    dof = SWERLING[model]["dof"]
+    power = rng.chisquare(dof, (trials, n)) / dof
+    # a phase per gain, Swerling II gains are complex Gaussian, pulse to pulse models give
+    # independent returns on each pulse
+    phase = rng.uniform(0, 2 * c.PI, (trials, n))
+    return np.broadcast_to(np.sqrt(power) * np.exp(1j * phase), (trials, Np))
+
+
+def cfar_params(cfar):
+    """CFAR dict with the defaults filled in"""
+    return {**DEFAULT_CFAR, **(cfar or {})}
+
+
+def cfar_alpha(pfa: float, Nref: int):
+    """CA-CFAR threshold multiplier of the mean reference power of a square law detector"""
+    return Nref * (pfa ** (-1 / Nref) - 1)
+
+
+def ca_cfar(power, cfar=None, axis: int = -2):
+    """Cell averaging CFAR along the range axis of stacked power RDMs, range wraps around
+    returns detections and the noise power estimate of every cell"""
+    params = cfar_params(cfar)
+    guard, train = params["guard"], params["train"]
+    kernel = np.ones(2 * (guard + train) + 1) / (2 * train)
+    kernel[train : train + 2 * guard + 1] = 0
+    noise = ndimage.correlate1d(power, kernel, axis=axis, mode="wrap")
+    return power > cfar_alpha(params["pfa"], 2 * train) * noise, noise
+
+
+def binomial_interval(k, n, confidence: float = 0.95):
+    """Clopper-Pearson confidence interval of a probability from k successes in n trials"""
+    k, n = np.asarray(k, dtype=float), np.asarray(n, dtype=float)
+    a = (1 - confidence) / 2
+    lo = np.where(k > 0, stats.beta.ppf(a, k, n - k + 1), 0.0)
+    hi = np.where(k < n, stats.beta.ppf(1 - a, k + 1, n - k), 1.0)
+    return np.stack([lo, hi], axis=-1)
+
+
+def processing_chain(radar: dict, waveform: dict, doppler_window, range_window):
+    """Match filter taps, slow-time window and the noise power of an RDM cell
+    radar and waveform: dicts with the derived values filled in, see specs.prepare"""
+    mf_pulse = weighted_pulse(waveform["pulse"], range_window)
+    w = get_window(doppler_window, radar["Npulses"]).weights
+    # unity variance noise / sqrt(Np) through the match filter and the windowed DFT
+    noise_power = np.sum(abs(mf_pulse) ** 2) * np.sum(w**2) / radar["Npulses"]
+    return mf_pulse, w, noise_power
+
+
+def _doppler_bin(radar: dict, rdot: float):
+    """Doppler bin (fftshift order) nearest a range rate and the slow-time phase ramp of the
+    target relative to the bin"""
+    Np, PRF = radar["Npulses"], radar["PRF"]
+    f_axis = fft.fftshift(fft.fftfreq(Np, 1 / PRF))
+    f = -2 * radar["fcar"] / c.C * rdot  # f = -2* fc/c Rdot
+    j = np.argmin(abs((f_axis - f + PRF / 2) % PRF - PRF / 2))
+    return j, np.exp(2j * c.PI * (f - f_axis[j]) * np.arange(Np) / PRF)
+
+
+def _range_response(waveform: dict, mf_pulse, offsets):
+    """Match filter output of a unit pulse at range bin offsets from its peak"""
+    M = waveform["pulse"].size
+    pad = abs(offsets).max() + M
+    column = np.zeros((2 * pad + M, 1), dtype=complex)
+    column[pad : pad + M, 0] = waveform["pulse"]
+    matchfilter(column, mf_pulse, pedantic=False)
+    peak = np.argmax(abs(column[:, 0]))
+    return column[peak + offsets, 0]
+
+
+def _fast_trials(snr, radar, waveform, swerling, cfar, trials, rng, chain, rdot, batch=2**16):
+    """Detections of the target cell and false alarms of noise only cells, sampling only the
+    target's cell and its CFAR reference cells, noise only cells are drawn batch at a time"""
+    mf_pulse, w, noise_power = chain
+    params = cfar_params(cfar)
+    K = params["guard"] + params["train"]
+    offsets = np.arange(-K, K + 1)
+    Np = radar["Npulses"]
+
+    # range correlation of the match filtered noise, the Doppler window does not change it
+    kernel = np.conj(mf_pulse)[::-1]
+    acf = np.correlate(kernel, kernel, "full") / np.sum(abs(kernel) ** 2)
+    lags = np.subtract.outer(offsets, offsets) + kernel.size - 1
+    inside = (lags >= 0) & (lags < acf.size)
+    C = np.where(inside, acf[np.clip(lags, 0, acf.size - 1)], 0) * noise_power
+    L = np.linalg.cholesky(C + 1e-12 * noise_power * np.eye(C.shape[0]))
+
+    # target response in the cells, the Doppler gain of each trial's fluctuating returns
+    _, ramp = _doppler_bin(radar, rdot)
+    g = swerling_amplitudes(swerling, snr.size * trials, Np, rng).reshape(snr.size, trials, Np)
+    doppler_gain = np.sum(g * w * ramp, axis=-1)  # (P, T)
+    amp = np.sqrt(np.asarray(snr)[:, np.newaxis] / Np) * doppler_gain
+    signal = amp[..., np.newaxis] * _range_response(waveform, mf_pulse, offsets)
+
+    def cut_detections(cells):
+        power = abs(cells) ** 2
+        ref = (abs(offsets) > params["guard"]) / (2 * params["train"])
+        return power[..., K] > cfar_alpha(params["pfa"], 2 * params["train"]) * (power @ ref)
+
+    def noise(shape):
+        white = rng.standard_normal(shape + (offsets.size, 2)) @ [1, 1j] / np.sqrt(2)
+        return white @ L.T
+
+    detected = cut_detections(noise(signal.shape[:2]) + signal).sum(axis=1)
+
+    # noise only cells are cheap, draw enough for about 100 false alarms at the design Pfa
+    cells = max(snr.size * trials, int(100 / params["pfa"]))
+    false_alarms = sum(
+        cut_detections(noise((min(batch, cells - start),))).sum()
+        for start in range(0, cells, batch)
+    )
+    return detected, np.array([false_alarms]), cells
+
+
+def _full_trials(snr, radar, waveform, swerling, cfar, trials, rng, chain, rdot, batch):
+    """Detections of the target cell and false alarms of every noise only cell, synthesizing
+    and processing the datacube of every trial"""
+    mf_pulse, w, _ = chain
+    Np = radar["Npulses"]
+    signal_dc = dataCube(radar["sampRate"], radar["PRF"], Np)
+    Nr = signal_dc.shape[0]
+
+    # unit voltage target in the middle of the range window, processed once
+    r0 = Nr // 2 * c.C / (2 * radar["sampRate"])
+    add_skin(signal_dc, waveform, {"range": r0, "rangeRate": rdot}, radar, 1.0)
+    matchfilter(signal_dc, mf_pulse, pedantic=False)
+
+    def doppler(dc):
+        return fft.fftshift(fft.fft(dc * w, axis=-1), axes=-1)
+
+    j, _ = _doppler_bin(radar, rdot)
+    i = np.argmax(abs(doppler(signal_dc)[:, j]))
+
+    detected = np.zeros(snr.size, dtype=int)
+    false_alarms = np.zeros(snr.size, dtype=int)
+    for p, snr_p in enumerate(snr):
+        for start in range(0, trials, batch):
+            B = min(batch, trials - start)
+            # noise of every trial, match filtered as one (Nr, B * Np) datacube
+            noise = rng.standard_normal((Nr, B * Np, 2)) @ [1, 1j] / np.sqrt(2 * Np)
+            matchfilter(noise, mf_pulse, pedantic=False)
+            noise = noise.reshape(Nr, B, Np).transpose(1, 0, 2)
+
+            g = swerling_amplitudes(swerling, B, Np, rng)
+            target = np.sqrt(snr_p / Np) * g[:, np.newaxis, :] * signal_dc
+            noise_rdm = doppler(noise)
+            total_rdm = noise_rdm + doppler(target)
+
+            det, _ = ca_cfar(abs(total_rdm) ** 2, cfar, axis=1)
+            detected[p] += det[:, i, j].sum()
+            det, _ = ca_cfar(abs(noise_rdm) ** 2, cfar, axis=1)
+            false_alarms[p] += det.sum()
+    return detected, false_alarms, snr.size * trials * Nr * Np
+
+
+def pd_vs_snr(
+    snr,
+    radar: dict,
+    waveform: dict,
+    trials: int = 1000,
+    swerling: int = 0,
+    cfar: dict = None,
+    fast: bool = False,
+    seed: int = 0,
+    doppler_window="chebyshev",
+    range_window=None,
+    rdot: float = 0.0,
+    batch: int = 32,
+    confidence: float = 0.95,
+):
+    """Monte Carlo Pd of a target at each single-pulse SNR (linear) and the empirical Pfa
+    swerling: Swerling model 0-IV of the target RCS
+    cfar: CA-CFAR dict with keys guard, train (cells each side) and pfa (design Pfa)
+    fast: only sample the target's cell and its reference cells instead of whole RDMs
+    rdot: target range rate [m/s], sets the target's Doppler bin and straddle
+    batch: trials synthesized at once in the full mode
+    returns dict with keys snr, rdm_snr (peak SNR in the RDM), pd, pd_interval, pfa,
+    pfa_interval, alpha (CFAR multiplier)
+    """
+    rng = np.random.default_rng(seed)
+    snr = np.atleast_1d(np.asarray(snr, dtype=float))
+    radar, waveform = prepare(radar, waveform)  # copies, the inputs are not changed
+    chain = processing_chain(radar, waveform, doppler_window, range_window)
+    args = (snr, radar, waveform, swerling, cfar, trials, rng, chain, rdot)
+    if fast:
+        detected, false_alarms, cells = _fast_trials(*args)
+    else:
+        detected, false_alarms, cells = _full_trials(*args, batch)
+
+    # peak SNR of the target's RDM cell without fluctuation or straddle
+    mf_pulse, w, noise_power = chain
+    peak = abs(_range_response(waveform, mf_pulse, np.array([0]))[0]) * np.sum(w)
+    rdm_snr = snr / radar["Npulses"] * peak**2 / noise_power
+
+    params = cfar_params(cfar)
+    false_alarm_total = false_alarms.sum()
+    return {
+        "snr": snr,
+        "rdm_snr": rdm_snr,
+        "pd": detected / trials,
+        "pd_interval": binomial_interval(detected, trials, confidence),
+        "pfa": false_alarm_total / cells,
+        "pfa_interval": binomial_interval(false_alarm_total, cells, confidence),
+        "alpha": cfar_alpha(params["pfa"], 2 * params["train"]),
+    }
+
+
+def pd_vs_range(target: dict, radar: dict, waveform: dict, ranges, **kwargs):
+    """Monte Carlo Pd of a target (mean rcs, rangeRate) at each range [m], see pd_vs_snr"""
+    ranges = np.atleast_1d(np.asarray(ranges, dtype=float))
+    snr = snr_onepulse({**target, "range": ranges}, *prepare(radar, waveform))
+    kwargs.setdefault("rdot", target.get("rangeRate", 0.0))
+    return {"range": ranges, **pd_vs_snr(snr, radar, waveform, **kwargs)}
@@ -0,0 +1,110 @@
+import contextlib
+import contextvars
+import numpy as np
+from scipy import fft as scipy_fft
+
+try:  # optional plan caching FFTW backend
+    import pyfftw
+    import pyfftw.interfaces.scipy_fft as pyfftw_fft
+
+    pyfftw.interfaces.cache.enable()
+except ImportError:
+    pyfftw = None
+
+# FFT execution context used by every transform in the package ############################
+# - backend: "scipy" (default), "numpy", or "pyfftw" (if installed)
+# - workers: threads per transform, None is the backend default, -1 is all cores
+# - planner_effort: FFTW planning effort, e.g. "FFTW_ESTIMATE" or "FFTW_MEASURE" (pyfftw only)
+# set_backend() changes the configuration for all threads, fft_context() overrides it for
+# the current thread (or task) inside a with block
+
+BACKENDS = ["scipy", "numpy", "pyfftw"]
+
+_global_config = {"backend": "scipy", "workers": None, "planner_effort": "FFTW_ESTIMATE"}
+_context_config = contextvars.ContextVar("rsp_fft_config", default=None)
+
+
+def get_config():
+    """Current FFT configuration"""
+    return _context_config.get() or dict(_global_config)
+
+
+def _checked(config):
+    assert config["backend"] in BACKENDS, f"Error: FFT backend must be in {BACKENDS}"
+    if config["backend"] == "pyfftw" and pyfftw is None:
+        raise Exception("pyfftw backend requested but pyfftw is not installed")
+    return config
+
+
+def _updated(config, backend, workers, planner_effort):
+    config = dict(config)
+    if backend is not None:
+        config["backend"] = backend
+    if workers is not None:
+        config["workers"] = workers
+    if planner_effort is not None:
+        config["planner_effort"] = planner_effort
+    return _checked(config)
+
+
+def set_backend(backend: str = None, workers: int = None, planner_effort: str = None):
+    """Set the FFT backend, workers, and planning effort for all threads"""
+    _global_config.update(_updated(_global_config, backend, workers, planner_effort))
+
+
+@contextlib.contextmanager
+def fft_context(backend: str = None, workers: int = None, planner_effort: str = None):
+    """Temporarily set the FFT backend, workers, and planning effort for the current thread"""
+    token = _context_config.set(_updated(get_config(), backend, workers, planner_effort))
+    try:
+        yield get_config()
+    finally:
+        _context_config.reset(token)
+
+
+def _same_buffer(a, b):
+    """True when a and b are views of the same memory with the same layout"""
+    return (
+        a.shape == b.shape
+        and a.strides == b.strides
+        and a.__array_interface__["data"][0] == b.__array_interface__["data"][0]
+    )
+
+
+def _transform(name, x, n, axis, overwrite_x, out):
+    config = get_config()
+    backend = config["backend"]
+    in_place = out is not None and _same_buffer(np.asarray(x), out)
+
+    if backend == "numpy":
+        return getattr(np.fft, name)(x, n, axis, out=out)
+
+    kwargs = {"overwrite_x": overwrite_x or in_place, "workers": config["workers"]}
+    if backend == "pyfftw":
+        kwargs["planner_effort"] = config["planner_effort"]
+        y = getattr(pyfftw_fft, name)(x, n, axis, **kwargs)
+    else:
+        y = getattr(scipy_fft, name)(x, n, axis, **kwargs)
+
+    if out is None:
+        return y
+    if not _same_buffer(y, out):
+        out[...] = y
+    return out
+
+
+def fft(x, n: int = None, axis: int = -1, overwrite_x: bool = False, out=None):
+    """1-D FFT with the configured backend, out may be x for an in place transform"""
+    return _transform("fft", x, n, axis, overwrite_x, out)
+
+
+def ifft(x, n: int = None, axis: int = -1, overwrite_x: bool = False, out=None):
+    """1-D inverse FFT with the configured backend, out may be x for an in place transform"""
+    return _transform("ifft", x, n, axis, overwrite_x, out)
+
+
+# helpers that are not transforms are the same for every backend
+fftshift = scipy_fft.fftshift
+ifftshift = scipy_fft.ifftshift
+fftfreq = scipy_fft.fftfreq
+next_fast_len = scipy_fft.next_fast_len
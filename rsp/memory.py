@@ -0,0 +1,45 @@
+import contextlib
+import tracemalloc
+import numpy as np
+
+# Peak memory of datacube processing ########################################################
+# - track_peak() measures the peak memory allocated by Python and NumPy (tracemalloc) inside a
+#   with block, above the memory allocated when the block starts. Blocks can be nested, the
+#   enclosing blocks still see the peaks of the inner ones
+# - tracing slows down small Python allocations, so only measured runs are traced, e.g.
+#   rdm.gen(..., memory_budget=3, memory_peak=peak) fills peak with the peak of its processing
+# - blocks(n, count) splits n rows or columns into count contiguous slices, the datacube
+#   stages of a memory budget run work on one slice at a time
+
+_open = []  # running peaks of the enclosing track_peak blocks
+
+
+@contextlib.contextmanager
+def track_peak():
+    """Measure the peak memory [bytes] of a with block, the yielded dict gets "bytes" on exit"""
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    current, peak = tracemalloc.get_traced_memory()
+    for block in _open:  # the peak so far belongs to the enclosing blocks
+        block["peak"] = max(block["peak"], peak)
+    tracemalloc.reset_peak()
+
+    result = {"start": current, "peak": current}
+    _open.append(result)
+    try:
+        yield result
+    finally:
+        _open.pop()
+        peak = tracemalloc.get_traced_memory()[1]
+        for block in _open + [result]:
+            block["peak"] = max(block["peak"], peak)
+        result["bytes"] = result["peak"] - result["start"]
+        if started:
+            tracemalloc.stop()
+
+
+def blocks(n: int, count: int):
+    """count contiguous slices covering range(n), empty slices are dropped"""
+    edges = np.linspace(0, n, min(count, n) + 1).astype(int)
+    return [slice(start, stop) for start, stop in zip(edges[:-1], edges[1:])]
@@ -0,0 +1,76 @@
+import numpy as np
+from . import fft_backend as fft
+from .memory import blocks
+
+# Slow-time clutter filters (MTI) ##########################################################
+# - applied in place along slow time (axis 1) between the match filter and Doppler processing
+# - filters are described by dicts like the waveform dicts:
+#     {"type": "two_pulse"}: 2-pulse canceller, taps [1, -1]
+#     {"type": "three_pulse"}: 3-pulse canceller, taps [1, -2, 1]
+#     {"type": "fir", "taps": [...]}: arbitrary FIR MTI filter
+#     {"type": "dc_notch", "bins": 3}: zero an odd number of Doppler bins centered on DC
+#     (slow-time FFT domain)
+# - FIR taps are normalized to unity noise power gain so the RDM stays in SNR units, the first
+#   len(taps) - 1 pulses have no complete filter output and are zeroed
+# - each filter returns its cancellation ratio, the datacube power in over power out, which is
+#   the clutter cancellation ratio when the datacube is clutter dominated
+
+CANCELLERS = {"two_pulse": [1, -1], "three_pulse": [1, -2, 1]}
+
+
+def mti_taps(spec):
+    """Unity noise gain FIR taps of a canceller or FIR spec"""
+    if isinstance(spec, str):
+        spec = {"type": spec}
+    taps = CANCELLERS[spec["type"]] if spec["type"] in CANCELLERS else spec["taps"]
+    taps = np.asarray(taps, dtype=complex)
+    return taps / np.sqrt(np.sum(abs(taps) ** 2))
+
+
+def fir_mti(dc, taps, row_blocks: int = 16):
+    """In place FIR filter along slow time, y[n] = sum_k taps[k] x[n - k]
+    row_blocks: the range bins are filtered this many blocks at a time, so the temporaries
+                (complex128 products) are about 4 / row_blocks complex64 datacubes"""
+    K = len(taps)
+    Np = dc.shape[1]
+    assert Np >= K, "Error: FIR MTI filter is longer than the CPI"
+
+    for rows in blocks(dc.shape[0], row_blocks):
+        block = dc[rows]
+        filtered = taps[0] * block[:, K - 1 :]
+        for k in range(1, K):  # loop over taps, each is a vectorized shifted slice of the block
+            filtered += taps[k] * block[:, K - 1 - k : Np - k]
+        block[:, K - 1 :] = filtered
+    dc[:, : K - 1] = 0
+
+
+def dc_notch(dc, bins: int = 3):
+    """In place notch of the Doppler bins closest to DC, through the slow-time FFT
+    bins: odd number of notched bins, centered on DC"""
+    Np = dc.shape[1]
+    assert bins >= 1 and bins % 2 == 1, "Error: dc_notch bins must be odd and at least 1"
+    assert bins <= Np, "Error: dc_notch bins must not exceed the number of pulses"
+    half = bins // 2
+    notch = np.r_[0 : half + 1, Np - half : Np]  # FFT order
+
+    fft.fft(dc, axis=1, out=dc)
+    dc[:, notch] = 0
+    fft.ifft(dc, axis=1, out=dc)
+
+
+def clutter_filter(dc, spec):
+    """Apply a slow-time clutter filter spec in place, returns the cancellation ratio
+    spec: filter type string or dict, see the top of mti.py"""
+    if isinstance(spec, str):
+        spec = {"type": spec}
+    power_in = np.sum(abs(dc) ** 2)
+
+    if spec["type"] == "dc_notch":
+        dc_notch(dc, spec.get("bins", 3))
+    elif spec["type"] in CANCELLERS or spec["type"] == "fir":
+        fir_mti(dc, mti_taps(spec))
+    else:
+        raise Exception(f"clutter filter type {spec['type']} not found.")
+
+    power_out = np.sum(abs(dc) ** 2)
+    return power_in / power_out if power_out > 0 else np.inf
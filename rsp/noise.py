@@ -1,20 +1,65 @@
+import contextlib
+import contextvars
 import numpy as np
 import numpy.random as nr
-from scipy import fft
+from . import fft_backend as fft
 from typing import Union
 from . import constants as c
+from .memory import blocks
+
+# Random state of the package's random draws ###############################################
+# - noise, random codes and random VBM phases are drawn from random_state(): the numpy global
+#   random state, or the RandomState of the innermost seeded() block of the current thread
+#   (or task), so concurrent rdm.gen calls each draw their own stream
+# - seeded(seed) draws the same numbers as np.random.seed(seed) followed by global draws
+
+_random_state = contextvars.ContextVar("rsp_random_state", default=None)
+
+
+def random_state():
+    """RandomState of the current seeded() block, else the np.random module (global state)"""
+    state = _random_state.get()
+    return nr if state is None else state
+
+
+@contextlib.contextmanager
+def seeded(seed):
+    """Draw from a RandomState(seed) inside the with block, seed as np.random.seed takes"""
+    token = _random_state.set(nr.RandomState(seed))
+    try:
+        yield _random_state.get()
+    finally:
+        _random_state.reset(token)
 
 
 def unity_var_complex_noise(inSize: Union[tuple, int]):
     """Create complex noise with unity variance"""
-    return (nr.standard_normal(size=inSize) + 1j * nr.standard_normal(size=inSize)) / np.sqrt(2)
+    state = random_state()
+    real, imag = state.standard_normal(size=inSize), state.standard_normal(size=inSize)
+    return (real + 1j * imag) / np.sqrt(2)
+
+
+def fill_complex_noise(out, scale: float = 1.0, row_blocks: int = 1):
+    """Fill a complex array in place with complex noise of standard deviation scale, the same
+    draws as unity_var_complex_noise(out.shape) * scale but drawn row_blocks blocks of rows at a
+    time, so only a block of float64 samples is allocated"""
+    state = random_state()
+    for part in [out.real, out.imag]:
+        for rows in blocks(out.shape[0], row_blocks):
+            shape = (rows.stop - rows.start,) + out.shape[1:]
+            part[rows] = state.standard_normal(size=shape) * (scale / np.sqrt(2))
+
+
+def uniform_random(size, rng=None):
+    """Uniform [0, 1) samples from a numpy Generator, or the current random_state()"""
+    return random_state().rand(size) if rng is None else rng.random(size)
 
 
-def band_limited_complex_noise(min_freq, max_freq, samples, sampleRate, normalize=False):
+def band_limited_complex_noise(min_freq, max_freq, samples, sampleRate, normalize=False, rng=None):
     freqs = fft.fftfreq(samples, 1 / sampleRate)
     f = np.zeros(samples, np.complex64)
     indices = np.where(np.logical_and(freqs >= min_freq, freqs <= max_freq))[0]
-    random_phase = 2 * np.pi * np.random.rand(indices.size)
+    random_phase = 2 * np.pi * uniform_random(indices.size, rng)
 
     # noise with random phase (needed)
     f[indices] = np.exp(1j * random_phase)
@@ -29,13 +74,12 @@ def band_limited_complex_noise(min_freq, max_freq, samples, sampleRate, normaliz
         return noise
 
 
-def guassian_complex_noise(mu, sigma, p, samples, sampleRate, normalize=False):
+def guassian_complex_noise(mu, sigma, p, samples, sampleRate, normalize=False, rng=None):
     freqs = fft.fftfreq(samples, 1 / sampleRate)
     f = np.zeros(samples, np.complex64)
     f = 1 / (sigma * np.sqrt(2 * c.PI)) * np.exp(-(((freqs - mu) ** 2 / (2 * sigma**2)) ** p)) + 0j
 
-    for i in range(f.size):
-        f[i] *= np.exp(1j * 2 * c.PI * np.random.rand())
+    f *= np.exp(1j * 2 * c.PI * uniform_random(f.size, rng))
 
     noise = fft.ifft(f) * np.sqrt(samples)
 
@@ -0,0 +1,124 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from .rf_datacube import matchfilter, doppler_process
+from .windows import slowtime_window, weighted_pulse
+from . import mti
+
+# Pipelined CPI processing ################################################################
+# - each stage runs in its own thread of a thread pool and CPIs move between stages through
+#   bounded queues, so consecutive CPIs overlap (FFTs release the GIL)
+# - a full queue blocks the stage feeding it (backpressure), so at most about
+#   maxsize * (stages + 1) CPIs are in flight
+# - stages are run by a single worker each so the output keeps the input order
+# - plotting is not thread safe, plot the outputs in the consuming thread
+
+_DONE = object()
+
+
+class _Failed:
+    """Exception raised in a stage, passed down the pipeline to the consumer"""
+
+    def __init__(self, exception):
+        self.exception = exception
+
+
+def _put(q, item, stop):
+    """Blocking put that gives up when the pipeline is stopped"""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.05)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def _get(q, stop):
+    """Blocking get that gives up when the pipeline is stopped"""
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.05)
+        except queue.Empty:
+            pass
+    return _DONE
+
+
+class CPIPipeline:
+    """Run CPIs through a list of stages, each a function of the previous stage output"""
+
+    def __init__(self, stages: list, maxsize: int = 2):
+        self.stages = list(stages)
+        self.maxsize = maxsize
+
+    def _feed(self, cpis, q, stop):
+        try:
+            for cpi in cpis:
+                if not _put(q, cpi, stop):
+                    return
+        except Exception as e:
+            _put(q, _Failed(e), stop)
+        _put(q, _DONE, stop)
+
+    def _work(self, stage, q_in, q_out, stop):
+        while True:
+            item = _get(q_in, stop)
+            if item is not _DONE and not isinstance(item, _Failed):
+                try:
+                    item = stage(item)
+                except Exception as e:
+                    item = _Failed(e)
+            if not _put(q_out, item, stop) or item is _DONE or isinstance(item, _Failed):
+                return
+
+    def run(self, cpis):
+        """Generator of the processed CPIs in input order
+        cpis: iterable of stage inputs, a generator here runs in its own thread"""
+        queues = [queue.Queue(self.maxsize) for _ in range(len(self.stages) + 1)]
+        stop = threading.Event()
+
+        with ThreadPoolExecutor(max_workers=len(self.stages) + 1) as pool:
+            pool.submit(self._feed, cpis, queues[0], stop)
+            for stage, q_in, q_out in zip(self.stages, queues[:-1], queues[1:]):
+                pool.submit(self._work, stage, q_in, q_out, stop)
+
+            try:
+                while True:
+                    item = _get(queues[-1], stop)
+                    if item is _DONE:
+                        return
+                    if isinstance(item, _Failed):
+                        raise item.exception
+                    yield item
+            finally:
+                stop.set()  # release the workers if the consumer stops early
+
+
+def rdm_stages(
+    waveform: dict, radar: dict, doppler_window="chebyshev", range_window=None, clutter_filter=None
+):
+    """Match filter, clutter filter (optional), window, and Doppler stages of rdm.gen for
+    (Nr, Np) datacubes
+    waveform must be processed (see waveform.process_waveform_dict)
+    each stage works in place and returns the datacube"""
+    pulse = weighted_pulse(waveform["pulse"], range_window)
+
+    def matchfilter_stage(dc):
+        matchfilter(dc, pulse, pedantic=False)
+        return dc
+
+    def window_stage(dc):
+        dc *= slowtime_window(doppler_window, dc.shape[1])
+        return dc
+
+    def doppler_stage(dc):
+        doppler_process(dc, radar["sampRate"])
+        return dc
+
+    def clutter_filter_stage(dc):
+        mti.clutter_filter(dc, clutter_filter)
+        return dc
+
+    if clutter_filter is None:
+        return [matchfilter_stage, window_stage, doppler_stage]
+    return [matchfilter_stage, clutter_filter_stage, window_stage, doppler_stage]
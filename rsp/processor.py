@@ -0,0 +1,119 @@
+import numpy as np
+from . import fft_backend as fft
+from . import constants as c
+from .rf_datacube import number_range_bins, range_axis
+from .noise import seeded
+from .specs import prepare
+from .rdm_helpers import add_returns, snr_onepulse
+from .trajectory import initial_target
+from .scene import Scene
+from .windows import get_window, weighted_pulse
+
+
+class RDMProcessor:
+    """Range-Doppler processing for one radar and waveform configuration
+
+    Everything that only depends on the configuration is computed once:
+    the waveform, range and range-rate axes, slow-time window, matched filter spectrum,
+    and the raw and processed datacube buffers.
+    doppler_window and range_window are window specs as in rdm.gen, see windows.py.
+    process() and simulate() reuse the buffers and return the processed buffer itself,
+    copy it if it must outlive the next call.
+    """
+
+    def __init__(
+        self,
+        radar: dict,
+        waveform: dict,
+        seed: int = 0,
+        doppler_window="chebyshev",
+        range_window=None,
+    ):
+        self.rng = np.random.default_rng(seed)
+
+        with seeded(seed):  # random coded waveforms, the global random state is left alone
+            self.radar, self.waveform = prepare(radar, waveform)
+
+        self.Nr = number_range_bins(self.radar["sampRate"], self.radar["PRF"])
+        self.Np = self.radar["Npulses"]
+        self.shape = (self.Nr, self.Np)
+
+        ### axes ###############################################
+        self.r_axis = range_axis(self.radar["sampRate"], self.Nr)
+        f_axis = fft.fftshift(fft.fftfreq(self.Np, 1 / self.radar["PRF"]))
+        self.rdot_axis = -c.C * f_axis / (2 * self.radar["fcar"])
+
+        ### slow-time window, applied as a broadcast vector ####
+        self.window = get_window(doppler_window, self.Np)
+        self._window = self.window.weights.astype(np.complex128)  # buffer dtype, no casting
+
+        ### matched filter spectrum ############################
+        # linear correlation through zero padded FFTs, the output matches the "same" mode
+        # convolution of rf_datacube.matchfilter
+        pulse = weighted_pulse(self.waveform["pulse"], range_window)
+        self.Nfft = fft.next_fast_len(self.Nr + pulse.size - 1)
+        self._mf_offset = (pulse.size - 1) // 2
+        kernel = np.conj(pulse)[::-1]
+        self.mf_spectrum = fft.fft(kernel, self.Nfft).astype(np.complex128)[:, np.newaxis]
+
+        ### preallocated buffers ###############################
+        self._raw = np.zeros((self.Nfft, self.Np), dtype=np.complex128)
+        self._processed = np.empty(self.shape, dtype=np.complex128)
+        self._half = self.Np // 2  # fftshift split point
+
+    @property
+    def raw(self):
+        """Fast-time x slow-time view of the raw buffer"""
+        return self._raw[: self.Nr]
+
+    def process(self, cube=None):
+        """Match filter, window, and Doppler process a datacube
+        cube: (Nr, Np) datacube, default is the current contents of the raw buffer
+        returns the processed buffer"""
+        if cube is not None:
+            self._raw[: self.Nr] = cube
+        self._raw[self.Nr :] = 0
+
+        # matched filter along fast time
+        fft.fft(self._raw, axis=0, out=self._raw)
+        np.multiply(self._raw, self.mf_spectrum, out=self._raw)
+        fft.ifft(self._raw, axis=0, out=self._raw)
+        mf = self._raw[self._mf_offset : self._mf_offset + self.Nr]
+
+        # window and Doppler process along slow time
+        np.multiply(mf, self._window, out=mf)
+        fft.fft(mf, axis=1, out=mf)
+
+        # fftshift into the processed buffer
+        h = self.Np - self._half
+        self._processed[:, : self._half] = mf[:, h:]
+        self._processed[:, self._half :] = mf[:, :h]
+
+        return self._processed
+
+    def add_noise(self):
+        """Add unity variance (after Doppler processing) complex noise to the raw buffer"""
+        noise = self._raw[: self.Nr].view(np.float64)
+        self.rng.standard_normal(out=noise)
+        noise *= 1 / np.sqrt(2 * self.Np)
+
+    def simulate(self, scene, return_list: list = None, noise: bool = True):
+        """Inject returns of a Scene or a single target dict, add noise, and process
+        return_list defaults to a skin return
+        returns the processed buffer"""
+        if return_list is None:
+            return_list = [{"type": "skin"}]
+        raw = self._raw[: self.Nr]
+        if noise:
+            self.add_noise()
+        else:
+            raw[:] = 0
+
+        if isinstance(scene, Scene):
+            scene.add_returns(raw, self.waveform, self.radar, return_list)
+        else:
+            target = initial_target(scene)
+            SNR_volt = np.sqrt(snr_onepulse(target, self.radar, self.waveform) / self.Np)
+            add_returns(raw, self.waveform, target, return_list, self.radar, SNR_volt)
+
+        return self.process()
@@ -1,3 +1,4 @@
+import numpy as np
 from . import constants as c
 
 
@@ -6,6 +7,11 @@ def range_unambiguous(PRF):
     return c.C / (2 * PRF)
 
 
+def number_pulses(radar: dict):
+    """Number of pulses in the CPI"""
+    return radar.get("Npulses", int(np.ceil(radar["dwell_time"] * radar["PRF"])))
+
+
 def frequency_doppler(rangeRate, f0):
     """frequnce of light recieved after reflection off target with the given rangeRate"""
     return f0 * (-2 * rangeRate / c.C)
@@ -2,10 +2,21 @@ import numpy as np
 from . import constants as c
 from .rdm_helpers import plot_rtm, plot_rdm
 from .rf_datacube import number_range_bins, range_axis, dataCube
-from .rf_datacube import matchfilter, doppler_process
-from .waveform import process_waveform_dict
-from .range_equation import snr_range_eqn
-from .rdm_helpers import add_returns, noise_checks, create_window, check_expected_snr
+from .rf_datacube import matchfilter, doppler_process, doppler_process_zoom
+from .rf_datacube import range_gate_rows, matchfilter_gated
+from .rf_datacube import decimation_factor, matchfilter_decimated
+from .noise import seeded
+from .specs import gen_inputs
+from .cache import UncacheableInput
+from .rdm_helpers import add_returns, noise_checks, create_window, check_expected_snr, snr_onepulse
+from .trajectory import initial_target
+from .windows import weighted_pulse, print_window_losses
+from .scene import Scene
+from . import mti
+from .beamforming import number_channels, beam_weights, beamform
+from .stap import stap_rdm
+from .analytic import analytic_rdm
+from .memory import track_peak, blocks
 
 
 def gen(
@@ -16,21 +27,80 @@ def gen(
     seed: int = 0,
     plot: bool = True,
     debug: bool = False,
+    cache=None,
+    doppler_window="chebyshev",
+    range_window=None,
+    doppler_zoom: dict = None,
+    range_gates: list = None,
+    range_bin_spacing: float = None,
+    clutter_filter=None,
+    beams=None,
+    stap=None,
+    components=None,
+    analytic=None,
+    memory_budget: float = None,
+    layout: str = "range",
+    memory_peak: dict = None,
 ):
     """
-    Generate a single CPI RDM for one target moving at a constant range rate.
+    Generate a single CPI RDM for one target moving at a constant range rate or along a trajectory,
+    or for the visible targets of a Scene.
 
     Parameters
     ----------
     target: dict with keys range, "rangeRate, rcs (all constant over the CPI)
+            or keys trajectory, rcs where trajectory is described in trajectory.py
+            or a Scene of such targets, each optionally with its own return_list
     radar: dict with keys fcar, txPower, txGain, rxGain, opTemp, sampRate, noiseFig, totalLosses, PRF
+           and optional key array for multi-channel datacubes (see beamforming.py)
     waveform: dict with for waveform key types in ["uncoded", "barker", "random", "lfm"]
-    returnInfo_list: list of dicts containing return types to place in the RDM, in ["skin", "memory"]
+    returnInfo_list: list of dicts containing return types to place in the RDM, in ["skin", "memory", "clutter"]
+                     (clutter keys are described in clutter.py)
+    (each dict may instead be its spec from specs.py, gen never changes its inputs)
 
     Optional parameters:
     seed: int random seed
     plot: boolean to plot the final RDM
     debug: boolean to plot each step in building the RDM and print out statistics
+    cache: cache.RDMCache to load repeated runs from disk, skipped when debugging
+    doppler_window: slow-time window type or dict (see windows.py), default 60 dB Chebyshev
+    range_window: fast-time window type or dict applied to the match filter, reduces range
+                  sidelobes (mainly for LFM) at the cost of the window's SNR loss
+    doppler_zoom: dict with keys rdot_min, rdot_max, bins to only Doppler process a range-rate
+                  interval at the given number of bins (zoom FFT), the RDMs have bins columns
+    range_gates: list of (min, max) range intervals [m], only the range bins in a gate are
+                 injected, match filtered and Doppler processed, the RDMs only have those rows
+    range_bin_spacing: output range bin spacing [m] for oversampled radars (sampRate > bw), the
+                       match filter is fused with decimation by round(spacing / (c/2fs)) and
+                       only the decimated range bins are Doppler processed
+    clutter_filter: slow-time clutter filter (MTI) type or dict applied before Doppler
+                    processing, e.g. "two_pulse", "three_pulse" (see mti.py)
+    beams: azimuths [rad] of beams formed after the match filter for array radars, default
+           None keeps every channel
+    stap: space-time adaptive processing type or dict (see stap.py) for array radars, replaces
+          the Doppler window and FFT, the RDMs are at the STAP look azimuth
+    components: cache.ComponentCache of processed returns and noise, each return (each target
+                of a Scene) and the noise are processed on their own and summed, reruns only
+                process the components whose inputs changed. Random returns (clutter, random
+                VBM) are drawn from a seed of their own, so they differ from runs without it
+    analytic: True or dict (see analytic.py) to synthesize the signal RDM of skin returns in
+              closed form on a local patch around each target, the noise is processed (or
+              taken from components) and added, supports the Doppler and range windows and
+              Doppler zoom
+    memory_budget: number of datacube sized buffers (above 2) the processing may hold at once,
+                   the noise and the returns are processed on their own and summed, in place and
+                   in blocks of pulses then of range bins sized to the budget, and the measured
+                   peak memory is printed when plotting. Budgets too small for the datacube (short CPIs have
+                   fixed per range bin temporaries) and clutter returns fail. Supports range
+                   gates, range_bin_spacing and the clutter filter, the RDMs match the default
+                   processing to float32 precision
+    layout: datacube memory layout (see rf_datacube.LAYOUTS), "range" (default) or "pulse" to
+            store each pulse's fast-time samples contiguously, so pulses are injected and match
+            filtered along contiguous memory and the datacube is corner turned to "range" layout
+            by the Doppler window for the slow-time FFT. The axes and the RDMs are unchanged
+    memory_peak: dict a memory budget run fills with its measured peak memory, "bytes",
+                 "datacubes" (of the processed datacube size) and "blocks", e.g. to size a
+                 container (not filled when the RDMs are loaded from the cache)
 
     Returns
     -------
@@ -38,75 +108,450 @@ def gen(
     r_axis: range axisk [m]
     total_dc: RDM in Volts for noise + signal
     signal_dc: RDM in Volts for signal
+    (array radars return RDMs with a third axis of channels or beams)
     """
+    # gen works on copies of its inputs and draws from a random state of its own, so it has no
+    # side effects and concurrent calls (e.g. from a thread pool) do not interfere
+    with seeded(seed):
+        target, radar, waveform, return_list = gen_inputs(target, radar, waveform, return_list)
+        return _gen(
+            target,
+            radar,
+            waveform,
+            return_list,
+            seed,
+            plot,
+            debug,
+            cache,
+            doppler_window,
+            range_window,
+            doppler_zoom,
+            range_gates,
+            range_bin_spacing,
+            clutter_filter,
+            beams,
+            stap,
+            components,
+            analytic,
+            memory_budget,
+            layout,
+            memory_peak,
+        )
 
-    # TODO: do I need to pass this seed to each function using random?
-    np.random.seed(seed)
 
-    ### Compute waveform and radar parameters ##############
-    # Use normalized pulses, the time-bandwidth poduct is used for amp scaling
-    process_waveform_dict(waveform, radar)
-    radar["Npulses"] = int(np.ceil(radar["dwell_time"] * radar["PRF"]))
+def _gen(
+    target,
+    radar: dict,
+    waveform: dict,
+    return_list: list,
+    seed,
+    plot,
+    debug,
+    cache,
+    doppler_window,
+    range_window,
+    doppler_zoom,
+    range_gates,
+    range_bin_spacing,
+    clutter_filter,
+    beams,
+    stap,
+    components,
+    analytic,
+    memory_budget,
+    layout,
+    memory_peak,
+):
+    """gen on its own copies of the inputs, with the waveform and radar["Npulses"] filled in"""
+    # range and rangeRate at the first pulse for trajectory targets, used for the SNR scaling
+    is_scene = isinstance(target, Scene)
+    if not is_scene:
+        target = initial_target(target)
+
+    # processing options, every option changing the RDMs
+    options = dict(
+        doppler_window=doppler_window,
+        range_window=range_window,
+        doppler_zoom=doppler_zoom,
+        range_gates=range_gates,
+        range_bin_spacing=range_bin_spacing,
+        clutter_filter=clutter_filter,
+        beams=beams,
+    )
+
+    ### Load repeated runs from the cache #################
+    cache_key = None
+    if cache is not None and not debug:
+        try:
+            cache_key = cache.key(
+                target,
+                radar,
+                waveform,
+                return_list,
+                seed,
+                **options,
+                stap=stap,
+                components=None if components is None else True,
+                analytic=analytic,
+                memory_budget=memory_budget,
+            )
+        except UncacheableInput as e:  # e.g. a closure trajectory, it could be another's RDM
+            print(f"Note: RDM not cached, {e}")
+    if cache_key is not None:
+        result = cache.get(cache_key)
+        if result is not None:
+            if plot:
+                rdot_axis, r_axis, total_dc, _ = result
+                title = f"Total RDM for {waveform['type']}"
+                plot_rdm(rdot_axis, r_axis, _plot_view(total_dc), title, cbarMin=0)
+            return result
 
     ### Create range axis for plotting #####################
     r_axis = range_axis(radar["sampRate"], number_range_bins(radar["sampRate"], radar["PRF"]))
 
-    ### Determin scaling factor for SNR ####################
-    # - Motivation is to  direclty plot the RDM in SNR by way of the range equation
-    # - The SNR is calculated at the initial range and does not change in time
-    SNR_onepulse = snr_range_eqn(
-        radar["txPower"],
-        radar["txGain"],
-        radar["rxGain"],
-        target["rcs"],
-        c.C / radar["fcar"],
-        target["range"],
-        waveform["bw"],
-        radar["noiseFig"],
-        radar["totalLosses"],
-        radar["opTemp"],
-        waveform["time_BW_product"],
-    )
+    ### Range gates ########################################
+    # keep the gate range bins and the match filter margins around them
+    rows, range_interval = None, None
+    if range_gates is not None:
+        rows, in_gate = range_gate_rows(r_axis, range_gates, waveform["pulse"].size)
+        r_axis = r_axis[rows]
+        pulse_range = c.C * waveform["pulse_width"] / 2
+        range_interval = (r_axis[0] - pulse_range, r_axis[-1] + pulse_range)
+
+    Nr = None if rows is None else rows.size
+    channels = number_channels(radar)
+    cube_args = (radar["sampRate"], radar["PRF"], radar["Npulses"])
+
+    ### Processing chain #################################
+    mf_pulse = weighted_pulse(waveform["pulse"], range_window)
+    D = 1 if range_bin_spacing is None else decimation_factor(radar["sampRate"], range_bin_spacing)
+    keep = None
+    if rows is not None:
+        # drop the match filter margins and the range bins off the decimated grid
+        keep = in_gate & (rows % D == 0)
+    weights = None
+    if beams is not None:
+        assert channels is not None, "Error: beams need a radar with an array"
+        weights = beam_weights(radar["array"], radar["fcar"], beams)
+
+    def process(dc, pedantic=True):
+        dc = _match_filter(dc, mf_pulse, rows, keep, D, pedantic)
+        if clutter_filter is not None:
+            mti.clutter_filter(dc, clutter_filter)
+        if weights is not None:
+            dc = beamform(dc, weights)
+        return _doppler_process(dc, radar, doppler_window, doppler_zoom)
+
+    if components is not None or analytic:
+        if is_scene:
+            groups = target.returns(waveform, radar, return_list, range_interval)
+        else:
+            SNR_volt = np.sqrt(snr_onepulse(target, radar, waveform) / radar["Npulses"])
+            groups = [(target, [returnItem], SNR_volt) for returnItem in return_list]
+        component_args = (radar, waveform, seed, options)
+        dc_args = (cube_args, Nr, channels, layout)
+        r_axis = r_axis[keep] if rows is not None else r_axis[::D]
+
+    ### Analytic signal RDM ################################
+    if analytic:
+        supported = [rows, range_bin_spacing, clutter_filter, beams, stap, channels]
+        assert all(x is None for x in supported), "Error: analytic RDMs are single channel RDMs"
+        rdot_axis, total_dc = _processed_noise(
+            components, lambda dc: process(dc, pedantic=False), component_args, dc_args
+        )
+        signal_dc = analytic_rdm(
+            groups, radar, waveform, mf_pulse, doppler_window, rdot_axis, analytic
+        )
+        total_dc = total_dc + signal_dc
+        return _output(rdot_axis, r_axis, total_dc, signal_dc, waveform, plot, cache, cache_key)
 
-    SNR_volt = np.sqrt(SNR_onepulse / radar["Npulses"])
+    ### Sum of processed components ########################
+    if components is not None:
+        assert stap is None, "Error: STAP weights depend on the whole datacube, no components"
+        rdot_axis, total_dc, signal_dc = _sum_components(
+            components, process, groups, component_args, dc_args, rows
+        )
+        return _output(rdot_axis, r_axis, total_dc, signal_dc, waveform, plot, cache, cache_key)
+
+    ### Processing within a memory budget ################
+    if memory_budget is not None:
+        supported = [beams, stap, doppler_zoom, components, analytic or None]
+        assert all(x is None for x in supported), "Error: no memory budget for this processing"
+        assert not debug, "Error: debugging keeps every datacube, no memory budget"
+        assert memory_budget > 2, "Error: memory budget must be above 2 (signal and total RDMs)"
+        if is_scene:
+            groups = target.returns(waveform, radar, return_list, range_interval)
+        else:
+            groups = [(target, return_list, None)]
+        clutter = any(r["type"] == "clutter" for _, returns, _ in groups for r in returns)
+        assert not clutter, "Error: clutter returns are whole datacube FFTs, no memory budget"
+        Nout = len(range(0, Nr or r_axis.size, D)) if rows is None else np.count_nonzero(keep)
+        cube = np.dtype(np.complex64).itemsize * (Nr or r_axis.size) * radar["Npulses"]
+        cube *= channels or 1
+        # memory that does not shrink with the blocks, 64 bytes per range bin (gated or not):
+        # the float64 range axis and int64 injection row index (8 + 8) and the complex128 match
+        # filter spectrum, padded FFT of a pulse and its inverse (3 * 16)
+        overhead = 64 * number_range_bins(radar["sampRate"], radar["PRF"]) / cube
+        count = _budget_blocks(memory_budget - overhead, [radar["Npulses"], Nout])
+        chain = (mf_pulse, rows, keep, D, clutter_filter, radar, doppler_window, count)
+        with track_peak() as peak:
+            noise_dc = dataCube(
+                *cube_args, noise=True, Nr=Nr, channels=channels, row_blocks=count, layout=layout
+            )
+            signal_dc = dataCube(*cube_args, Nr=Nr, channels=channels, layout=layout)
+            if is_scene:
+                target.add_returns(signal_dc, waveform, radar, return_list, range_interval, rows)
+            else:
+                SNR_volt = np.sqrt(snr_onepulse(target, radar, waveform) / radar["Npulses"])
+                add_returns(signal_dc, waveform, target, return_list, radar, SNR_volt, rows)
+
+            rdot_axis, signal_dc = _budget_process(signal_dc, *chain, report=True)
+            _, total_dc = _budget_process(noise_dc, *chain)
+            total_dc += signal_dc  # processing is linear, the noise datacube becomes the total
+        used = {"bytes": peak["bytes"], "datacubes": peak["bytes"] / cube, "blocks": count}
+        if memory_peak is not None:
+            memory_peak.update(used)
+        if plot:
+            print(
+                f"Peak memory: {used['bytes'] / 2**20:.1f} MiB, {used['datacubes']:.2f}"
+                f" datacubes (budget {memory_budget}, {count} blocks)"
+            )
+        r_axis = r_axis[keep] if rows is not None else r_axis[::D]
+        return _output(rdot_axis, r_axis, total_dc, signal_dc, waveform, plot, cache, cache_key)
 
     ### Return  ##########################################
-    signal_dc = dataCube(radar["sampRate"], radar["PRF"], radar["Npulses"])
-    noise_dc = dataCube(radar["sampRate"], radar["PRF"], radar["Npulses"], noise=True)
-    add_returns(signal_dc, waveform, target, return_list, radar, SNR_volt)
+    signal_dc = dataCube(*cube_args, Nr=Nr, channels=channels, layout=layout)
+    noise_dc = dataCube(*cube_args, noise=True, Nr=Nr, channels=channels, layout=layout)
+
+    if is_scene:
+        # each visible target is scaled by its own range equation SNR
+        target.add_returns(signal_dc, waveform, radar, return_list, range_interval, rows)
+    else:
+        ### Determin scaling factor for SNR ####################
+        # - Motivation is to  direclty plot the RDM in SNR by way of the range equation
+        # - The SNR is calculated at the initial range and does not change in time
+        SNR_onepulse = snr_onepulse(target, radar, waveform)
+        SNR_volt = np.sqrt(SNR_onepulse / radar["Npulses"])
+        add_returns(signal_dc, waveform, target, return_list, radar, SNR_volt, rows)
+
     total_dc = signal_dc + noise_dc  # adding after return keeps clean signal_dc for plotting
 
     if debug:
-        plot_rtm(r_axis, signal_dc, "Noiseless RTM: unprocessed")
+        plot_rtm(r_axis, _plot_view(signal_dc), "Noiseless RTM: unprocessed")
 
     ### Apply the match filter #############################
-    for dc in [signal_dc, total_dc]:
-        matchfilter(dc, waveform["pulse"], pedantic=True)
+    signal_dc = _match_filter(signal_dc, mf_pulse, rows, keep, D)
+    total_dc = _match_filter(total_dc, mf_pulse, rows, keep, D)
+    if rows is not None:
+        noise_dc, r_axis = noise_dc[keep], r_axis[keep]
+    elif D > 1:
+        noise_dc, r_axis = noise_dc[::D], r_axis[::D]
 
     if debug:
-        plot_rtm(r_axis, signal_dc, "Noiseless RTM: match filtered")
+        plot_rtm(r_axis, _plot_view(signal_dc), "Noiseless RTM: match filtered")
 
-    ### Doppler process ####################################
-    # first create filter window and apply it
-    chwin_norm_mat = create_window(signal_dc.shape, plot=False)
-    total_dc = total_dc * chwin_norm_mat
-    signal_dc = signal_dc * chwin_norm_mat
+    ### Clutter filter ####################################
+    if clutter_filter is not None:
+        cancellation = mti.clutter_filter(signal_dc, clutter_filter)
+        mti.clutter_filter(total_dc, clutter_filter)
+        if debug:
+            mti.clutter_filter(noise_dc, clutter_filter)
+        print(f"Clutter filter cancellation ratio: {10*np.log10(cancellation):.1f} dB")
 
-    # Doppler process datacubes
-    for dc in [signal_dc, total_dc]:
-        f_axis, r_axis = doppler_process(dc, radar["sampRate"])
+    ### Beamform ##########################################
+    # all beams are formed with one matrix multiply, later stages process beams not channels
+    if beams is not None:
+        signal_dc, total_dc = beamform(signal_dc, weights), beamform(total_dc, weights)
+        if debug:
+            noise_dc = beamform(noise_dc, weights)
 
-    # calc rangeRate axis  #f = -2* fc/c Rdot -> Rdot = -c+f/ (2+fc)
-    print("TODO: why PRF/fs ratio at end?")
-    rdot_axis = -c.C * f_axis / (2 * radar["fcar"]) * radar["PRF"] / radar["sampRate"]
+    ### Doppler process ####################################
+    if stap is not None:
+        # adaptive space-time weights replace the window and the Doppler FFT
+        assert channels is not None, "Error: STAP needs a radar with an array"
+        assert beams is None and doppler_zoom is None, "Error: STAP replaces beams and zoom"
+        noise_power = 1 / radar["Npulses"]  # of the noise datacube
+        rdot_axis, total_dc, signal_dc = stap_rdm(total_dc, radar, stap, signal_dc, noise_power)
+    else:
+        rdot_axis, signal_dc = _doppler_process(signal_dc, radar, doppler_window, doppler_zoom)
+        rdot_axis, total_dc = _doppler_process(total_dc, radar, doppler_window, doppler_zoom)
 
     if debug:
-        plot_rdm(rdot_axis, r_axis, signal_dc, "Noiseless RDM")
+        plot_rdm(rdot_axis, r_axis, _plot_view(signal_dc), "Noiseless RDM")
         # SNR and noise checks
-        check_expected_snr(radar, target, waveform, SNR_onepulse, SNR_volt)
+        if not is_scene:
+            check_expected_snr(radar, target, waveform, SNR_onepulse, SNR_volt)
+        print_window_losses(signal_dc.shape, doppler_window, waveform["pulse"].size, range_window)
         noise_checks(signal_dc, noise_dc, total_dc)
 
     if plot or debug:
-        plot_rdm(rdot_axis, r_axis, total_dc, f"Total RDM for {waveform['type']}", cbarMin=0)
+        title = f"Total RDM for {waveform['type']}"
+        plot_rdm(rdot_axis, r_axis, _plot_view(total_dc), title, cbarMin=0)
+
+    if cache_key is not None:
+        cache.put(cache_key, rdot_axis, r_axis, total_dc, signal_dc)
 
     return rdot_axis, r_axis, total_dc, signal_dc
+
+
+def _plot_view(dc):
+    """Datacube to plot, the first channel or beam of array datacubes"""
+    return dc if dc.ndim == 2 else dc[..., 0]
+
+
+def _processed_noise(components, process, component_args, dc_args):
+    """rdot_axis and processed noise, from the components cache when given"""
+    cube_args, Nr, channels, layout = dc_args
+    key = None if components is None else components.key("noise", *component_args)
+    noise = None if components is None else components.get(key)
+    if noise is None:
+        noise_dc = dataCube(*cube_args, noise=True, Nr=Nr, channels=channels, layout=layout)
+        noise = process(noise_dc)
+        if components is not None:
+            components.put(key, *noise)
+    return noise
+
+
+def _output(rdot_axis, r_axis, total_dc, signal_dc, waveform, plot, cache, cache_key):
+    """Plot and cache gen's outputs"""
+    if plot:
+        title = f"Total RDM for {waveform['type']}"
+        plot_rdm(rdot_axis, r_axis, _plot_view(total_dc), title, cbarMin=0)
+    if cache_key is not None:
+        cache.put(cache_key, rdot_axis, r_axis, total_dc, signal_dc)
+    return rdot_axis, r_axis, total_dc, signal_dc
+
+
+def _sum_components(components, process, groups, component_args, dc_args, rows):
+    """Sum of the processed noise and the processed returns of each group, from the components
+    cache when their inputs are unchanged
+    groups: (target, returns, SNR_volt) of each component
+    returns rdot_axis, total RDM and signal RDM"""
+    cube_args, Nr, channels, layout = dc_args
+    seed = component_args[2]
+
+    # the noise is drawn first, as in the full pipeline
+    rdot_axis, total_dc = _processed_noise(components, process, component_args, dc_args)
+    total_dc = total_dc.copy()
+    signal_dc = np.zeros_like(total_dc)
+
+    for target, returns, SNR_volt in groups:
+        key = components.key("returns", target, returns, *component_args)
+        component = components.get(key)
+        if component is None:
+            # random returns get their own seed, so they do not depend on other components
+            with seeded([seed, int(key[:8], 16)]):
+                dc = dataCube(*cube_args, Nr=Nr, channels=channels, layout=layout)
+                add_returns(
+                    dc, component_args[1], target, returns, component_args[0], SNR_volt, rows
+                )
+            component = process(dc)
+            components.put(key, *component)
+        signal_dc += component[1]
+
+    total_dc += signal_dc
+    return rdot_axis, total_dc, signal_dc
+
+
+def _budget_process(
+    dc, mf_pulse, rows, keep, D: int, clutter_filter, radar, doppler_window, count, report=False
+):
+    """Process a datacube in place for a memory budget: match filter count blocks of pulses, then
+    clutter filter, window and Doppler process count blocks of range bins, so the temporaries
+    are about 6 / count datacubes. Returns rdot_axis and the RDM, a view of dc
+    report: print the clutter filter cancellation ratio"""
+    # match filter outputs overwrite the first rows of their own pulses
+    Nout = len(range(0, dc.shape[0], D)) if rows is None else np.count_nonzero(keep)
+    for pulses in blocks(dc.shape[1], count):
+        block = dc[:, pulses]
+        if rows is not None:
+            matchfilter_gated(block, mf_pulse, rows, pedantic=False)
+            block[:Nout] = block[keep]
+        elif D > 1:
+            block[:Nout] = matchfilter_decimated(block, mf_pulse, D)
+        else:
+            matchfilter(block, mf_pulse, pedantic=False)
+    dc = dc[:Nout]
+
+    window = create_window(dc.shape, plot=False, spec=doppler_window)
+    if dc.ndim == 3:
+        window = window[..., np.newaxis]
+    power = np.zeros(2)  # clutter filter input and output power
+    for range_bins in blocks(Nout, count):
+        block = dc[range_bins]
+        if clutter_filter is not None:
+            power[0] += np.vdot(block, block).real
+            mti.clutter_filter(block, clutter_filter)
+            power[1] += np.vdot(block, block).real
+        if block.flags.c_contiguous:
+            block *= window
+            f_axis, _ = doppler_process(block, radar["sampRate"])
+        else:  # "pulse" layout, the slow-time FFT runs on a corner turned copy of the block
+            spectrum = np.multiply(block, window, order="C")
+            f_axis, _ = doppler_process(spectrum, radar["sampRate"])
+            block[:] = spectrum
+    if clutter_filter is not None and report:
+        cancellation = power[0] / power[1] if power[1] > 0 else np.inf
+        print(f"Clutter filter cancellation ratio: {10*np.log10(cancellation):.1f} dB")
+    return _rdot_axis(f_axis, radar), dc
+
+
+def _budget_blocks(memory_budget, sizes):
+    """Number of blocks of a memory budget run, each block of pulses or range bins is at most
+    (memory_budget - 2) / 8 of the sizes (pulses, processed range bins)
+    - 2 datacubes hold the signal and the noise (then total) RDMs
+    - measured temporaries of a block are about 2 blocks in "range" layout (the complex128
+      padded FFTs) and 6 in "pulse" layout (strided blocks are copied for the FFTs and the
+      corner turn), the float64 noise draws 1 block and injection under 1/16 datacube, so 8
+      blocks cover both layouts"""
+    largest = [int((memory_budget - 2) / 8 * n) for n in sizes]
+    assert min(largest) > 0, "Error: memory budget too small for this datacube"
+    return max(int(np.ceil(n / m)) for n, m in zip(sizes, largest))
+
+
+def _rdot_axis(f_axis, radar: dict):
+    """Range rate axis [m/s] of the Doppler frequencies of doppler_process"""
+    # f = -2* fc/c Rdot -> Rdot = -c+f/ (2+fc)
+    # TODO: why PRF/fs ratio at end?
+    return -c.C * f_axis / (2 * radar["fcar"]) * radar["PRF"] / radar["sampRate"]
+
+
+def _match_filter(dc, mf_pulse, rows, keep, D: int, pedantic=True):
+    """Match filter a datacube, gated datacubes only keep the keep rows and oversampled
+    datacubes are decimated by D"""
+    if rows is not None:
+        matchfilter_gated(dc, mf_pulse, rows)
+        return dc[keep]
+    if D > 1:
+        # polyphase match filter only computes the kept range bins
+        return matchfilter_decimated(dc, mf_pulse, D)
+    matchfilter(dc, mf_pulse, pedantic=pedantic)
+    return dc
+
+
+def _doppler_process(dc, radar: dict, doppler_window, doppler_zoom: dict):
+    """Window and Doppler process a datacube, returns rdot_axis and the RDM"""
+    # first create filter window and apply it, the (1, Np) window broadcasts over range
+    chwin_norm = create_window(dc.shape, plot=False, spec=doppler_window)
+    if dc.ndim == 3:
+        chwin_norm = chwin_norm[..., np.newaxis]  # and over channels or beams
+    # the windowed datacube is in "range" layout (corner turned), slow time is contiguous
+    dc = np.multiply(dc, chwin_norm, order="C")
+
+    # Doppler process datacubes
+    if doppler_zoom is not None:
+        zoom_args = (
+            radar["sampRate"],
+            radar["PRF"],
+            radar["fcar"],
+            doppler_zoom["rdot_min"],
+            doppler_zoom["rdot_max"],
+            doppler_zoom["bins"],
+        )
+        dc, rdot_axis, _ = doppler_process_zoom(dc, *zoom_args)
+        return rdot_axis, dc
+
+    f_axis, _ = doppler_process(dc, radar["sampRate"])
+
+    # calc rangeRate axis
+    return _rdot_axis(f_axis, radar), dc
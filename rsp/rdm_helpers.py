@@ -1,14 +1,20 @@
 import sys
 import numpy as np
-from numpy.linalg import norm
 import matplotlib.pyplot as plt
-from scipy import signal, fft
+from . import fft_backend as fft
 from .pulse_doppler_radar import range_unambiguous
 from . import constants as c
-from .waveform_helpers import add_waveform_at_index
+from .waveform_helpers import waveform_sample_indices
+from .rf_datacube import number_range_bins
 from .utilities import phase_negpi_pospi
-from .range_equation import snr_range_eqn_cp
+from .range_equation import snr_range_eqn, snr_range_eqn_cp
 from . import vbm
+from .windows import slowtime_window
+from .trajectory import range_and_rangerate, target_range_and_rangerate
+from .clutter import add_clutter
+from .technique import technique_tables
+from .beamforming import target_steering
+from .memory import blocks
 
 
 def first_echo_pulse_bin(range, PRF):
@@ -60,13 +66,68 @@ def plot_rdm(rdot_axis, r_axis, data, title, cbarMin=0, volt2db=True):
     return fig, ax
 
 
-def add_skin(signal_dc, wvf: dict, tgtInfo: dict, radar: dict, SNR_volt):
+def pulse_return_indices(pulse_return_time, radar: dict, size: int):
+    """Nearest fast-time sample index (in the flattened CPI) of each pulse return time"""
+    timeIndex = np.rint(np.asarray(pulse_return_time) * radar["sampRate"]).astype(int)
+    return np.clip(timeIndex, 0, size - 1)
+
+
+def inject_pulses(
+    signal_dc, amplitudes, pulse, pulse_return_time, radar: dict, rows=None, steering=None
+):
+    """Add the pulse, scaled by each of the amplitudes, to the datacube at each return time
+    rows: range bin of each datacube row when the datacube only holds some range bins
+          (see rf_datacube.range_gate_rows), samples landing in other range bins are dropped
+    steering: (channels,) phases of the return at each element for array datacubes
+              (see beamforming.py), default boresight
+    the returns are added a block at a time, so the index and sample temporaries stay a small
+    fraction of the datacube (see rdm.gen memory_budget)"""
+    Nr = signal_dc.shape[0] if rows is None else number_range_bins(radar["sampRate"], radar["PRF"])
+    Np = signal_dc.shape[1]
+    timeIndex = pulse_return_indices(pulse_return_time, radar, Nr * Np)
+    amplitudes = np.broadcast_to(amplitudes, timeIndex.shape)
+
+    if rows is not None:
+        # time index in the datacube holding only the rows
+        row_index = np.full(Nr, -1)
+        row_index[rows] = np.arange(len(rows))
+
+    # about 128 bytes of temporaries per (channel) sample, at most 1/16 of the datacube
+    samples = pulse.size * (signal_dc.shape[2] if signal_dc.ndim == 3 else 1)
+    count = int(np.ceil(timeIndex.size * samples * 128 / (signal_dc.nbytes / 16)))
+    for returns in blocks(timeIndex.size, count):
+        # pulses are contiguous in time, which runs down the range bins then across pulses
+        # TODO is this how these should be binned? Should they be interpolated onto grid?
+        pos, keep = waveform_sample_indices(Nr * Np, timeIndex[returns], pulse.size)
+        values = amplitudes[returns, np.newaxis] * pulse
+        pos, values = pos[keep], values[keep]
+
+        if rows is not None:
+            row = row_index[pos % Nr]
+            kept = row >= 0
+            pos, values = (pos // Nr)[kept] * len(rows) + row[kept], values[kept]
+
+        if signal_dc.ndim == 3:
+            values = values[:, np.newaxis] * (1 if steering is None else steering)
+
+        # matching the datacube dtype keeps np.add.at off its much slower casting path
+        values = values.astype(signal_dc.dtype, copy=False)
+        if signal_dc.flags.f_contiguous:
+            # "pulse" layout datacubes store the time index contiguously, pulses are added in
+            # place to a (Nr * Np) or (Nr * Np, channels) view
+            time_view = signal_dc.reshape((-1,) + signal_dc.shape[2:], order="F")
+            np.add.at(time_view, pos, values)
+        else:
+            Nrows = signal_dc.shape[0]
+            np.add.at(signal_dc, (pos % Nrows, pos // Nrows), values)
+
+
+def add_skin(signal_dc, wvf: dict, tgtInfo: dict, radar: dict, SNR_volt, rows=None, steering=None):
     """Add skin return to the datacube"""
     # time and range arrays
-    time_ar = np.arange(signal_dc.size) * 1 / radar["sampRate"]  # time of all samples in CPI
     t_slow_axis = np.arange(radar["Npulses"]) * 1 / radar["PRF"]  # time when pulses sent
 
-    tgt_range_ar = tgtInfo["range"] + tgtInfo["rangeRate"] * t_slow_axis  # tgt range at pulse send
+    tgt_range_ar, _ = target_range_and_rangerate(tgtInfo, t_slow_axis)  # tgt range at pulse send
     twoWay_time_delay_ar = 2 * tgt_range_ar / c.C  # time of travel from radar to tgt and back
     pulse_return_time = t_slow_axis + twoWay_time_delay_ar  # time pulses return to radar
     twoWay_phase_ar = -2 * c.PI * radar["fcar"] * twoWay_time_delay_ar  # Phase added due to
@@ -74,31 +135,30 @@ def add_skin(signal_dc, wvf: dict, tgtInfo: dict, radar: dict, SNR_volt):
     ## pulses timed from their start not their center, we compensate with pw/2 range offset
     time_pw_offset = wvf["pulse_width"] / 2
 
-    # Due to the time axis being the non-continuous (slow) axis, we most do some transposing
-    tmpSignal = signal_dc.T.flatten()
-
-    for i in range(radar["Npulses"]):
-        # TODO is this how these should be binned? Should they be interpolated onto grid?
-        timeIndex = np.argmin(abs(time_ar - pulse_return_time[i] + time_pw_offset))
-        pulse = SNR_volt * wvf["pulse"] * np.exp(1j * twoWay_phase_ar[i])
-
-        if timeIndex < signal_dc.size:  # else pulse is in next CPI
-            add_waveform_at_index(tmpSignal, pulse, timeIndex)
-
-    tmpSignal = tmpSignal.reshape(tuple(reversed(signal_dc.shape))).T
-
-    signal_dc[:] = tmpSignal[:]
+    amplitudes = SNR_volt * np.exp(1j * twoWay_phase_ar)
+
+    # pulses landing past the end of the datacube are in the next CPI
+    inject_pulses(
+        signal_dc,
+        amplitudes,
+        wvf["pulse"],
+        pulse_return_time - time_pw_offset,
+        radar,
+        rows,
+        steering,
+    )
 
 
-def add_memory(signal_dc, wvf: dict, tgtInfo: dict, radar: dict, returnInfo, SNR_volt):
+def add_memory(
+    signal_dc, wvf: dict, tgtInfo: dict, radar: dict, returnInfo, SNR_volt, rows=None, steering=None
+):
     """Add notional memory return to datacube"""
     print("Note: memory return amplitudes are notional")
 
     # time and range arrays
-    time_ar = np.arange(signal_dc.size) * 1 / radar["sampRate"]  # time of all samples in CPI
     t_slow_axis = np.arange(radar["Npulses"]) * 1 / radar["PRF"]  # time when pulses sent
 
-    tgt_range_ar = tgtInfo["range"] + tgtInfo["rangeRate"] * t_slow_axis  # tgt range at pulse send
+    tgt_range_ar, _ = target_range_and_rangerate(tgtInfo, t_slow_axis)  # tgt range at pulse send
     oneWay_time_delay_ar = tgt_range_ar / c.C  # time of travel from radar to tgt
     # TODO this should be changed to when pod transmits, not when pulse was transmitted
     pulse_return_time = t_slow_axis + 2 * oneWay_time_delay_ar  # time pulses return to radar
@@ -113,14 +173,18 @@ def add_memory(signal_dc, wvf: dict, tgtInfo: dict, radar: dict, returnInfo, SNR
 
     # Achieve Velocity Bin Masking (VBM) by adding pahse in slow time #################
     if "rdot_delta" in returnInfo.keys():
-        # there are several methods implemented, lfm is best, see vbm.py
-        vbm_noise_function = returnInfo.get("vbm_noise_function", vbm._lfm_phase)
+        # there are several techniques registered, lfm is best, see vbm.py
+        # - "vbm_noise_function" (a function or name) is the older key for "vbm"
+        technique = returnInfo.get("vbm", returnInfo.get("vbm_noise_function", "lfm"))
+        # - random techniques use their own generator when the return has a "vbm_seed"
+        rng = np.random.default_rng(returnInfo["vbm_seed"]) if "vbm_seed" in returnInfo else None
         slowtime_noise = vbm.slowtime_noise(
             radar["Npulses"],
             radar["fcar"],
             returnInfo["rdot_delta"],
             radar["PRF"],
-            noiseFun=vbm_noise_function,
+            noiseFun=technique,
+            rng=rng,
         )
 
     else:
@@ -131,52 +195,52 @@ def add_memory(signal_dc, wvf: dict, tgtInfo: dict, radar: dict, returnInfo, SNR
     delay = returnInfo.get("delay", 0)
     delay += 2 * returnInfo.get("range_offset", 0) / c.C
 
-    stored_pulse = 0
-    stored_angle = 0  # initialize to stop lsp from complaining
-
-    # Due to the time axis being the non-continuous (slow) axis, we most do some transposing
-    tmpSignal = signal_dc.T.flatten()
-
-    for i in range(radar["Npulses"]):
-        # pulse recieved by the EW system
-        recieved_pulse = wvf["pulse"] * np.exp(1j * oneWay_phase_ar[i])
-
-        # Store first pulse and wait for next pulse
-        if i == 0:
-            stored_pulse = recieved_pulse
-            continue
-
-        # Calculate 1-way phase difference between first two pulses
-        # - in a more complicated system, we'd look at the phase diff of max of match filter
-        if i == 1:
-            stored_angle = np.angle(recieved_pulse) - np.angle(stored_pulse)
-            stored_angle = phase_negpi_pospi(stored_angle)
-            stored_angle = np.mean(stored_angle)
-
-        # Create base pulse
-        # - TODO set amplitude base on pod parameters
-        pulse = SNR_volt * stored_pulse
+    # pulses recieved by the EW system, the first is stored and repeated on later pulses
+    # - a single pulse CPI has no later pulse to repeat it on
+    if radar["Npulses"] < 2:
+        return
+    stored_pulse = wvf["pulse"] * np.exp(1j * oneWay_phase_ar[0])
+
+    # Calculate 1-way phase difference between first two pulses
+    # - in a more complicated system, we'd look at the phase diff of max of match filter
+    stored_angle = np.angle(wvf["pulse"] * np.exp(1j * oneWay_phase_ar[1])) - np.angle(stored_pulse)
+    stored_angle = np.mean(phase_negpi_pospi(stored_angle))
+
+    # Slow-time phase of each repeated pulse (the first pulse is only stored)
+    i = np.arange(1, radar["Npulses"])
+    slowtime_phase = (
+        slowtime_noise[i]  # add slowtime noise (VBM)
+        * np.exp(1j * i * stored_angle)  # add stored pulse difference rdot
+        * np.exp(-1j * i * 2 * c.PI * f_rdot / radar["PRF"])  # add rdot offset
+        * np.exp(1j * oneWay_phase_ar[i])  # add 1-way propagation phase back to radar
+    )
 
-        # add slowtime noise (VBM)
-        pulse = pulse * slowtime_noise[i]
+    # Create base pulse
+    # - TODO set amplitude base on pod parameters
+    amplitudes = SNR_volt * slowtime_phase
+    return_time = pulse_return_time[i] + delay - time_pw_offset
 
-        # add stored pulse difference rdot
-        pulse = pulse * (np.exp(1j * i * stored_angle))
+    # pulses landing past the end of the datacube are in the next CPI
+    inject_pulses(signal_dc, amplitudes, stored_pulse, return_time, radar, rows, steering)
 
-        # add rdot offset
-        pulse = pulse * (np.exp(-1j * i * 2 * c.PI * f_rdot / radar["PRF"]))
 
-        # add 1-way propagation phase back to radar
-        pulse = pulse * np.exp(1j * oneWay_phase_ar[i])
+def add_technique(
+    signal_dc, wvf: dict, tgtInfo: dict, radar: dict, technique, SNR_volt, rows=None, steering=None
+):
+    """Add every false target of a DRFM technique program to the datacube (see technique.py)"""
+    print("Note: technique return amplitudes are notional")
+    return_time, phase, amplitude = technique_tables(technique, tgtInfo, radar)
 
-        # TODO is this how these should be binned? Should they be interpolated onto grid?
-        timeIndex = np.argmin(abs(time_ar - pulse_return_time[i] - delay + time_pw_offset))
-        if timeIndex < signal_dc.size:  # else pulse is in next CPI
-            add_waveform_at_index(tmpSignal, pulse, timeIndex)
+    ## pulses timed from their start not their center, we compensate with pw/2 range offset
+    time_pw_offset = wvf["pulse_width"] / 2
 
-    tmpSignal = tmpSignal.reshape(tuple(reversed(signal_dc.shape))).T
+    # (F * Np,) amplitudes of the pulses of every false target at once, in the pulse dtype
+    values = SNR_volt * amplitude[:, np.newaxis] * np.exp(1j * phase)
+    amplitudes = values.ravel().astype(wvf["pulse"].dtype)
+    return_time = return_time.ravel() - time_pw_offset
 
-    signal_dc[:] = tmpSignal[:]
+    # pulses landing past the end of the datacube are in the next CPI
+    inject_pulses(signal_dc, amplitudes, wvf["pulse"], return_time, radar, rows, steering)
 
 
 def noise_checks(signal_dc, noise_dc, total_dc):
@@ -194,6 +258,24 @@ def noise_checks(signal_dc, noise_dc, total_dc):
     print(f"\t{20*np.log10(np.max(abs(total_dc)))=:.2f}")
 
 
+def snr_onepulse(target: dict, radar: dict, wvf: dict):
+    """Single-pulse SNR of the target at its initial range from the range equation
+    - target "range" and "rcs" may be arrays to evaluate many targets at once"""
+    return snr_range_eqn(
+        radar["txPower"],
+        radar["txGain"],
+        radar["rxGain"],
+        target["rcs"],
+        c.C / radar["fcar"],
+        target["range"],
+        wvf["bw"],
+        radar["noiseFig"],
+        radar["totalLosses"],
+        radar["opTemp"],
+        wvf["time_BW_product"],
+    )
+
+
 def check_expected_snr(radar, target, waveform, SNR1, SNR_volt):
     SNR_expected = snr_range_eqn_cp(
         radar["txPower"],
@@ -217,45 +299,39 @@ def check_expected_snr(radar, target, waveform, SNR1, SNR_volt):
     print(f"\t{10*np.log10(SNR_expected)=:.2f}")
 
 
-def create_window(inShape: tuple, plot=True):
-    """Create windowing function"""
-    chwin = signal.windows.chebwin(inShape[1], 60)
-    chwin_norm = chwin / np.mean(chwin)
-    chwin_norm = chwin_norm.reshape((1, chwin.size))
-    tmp = np.ones((inShape[0], 1))
-    chwin_norm_mat = tmp @ chwin_norm
+def create_window(inShape: tuple, plot=True, spec="chebyshev"):
+    """Create slow-time windowing function, a (1, Np) vector that broadcasts over the datacube
+    spec: window type or dict, see windows.py, default is a 60 dB Chebyshev window"""
+    chwin_norm = slowtime_window(spec, inShape[1])
     if plot:
         plt.figure()
         plt.title("Window")
-        plt.imshow(chwin_norm_mat)
+        plt.imshow(np.broadcast_to(chwin_norm, inShape))
         plt.xlabel("slow time")
         plt.ylabel("fast time")
         plt.colorbar()
 
-    return chwin_norm_mat
+    return chwin_norm
 
 
-def add_returns(dc, wvf, target, return_list, radar, amp_volt):
+def add_returns(dc, wvf, target, return_list, radar, amp_volt, rows=None):
     """Add returns from the return_list to the data cube
-    Note: memory return amplitude is not physical"""
+    rows: range bin of each datacube row for range gated datacubes (default all range bins)
+    array datacubes (Nr, Np, channels) get the target's steering phases (see beamforming.py)
+    Note: memory and technique return amplitudes are not physical, clutter is scaled by its own range equation
+    """
+    steering = None
+    if dc.ndim == 3 and target is not None:
+        steering = target_steering(target, radar)
+
     for returnItem in return_list:
         if returnItem["type"] == "skin":
-            add_skin(dc, wvf, target, radar, amp_volt)
+            add_skin(dc, wvf, target, radar, amp_volt, rows, steering)
         elif returnItem["type"] == "memory":
-            add_memory(dc, wvf, target, radar, returnItem, amp_volt)
+            add_memory(dc, wvf, target, radar, returnItem, amp_volt, rows, steering)
+        elif returnItem["type"] == "technique":
+            add_technique(dc, wvf, target, radar, returnItem, amp_volt, rows, steering)
+        elif returnItem["type"] == "clutter":
+            add_clutter(dc, wvf, radar, returnItem, rows)
         else:
             print(f"{returnItem['type']=} not known, no return added.")
-
-
-def range_and_rangerate(plat_pos: list, plat_vel: list, tgt_pos: list, tgt_vel: list):
-    """Calculate the range vector, range, and range-rate of a target relative to a platform"""
-
-    R_vec = np.array([tgt_pos[0] - plat_pos[0], tgt_pos[1] - plat_pos[1], tgt_pos[2] - plat_pos[2]])
-
-    R_unit_vec = R_vec / norm(R_vec)
-
-    R_mag = np.sqrt(R_vec[0] ** 2 + R_vec[1] ** 2 + R_vec[2] ** 2)
-
-    R_dot = np.dot(tgt_vel, R_unit_vec) - np.dot(plat_vel, R_unit_vec)
-
-    return R_vec, R_mag, R_dot
@@ -0,0 +1,250 @@
+import os
+import json
+import numpy as np
+from scipy import ndimage
+from . import constants as c
+from .scene import Scene
+from .rdm_helpers import snr_onepulse
+from .trajectory import initial_target
+from .technique import technique_tables
+from .pulse_doppler_radar import range_unambiguous
+from .detection import ca_cfar
+from .datacube_io import metadata_to_json, metadata_from_json
+from .specs import prepare
+
+try:  # optional Arrow and Parquet output
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# Columnar per-CPI target and detection reports ############################################
+# - truth reports: one record per return of each target (and per false target of a technique
+#   program) with its true and apparent (range and Doppler folded) position in the CPI
+# - detection reports: one record per CA-CFAR detection peak of an RDM
+# - reports are NumPy structured arrays with fixed width fields, batches of CPIs are appended
+#   to a ReportFile and read back memory mapped, so scans never load RDMs or parse rows
+# - file layout: MAGIC, header length (uint64), JSON header (dtype and metadata) padded to
+#   HEADER_ALIGN bytes, then the records back to back, a partially written last record (an
+#   interrupted append) is ignored by readers
+# - to_arrow and write_parquet convert reports to Arrow record batches and Parquet files when
+#   pyarrow is installed
+
+MAGIC = b"RSPRPRT1"
+HEADER_ALIGN = 64
+
+TRUTH_DTYPE = np.dtype(
+    [
+        ("cpi", np.int64),
+        ("target", np.int32),  # index in the Scene's targets, 0 for a single target
+        ("type", "S16"),  # return type
+        ("index", np.int32),  # false target index of a technique program, else 0
+        ("range", np.float64),  # at the first pulse [m]
+        ("rangeRate", np.float64),  # [m/s]
+        ("apparent_range", np.float64),  # folded into the unambiguous range [m]
+        ("apparent_rangeRate", np.float64),  # folded into the unambiguous range rate [m/s]
+        ("rcs", np.float64),
+        ("snr_db", np.float64),  # coherently integrated skin SNR of the target [dB]
+    ]
+)
+
+DETECTION_DTYPE = np.dtype(
+    [
+        ("cpi", np.int64),
+        ("range_bin", np.int32),
+        ("doppler_bin", np.int32),
+        ("range", np.float64),  # [m]
+        ("rangeRate", np.float64),  # [m/s]
+        ("power_db", np.float32),  # RDM cell power [dB]
+        ("snr_db", np.float32),  # power over the CFAR noise estimate [dB]
+    ]
+)
+
+
+def _fold(x, period):
+    """Fold x into [-period/2, period/2)"""
+    return (x + period / 2) % period - period / 2
+
+
+def _return_positions(target: dict, returnItem: dict, radar: dict):
+    """Range [m] and range rate [m/s] of each return of a target at the first pulse"""
+    if returnItem["type"] == "memory":
+        offset = returnItem.get("range_offset", 0) + returnItem.get("delay", 0) * c.C / 2
+        rdot = target["rangeRate"] + returnItem.get("rdot_offset", 0)
+        return np.array([target["range"] + offset]), np.array([rdot])
+    if returnItem["type"] == "technique":
+        return_time, phase, _ = technique_tables(returnItem, target, radar)
+        T = (radar["Npulses"] - 1) / radar["PRF"]
+        rdot = -(phase[:, -1] - phase[:, 0]) / T * c.C / (4 * c.PI * radar["fcar"])
+        return return_time[:, 0] * c.C / 2, rdot
+    return np.array([target["range"]]), np.array([target["rangeRate"]])
+
+
+def truth_report(
+    cpi: int, target, radar: dict, waveform: dict, return_list: list, range_interval=None
+):
+    """Truth records of the returns in a CPI of rdm.gen
+    target: target dict or Scene, only the Scene's visible targets are reported"""
+    radar, waveform = prepare(radar, waveform)
+    if isinstance(target, Scene):
+        indices = target.visible(radar, range_interval)
+        targets = [target.targets[i] for i in indices]
+    else:
+        indices, targets = [0], [target]
+
+    Ru = range_unambiguous(radar["PRF"])
+    rdot_u = radar["PRF"] * c.C / (2 * radar["fcar"])  # f = -2* fc/c Rdot
+    rows = []
+    for index, tgt in zip(indices, targets):
+        tgt = initial_target(tgt)
+        snr_db = 10 * np.log10(snr_onepulse(tgt, radar, waveform) * radar["Npulses"])
+        for returnItem in tgt.get("return_list", return_list):
+            if returnItem["type"] == "clutter":
+                continue
+            ranges, rdots = _return_positions(tgt, returnItem, radar)
+            for i, (R, rdot) in enumerate(zip(ranges, rdots)):
+                rows.append(
+                    (
+                        cpi,
+                        index,
+                        returnItem["type"],
+                        i,
+                        R,
+                        rdot,
+                        R % Ru,
+                        _fold(rdot, rdot_u),
+                        tgt["rcs"],
+                        snr_db,
+                    )
+                )
+    return np.array(rows, dtype=TRUTH_DTYPE)
+
+
+def detection_report(cpi: int, rdot_axis, r_axis, rdm, cfar=None, max_detections: int = None):
+    """Detection records of the local power peaks of an RDM above its CA-CFAR threshold
+    (see detection.ca_cfar), strongest first"""
+    power = abs(np.asarray(rdm)) ** 2
+    detected, noise = ca_cfar(power, cfar)
+    peaks = detected & (power == ndimage.maximum_filter(power, size=3, mode="wrap"))
+
+    i, j = np.nonzero(peaks)
+    order = np.argsort(power[i, j])[::-1][:max_detections]
+    i, j = i[order], j[order]
+
+    report = np.zeros(i.size, dtype=DETECTION_DTYPE)
+    report["cpi"] = cpi
+    report["range_bin"], report["doppler_bin"] = i, j
+    report["range"], report["rangeRate"] = np.asarray(r_axis)[i], np.asarray(rdot_axis)[j]
+    report["power_db"] = 10 * np.log10(power[i, j])
+    report["snr_db"] = 10 * np.log10(power[i, j] / noise[i, j])
+    return report
+
+
+def cpi_reports(
+    cpi: int,
+    target,
+    radar: dict,
+    waveform: dict,
+    return_list: list,
+    rdot_axis,
+    r_axis,
+    rdm,
+    cfar=None,
+    range_interval=None,
+):
+    """Truth and detection reports of one rdm.gen CPI"""
+    truth = truth_report(cpi, target, radar, waveform, return_list, range_interval)
+    return truth, detection_report(cpi, rdot_axis, r_axis, rdm, cfar)
+
+
+class ReportFile:
+    """Append-only file of report records
+    - ReportFile(path, dtype) creates the file (or opens it, checking the dtype)
+    - append(records) adds a batch, read() memory maps every record, batches(n) scans them
+    """
+
+    def __init__(self, path, dtype=None, metadata: dict = None):
+        self.path = path
+        if not os.path.exists(path):
+            assert dtype is not None, "Error: a new report file needs a dtype"
+            self._create(np.dtype(dtype), metadata or {})
+
+        with open(path, "rb") as f:
+            assert f.read(len(MAGIC)) == MAGIC, f"Error: {path} is not a report file"
+            header_size = int(np.frombuffer(f.read(8), dtype=np.uint64)[0])
+            header = json.loads(f.read(header_size))
+
+        self.dtype = np.dtype([tuple(field) for field in header["dtype"]])
+        self.metadata = metadata_from_json(header["metadata"])
+        self.offset = len(MAGIC) + 8 + header_size
+        if dtype is not None:
+            assert self.dtype == np.dtype(dtype), f"Error: {path} holds {self.dtype} records"
+
+    def _create(self, dtype, metadata: dict):
+        """Write the header of a new file"""
+        text = json.dumps({"dtype": dtype.descr, "metadata": metadata_to_json(metadata)}).encode()
+        text += b" " * (-(len(MAGIC) + 8 + len(text)) % HEADER_ALIGN)
+        with open(self.path, "wb") as f:
+            f.write(MAGIC)
+            f.write(np.uint64(len(text)).tobytes())
+            f.write(text)
+
+    def __len__(self):
+        return (os.path.getsize(self.path) - self.offset) // self.dtype.itemsize
+
+    def append(self, records):
+        """Append a batch of records, returns the number of records in the file"""
+        records = np.asarray(records)
+        assert records.dtype == self.dtype, f"Error: records are not {self.dtype}"
+        with open(self.path, "r+b") as f:
+            # drop a partial record left by an interrupted append
+            f.truncate(self.offset + len(self) * self.dtype.itemsize)
+            f.seek(0, 2)
+            f.write(np.ascontiguousarray(records).tobytes())
+        return len(self)
+
+    def truncate(self, count: int):
+        """Keep only the first count records"""
+        with open(self.path, "r+b") as f:
+            f.truncate(self.offset + min(count, len(self)) * self.dtype.itemsize)
+
+    def read(self, start: int = 0, stop: int = None):
+        """Read only memory mapped records [start, stop)"""
+        start, stop, _ = slice(start, stop).indices(len(self))
+        if stop <= start:
+            return np.zeros(0, dtype=self.dtype)
+        offset = self.offset + start * self.dtype.itemsize
+        return np.memmap(self.path, self.dtype, "r", offset, (stop - start,))
+
+    def batches(self, size: int = 2**16):
+        """Iterate over the records in memory mapped batches"""
+        for start in range(0, len(self), size):
+            yield self.read(start, start + size)
+
+
+def to_arrow(records):
+    """Arrow record batch of report records, byte string fields become strings"""
+    assert pa is not None, "Error: Arrow output needs pyarrow"
+    records = np.asarray(records)
+    columns = [
+        np.char.decode(records[name]) if records.dtype[name].kind == "S" else records[name]
+        for name in records.dtype.names
+    ]
+    return pa.RecordBatch.from_arrays([pa.array(x) for x in columns], records.dtype.names)
+
+
+def write_parquet(path, reports, batch_size: int = 2**16):
+    """Write report records (an array or a ReportFile) to a Parquet file, one row group per
+    batch so ReportFiles larger than memory can be converted"""
+    assert pa is not None, "Error: Parquet output needs pyarrow"
+    batches = [reports]
+    if isinstance(reports, ReportFile):
+        batches = reports.batches(batch_size) if len(reports) else [reports.read()]
+    writer = None
+    for batch in batches:
+        batch = to_arrow(batch)
+        if writer is None:
+            writer = pq.ParquetWriter(path, batch.schema)
+        writer.write_batch(batch)
+    if writer is not None:
+        writer.close()
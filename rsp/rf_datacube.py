@@ -1,8 +1,9 @@
 import numpy as np
-from scipy import fft
+from scipy import signal
+from . import fft_backend as fft
 from . import constants as c
 from .waveform_helpers import matchfilter_with_waveform
-from .noise import unity_var_complex_noise
+from .noise import unity_var_complex_noise, fill_complex_noise
 
 
 def range_axis(fs: float, Nr: int):
@@ -18,22 +19,51 @@ def number_range_bins(fs: float, prf: float):
     return int(fs / prf)
 
 
-def dataCube(fs: float, prf: float, Np: int, noise: bool = False):
+# memory layouts of the (Nr, Np) datacube, the numpy order they are stored in
+# - "range": C order, each range bin's slow-time samples are contiguous
+# - "pulse": Fortran order (pulse-major), each pulse's fast-time samples are contiguous so
+#   pulses are injected and match filtered along contiguous memory
+# the axes are the same for both, only the strides differ
+LAYOUTS = {"range": "C", "pulse": "F"}
+
+
+def dataCube(
+    fs: float,
+    prf: float,
+    Np: int,
+    noise: bool = False,
+    Nr: int = None,
+    channels: int = None,
+    row_blocks: int = None,
+    layout: str = "range",
+):
     """Create an empty or noise datacube
     Outputs unprocessed datacube, both in fast and slow time
     inputs:
       fs = sampling frequency
       prf= pulse repitition frequncy of the radar
       Np = number of pulses in a CPI
+      Nr = number of range bins kept, e.g. for range gates (default all range bins)
+      channels = number of array channels (default None, single channel)
+      row_blocks = draw the noise in place into a complex64 datacube, this many blocks of range
+                   bins at a time (same draws, see noise.fill_complex_noise)
+      layout = memory layout in LAYOUTS, "range" (default) or "pulse"
     outputs:
-      datacube of size (Nrange_bins, Np)
+      datacube of size (Nrange_bins, Np) or (Nrange_bins, Np, channels)
     """
-    Nr = number_range_bins(fs, prf)
-    if noise:
+    if Nr is None:
+        Nr = number_range_bins(fs, prf)
+    shape = (Nr, Np) if channels is None else (Nr, Np, channels)
+    assert layout in LAYOUTS, f"Error: datacube layout {layout} not in {list(LAYOUTS)}"
+    order = LAYOUTS[layout]
+    if noise and row_blocks is not None:
+        dc = np.empty(shape, dtype=np.complex64, order=order)
+        fill_complex_noise(dc, 1 / np.sqrt(Np), row_blocks)
+    elif noise:
         # divide sqrt(Np) because upcomming DFT?
-        dc = unity_var_complex_noise((Nr, Np)) / np.sqrt(Np)
+        dc = np.asarray(unity_var_complex_noise(shape) / np.sqrt(Np), order=order)
     else:
-        dc = np.zeros((Nr, Np), dtype=np.complex64)
+        dc = np.zeros(shape, dtype=np.complex64, order=order)
 
     return dc
 
@@ -44,8 +74,9 @@ def doppler_process(dc, fs):
     dataCube : \n
     f_axis : [-fs/2, fs/2)\n
     r_axis : [delta_r, R_ambigious]\n
+    array datacubes (Nr, Np, channels) are processed for all channels at once
     """
-    Nr, Np = dc.shape
+    Nr, Np = dc.shape[:2]
 
     dR_grid = c.C / (2 * fs)
 
@@ -57,26 +88,117 @@ def doppler_process(dc, fs):
     return f_axis, R_axis
 
 
+def doppler_process_zoom(dc, fs, PRF, fcar, rdot_min, rdot_max, Nbins):
+    """Doppler process only a range-rate interval with a zoom FFT (chirp-z transform)
+    - evaluates the same DFT as doppler_process at Nbins points over the interval, giving
+      fine Doppler resolution in the band of interest without zero padding slow time
+    ouputs:\n
+    dataCube : (Nr, Nbins) processed datacube, not in place\n
+    rdot_axis : range rate of each Doppler bin, ordered by ascending frequency as in rdm.gen\n
+    r_axis : [delta_r, R_ambigious]\n
+    """
+    Nr, Np = dc.shape[:2]
+
+    # f = -2* fc/c Rdot, the interval must be unambiguous
+    f_lo, f_hi = sorted([-2 * fcar / c.C * rdot_max, -2 * fcar / c.C * rdot_min])
+    assert f_hi - f_lo <= PRF, "Error: range-rate interval is wider than the unambiguous band"
+
+    f_axis = np.linspace(f_lo, f_hi, Nbins)
+    rdot_axis = -c.C * f_axis / (2 * fcar)
+    R_axis = range_axis(fs, Nr)
+
+    zoomed = signal.zoom_fft(dc, [f_lo, f_hi], m=Nbins, fs=PRF, endpoint=True, axis=1)
+
+    return zoomed, rdot_axis, R_axis
+
+
 def matchfilter(dataCube, pulse_wvf, pedantic=True):
-    """Inplace match filter on data cube"""
+    """Inplace match filter on data cube
+    array datacubes (Nr, Np, channels) are filtered as one batch of Np * channels columns"""
+    if dataCube.ndim > 2:
+        # fast time stays axis 0, the columns are a view of "range" and "pulse" datacubes
+        columns = dataCube.reshape((dataCube.shape[0], -1), order="A")
+        matchfilter(columns, pulse_wvf, pedantic)
+        if not np.shares_memory(columns, dataCube):
+            dataCube[:] = columns.reshape(dataCube.shape, order="A")
+        return
     if pedantic:
         for j in range(dataCube.shape[1]):
             mf, _ = matchfilter_with_waveform(dataCube[:, j], pulse_wvf)
             dataCube[:, j] = mf
     else:
-        # Take FFT convolution directly
+        # Take FFT correlation directly
+        # - zero pad to a linear correlation and keep the "same" mode samples, so the output
+        #   matches the pedantic convolution without wrapping around the range edges
+        Nr = dataCube.shape[0]
+        Nfft = fft.next_fast_len(Nr + pulse_wvf.size - 1)
         kernel = np.conj(pulse_wvf)[::-1]
-
-        # Pad and "center" pulse relative to 0 index so output is centered (dataCube is centered)
-        # Method was tested but should be tested further
-        # ref:  https://stackoverflow.com/questions/29746894/why-is-my-convolution-result-shifted-when-using-fft
-        kernel = np.pad(kernel, pad_width=(0, dataCube.shape[0] - pulse_wvf.size))
-        offset = -int(pulse_wvf.size / 2)
-        if offset % 2:
-            offset += 1
-        kernel = np.roll(kernel, offset)
-
-        Kernel = fft.fft(kernel).reshape(dataCube.shape[0], 1)
-        PulseM = Kernel @ np.ones((1, dataCube.shape[1]))
-        DataCube = fft.fft(dataCube, axis=0)
-        dataCube[:] = fft.ifft(PulseM * DataCube, axis=0, overwrite_x=True, workers=2)
+        Kernel = fft.fft(kernel, Nfft).reshape(Nfft, 1)  # broadcasts over pulses
+        DataCube = fft.fft(dataCube, Nfft, axis=0)
+        DataCube *= Kernel
+        offset = (pulse_wvf.size - 1) // 2
+        dataCube[:] = fft.ifft(DataCube, axis=0, overwrite_x=True)[offset : offset + Nr]
+
+
+def decimation_factor(fs: float, range_bin_spacing: float):
+    """Integer decimation of the fast-time samples closest to the range bin spacing [m]"""
+    return max(1, int(round(range_bin_spacing / (c.C / (2 * fs)))))
+
+
+def matchfilter_decimated(dataCube, pulse_wvf, D: int):
+    """Match filter fused with decimation by D
+    - only every D-th match filter output is computed, they equal matchfilter outputs [::D]
+      so the range axis is range_axis(fs, Nr)[::D]
+    - decimation in time is a fold (sum of the D polyphase bands) of the correlation spectrum,
+      so the inverse FFT is D times shorter
+    - not in place, returns the (ceil(Nr/D), Np) match filtered datacube
+      (ceil(Nr/D), Np, channels) for array datacubes"""
+    Nr = dataCube.shape[0]
+    M = pulse_wvf.size
+    offset = (M - 1) // 2
+    L = fft.next_fast_len(-(-(Nr + M - 1) // D))  # linear correlation length over D
+    Nfft = D * L
+
+    # kernel circularly shifted by the "same" offset, output sample n is "same" output n
+    kernel = np.zeros(Nfft, dtype=np.result_type(pulse_wvf, np.complex64))
+    kernel[(np.arange(M) - offset) % Nfft] = np.conj(pulse_wvf)[::-1]
+    Kernel = fft.fft(kernel).reshape((Nfft,) + (1,) * (dataCube.ndim - 1))  # broadcasts
+
+    DataCube = fft.fft(dataCube, Nfft, axis=0)
+    DataCube *= Kernel
+    folded = DataCube.reshape((D, L) + dataCube.shape[1:]).sum(axis=0) / D
+
+    return fft.ifft(folded, axis=0, overwrite_x=True)[: len(range(0, Nr, D))]
+
+
+def range_gate_rows(r_axis, range_gates: list, pulse_size: int):
+    """Range bins needed to process only the range gates
+    range_gates: list of (min, max) range intervals [m]
+    outputs:\n
+    rows : sorted range bins of the gates plus the match filter margins on each side\n
+    in_gate : mask of the rows that are in a gate\n
+    """
+    Nr = r_axis.size
+    in_gate = np.zeros(Nr, dtype=bool)
+    for r_min, r_max in range_gates:
+        in_gate |= (r_axis >= r_min) & (r_axis <= r_max)
+    assert in_gate.any(), "Error: range gates do not contain any range bins"
+
+    # the "same" match filter output at bin n uses input bins [n - (M-1-offset), n + offset]
+    offset = (pulse_size - 1) // 2
+    n = np.arange(Nr)
+    lo = np.clip(n - offset, 0, Nr)
+    hi = np.clip(n + pulse_size - offset, 0, Nr)
+    gate_count = np.concatenate([[0], np.cumsum(in_gate)])
+    rows = np.flatnonzero(gate_count[hi] > gate_count[lo])
+
+    return rows, in_gate[rows]
+
+
+def matchfilter_gated(dataCube, pulse_wvf, rows, pedantic=True):
+    """Inplace match filter of a range gated datacube holding the range bins rows
+    - each run of contiguous range bins is filtered on its own, overlap-save style: the margins
+      from range_gate_rows give the gate outputs exactly, the margin outputs are not valid"""
+    runs = np.split(np.arange(len(rows)), np.flatnonzero(np.diff(rows) > 1) + 1)
+    for run in runs:
+        matchfilter(dataCube[run[0] : run[-1] + 1], pulse_wvf, pedantic)
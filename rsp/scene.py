@@ -0,0 +1,121 @@
+import numpy as np
+from .pulse_doppler_radar import range_unambiguous, number_pulses
+from .rdm_helpers import add_returns, snr_onepulse
+from .trajectory import initial_target, target_range_and_rangerate
+
+
+class Scene:
+    """Catalog of targets indexed by initial range so only targets visible in a CPI are injected
+
+    Each target is a target dict as used by rdm.gen, optionally with its own "return_list"
+    which overrides the return_list passed when adding returns.
+    """
+
+    def __init__(self, targets: list):
+        self.targets = list(targets)
+
+        # constant rangeRate targets are sorted by initial range
+        # trajectory targets can maneuver so they are checked exactly for every CPI
+        const = [i for i, t in enumerate(self.targets) if "trajectory" not in t]
+        self._trajectory_indices = np.array(
+            [i for i, t in enumerate(self.targets) if "trajectory" in t], dtype=int
+        )
+
+        ranges = np.array([self.targets[i]["range"] for i in const], dtype=float)
+        order = np.argsort(ranges, kind="stable")
+        self._indices = np.array(const, dtype=int)[order]
+        self._range = ranges[order]
+        self._rangeRate = np.array(
+            [self.targets[i]["rangeRate"] for i in self._indices], dtype=float
+        )
+        self._max_abs_rangeRate = abs(self._rangeRate).max() if self._rangeRate.size else 0.0
+
+    def __len__(self):
+        return len(self.targets)
+
+    def _candidates(self, Ru, Npulses, T, range_interval):
+        """Positions in the sorted index that may be visible, found with searchsorted"""
+        drift = self._max_abs_rangeRate * T
+        last = np.searchsorted(self._range, Npulses * Ru + drift, side="right")
+
+        if range_interval is None:
+            return np.arange(last)
+
+        # union of the interval in each ambiguous range window (multiple-time-around echoes)
+        k = np.arange(int((self._range[last - 1] + drift) // Ru) + 1 if last else 0)
+        start = np.searchsorted(self._range[:last], k * Ru + range_interval[0] - drift)
+        stop = np.searchsorted(self._range[:last], k * Ru + range_interval[1] + drift, "right")
+        keep = stop > start
+        if not keep.any():
+            return np.arange(0)
+        return np.unique(np.concatenate([np.arange(a, b) for a, b in zip(start[keep], stop[keep])]))
+
+    @staticmethod
+    def _visible(R_min, R_max, Ru, Npulses, range_interval):
+        """Exact check on the range span of each target over the CPI"""
+        # first echo must arrive before the CPI ends, see rdm_helpers.first_echo_pulse_bin
+        visible = (R_max > 0) & (np.floor(np.maximum(R_min, 0) / Ru) < Npulses)
+
+        if range_interval is not None:
+            # some ambiguous window k in [0, Npulses) must overlap the target range span
+            k_lo = np.maximum(np.ceil((R_min - range_interval[1]) / Ru), 0)
+            k_hi = np.minimum(np.floor((R_max - range_interval[0]) / Ru), Npulses - 1)
+            visible &= k_lo <= k_hi
+
+        return visible
+
+    def visible(self, radar: dict, range_interval: tuple = None):
+        """Indices of targets with returns landing in the CPI, sorted by initial range
+        range_interval: optional (min, max) apparent range [m] within the receive window"""
+        Ru = range_unambiguous(radar["PRF"])
+        Npulses = number_pulses(radar)
+        T = Npulses / radar["PRF"]
+
+        pos = self._candidates(Ru, Npulses, T, range_interval)
+        R_end = self._range[pos] + self._rangeRate[pos] * T
+        R_min = np.minimum(self._range[pos], R_end)
+        R_max = np.maximum(self._range[pos], R_end)
+        indices = self._indices[pos[self._visible(R_min, R_max, Ru, Npulses, range_interval)]]
+
+        if self._trajectory_indices.size:
+            t_slow_axis = np.arange(Npulses) / radar["PRF"]
+            spans = np.array(
+                [
+                    [R.min(), R.max()]
+                    for R, _ in (
+                        target_range_and_rangerate(self.targets[i], t_slow_axis)
+                        for i in self._trajectory_indices
+                    )
+                ]
+            )
+            traj_visible = self._visible(spans[:, 0], spans[:, 1], Ru, Npulses, range_interval)
+            indices = np.concatenate([indices, self._trajectory_indices[traj_visible]])
+
+        return indices
+
+    def visible_targets(self, radar: dict, range_interval: tuple = None):
+        """Target dicts with returns landing in the CPI"""
+        return [self.targets[i] for i in self.visible(radar, range_interval)]
+
+    def returns(self, wvf: dict, radar: dict, return_list: list, range_interval=None):
+        """(target, returns, SNR_volt) of each clutter return and each visible target
+        Each target is scaled by its own single-pulse SNR from the range equation
+        Clutter returns are not from a target, their target and SNR_volt are None"""
+        groups = [(None, [r], None) for r in return_list if r["type"] == "clutter"]
+
+        for target in self.visible_targets(radar, range_interval):
+            target = initial_target(target)
+            SNR_volt = np.sqrt(snr_onepulse(target, radar, wvf) / radar["Npulses"])
+            target_returns = [
+                r for r in target.get("return_list", return_list) if r["type"] != "clutter"
+            ]
+            groups.append((target, target_returns, SNR_volt))
+        return groups
+
+    def add_returns(
+        self, dc, wvf: dict, radar: dict, return_list: list, range_interval=None, rows=None
+    ):
+        """Add the returns of the visible targets to the datacube
+        rows: range bin of each datacube row for range gated datacubes"""
+        for target, returns, SNR_volt in self.returns(wvf, radar, return_list, range_interval):
+            add_returns(dc, wvf, target, returns, radar, SNR_volt, rows)
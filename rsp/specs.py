@@ -0,0 +1,246 @@
+import operator
+import numpy as np
+from dataclasses import dataclass, field, fields
+from .cache import hash_inputs, callable_key, UncacheableInput, DERIVED_KEYS
+from .waveform import waveform_fields, BARKER_DICT
+
+# Immutable configuration specs ############################################################
+# - Radar, Waveform, Target and Return are frozen, slotted forms of the radar, waveform,
+#   target and return dicts, validated once when built, e.g. Radar(fcar=10e9, ...) or
+#   Radar.from_dict(radar)
+# - keys without a field (radar "array", target "trajectory" or "azimuth", the parameters of
+#   each return type) are kept in extra, a tuple of (key, value) items
+# - specs are read-only mappings, so the code reading dicts reads them too, and they hash and
+#   compare by value with a key computed once, equal specs and dicts give the same cache keys
+#   (see cache.normalize). Callables without a stable key (e.g. closure trajectories) compare
+#   by identity and the specs holding them have no cache key
+# - derived values are computed when first used and kept: Radar.Npulses and
+#   Waveform.derived(sampRate), the derived pulse is read-only. Random coded pulses are drawn
+#   on every call (from noise.random_state()) as for waveform dicts
+# - rdm.gen takes specs or dicts and works on dict copies (see gen_inputs), so it never
+#   changes its inputs
+
+WAVEFORM_TYPES = ["uncoded", "barker", "random", "lfm"]
+RETURN_TYPES = ["skin", "memory", "technique", "clutter"]
+
+
+class Spec:
+    """Base of the specs: dict conversion, read-only mapping access, hashing and equality"""
+
+    __slots__ = ("_cache",)
+
+    def __post_init__(self):
+        extra = self.extra.items() if isinstance(self.extra, dict) else self.extra
+        object.__setattr__(self, "extra", tuple(extra))
+        self.validate()
+
+    def validate(self):
+        """Check the values, raise on bad specs"""
+
+    @classmethod
+    def from_dict(cls, d: dict):
+        """Spec of a dict, derived keys (e.g. "pulse", "Npulses") are dropped"""
+        names = {f.name for f in fields(cls)} - {"extra"}
+        kwargs = {k: v for k, v in d.items() if k in names}
+        extra = [(k, v) for k, v in d.items() if k not in names and k not in DERIVED_KEYS]
+        return cls(**kwargs, extra=extra)
+
+    def _cached(self, name, compute):
+        """Value computed once per spec, specs are immutable so it never goes stale"""
+        try:
+            cache = self._cache
+        except AttributeError:  # new or unpickled spec
+            cache = {}
+            object.__setattr__(self, "_cache", cache)
+        if name not in cache:
+            cache[name] = compute()
+        return cache[name]
+
+    def _dict(self):
+        d = {f.name: getattr(self, f.name) for f in fields(self) if f.name != "extra"}
+        d = {k: v for k, v in d.items() if v is not None}
+        d.update(self.extra)
+        return d
+
+    def as_dict(self):
+        """New dict of the spec, as rdm.gen takes"""
+        return dict(self._cached("dict", self._dict))
+
+    def __getitem__(self, key):
+        return self._cached("dict", self._dict)[key]
+
+    def get(self, key, default=None):
+        return self._cached("dict", self._dict).get(key, default)
+
+    def __contains__(self, key):
+        return key in self._cached("dict", self._dict)
+
+    def keys(self):
+        return self._cached("dict", self._dict).keys()
+
+    def __iter__(self):
+        return iter(self._cached("dict", self._dict))
+
+    def __len__(self):
+        return len(self._cached("dict", self._dict))
+
+    @property
+    def key(self):
+        """Stable hash of the spec, the same as for its dict, raises cache.UncacheableInput for
+        specs holding callables without a stable key (see cache.callable_key)"""
+        return self._cached("key", lambda: hash_inputs(self.as_dict()))
+
+    def _identity(self):
+        """Hash of the spec with its unkeyed callables replaced by placeholders, and those
+        callables, which compare by identity"""
+
+        def compute():
+            callables = []
+            digest = hash_inputs(_unkeyed_callables(self.as_dict(), callables))
+            return digest, tuple(callables)
+
+        return self._cached("identity", compute)
+
+    def __hash__(self):
+        digest, callables = self._identity()
+        return hash((digest, tuple(id(f) for f in callables)))
+
+    def __eq__(self, other):
+        if type(self) is not type(other):
+            return False
+        (digest, callables), (other_digest, other_callables) = self._identity(), other._identity()
+        same = len(callables) == len(other_callables)
+        return (
+            digest == other_digest and same and all(map(operator.is_, callables, other_callables))
+        )
+
+
+def _unkeyed_callables(obj, callables: list):
+    """obj with the callables without a stable cache key replaced by placeholders, the callables
+    are appended to callables"""
+    if isinstance(obj, dict):
+        return {k: _unkeyed_callables(v, callables) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_unkeyed_callables(v, callables) for v in obj]
+    if callable(obj):
+        try:
+            callable_key(obj)
+        except UncacheableInput:
+            callables.append(obj)
+            return {"unkeyed callable": len(callables) - 1}
+    return obj
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class Radar(Spec):
+    """Radar dict keys, extra holds the optional "array" (see beamforming.py)"""
+
+    fcar: float
+    txPower: float
+    txGain: float
+    rxGain: float
+    opTemp: float
+    sampRate: float
+    noiseFig: float
+    totalLosses: float
+    PRF: float
+    dwell_time: float
+    extra: tuple = field(default=())
+
+    def validate(self):
+        for f in fields(self):
+            if f.name != "extra":
+                assert getattr(self, f.name) > 0, f"Error: radar {f.name} must be positive"
+
+    @property
+    def Npulses(self):
+        """Number of pulses in the CPI"""
+        return self._cached("Npulses", lambda: int(np.ceil(self.dwell_time * self.PRF)))
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class Waveform(Spec):
+    """Waveform dict keys, the fields used depend on the type"""
+
+    type: str
+    bw: float
+    T: float = None
+    chirpUpDown: int = None
+    nchips: int = None
+    extra: tuple = field(default=())
+
+    def validate(self):
+        assert self.type in WAVEFORM_TYPES, f"Error: waveform type {self.type} not found"
+        assert self.bw > 0, "Error: waveform bw must be positive"
+        if self.type == "lfm":
+            assert self.T is not None and self.T > 0, "Error: lfm waveforms need a positive T"
+            assert self.chirpUpDown in (1, -1), "Error: lfm chirpUpDown must be 1 or -1"
+        if self.type == "barker":
+            assert self.nchips in BARKER_DICT, f"Error: barker nchips not in {list(BARKER_DICT)}"
+        if self.type == "random":
+            assert (self.nchips or 0) > 0, "Error: random waveforms need nchips"
+
+    def derived(self, sampRate: float):
+        """Derived "pulse", "time_BW_product", "pulse_width" at the sample rate"""
+        if self.type == "random":
+            return waveform_fields(self, sampRate)
+
+        def compute():
+            derived = waveform_fields(self, sampRate)
+            derived["pulse"].flags.writeable = False
+            return derived
+
+        return dict(self._cached(("derived", sampRate), compute))
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class Target(Spec):
+    """Target dict keys, extra holds "trajectory" (instead of range and rangeRate), "azimuth",
+    "elevation" and a target's own "return_list" """
+
+    range: float = None
+    rangeRate: float = None
+    rcs: float = None
+    extra: tuple = field(default=())
+
+    def validate(self):
+        assert self.rcs is not None, "Error: targets need an rcs"
+        moving = self.range is not None and self.rangeRate is not None
+        assert moving or "trajectory" in self, "Error: targets need a trajectory or a range"
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class Return(Spec):
+    """Return dict, extra holds the parameters of the return type (see rdm_helpers.py,
+    clutter.py and technique.py)"""
+
+    type: str
+    extra: tuple = field(default=())
+
+    def validate(self):
+        assert self.type in RETURN_TYPES, f"Error: return type {self.type} not in {RETURN_TYPES}"
+
+
+def as_dict(spec):
+    """New dict of a spec or dict"""
+    return spec.as_dict() if isinstance(spec, Spec) else dict(spec)
+
+
+def prepare(radar, waveform):
+    """Radar and waveform dict copies of specs or dicts with the derived values filled in"""
+    radar_dict = as_dict(radar)
+    radar_dict["Npulses"] = int(np.ceil(radar_dict["dwell_time"] * radar_dict["PRF"]))
+    waveform_dict = as_dict(waveform)
+    if isinstance(waveform, Waveform):
+        waveform_dict.update(waveform.derived(radar_dict["sampRate"]))
+    else:
+        waveform_dict.update(waveform_fields(waveform_dict, radar_dict["sampRate"]))
+    return radar_dict, waveform_dict
+
+
+def gen_inputs(target, radar, waveform, return_list: list):
+    """Copies of rdm.gen's inputs (specs or dicts) to work on, Scenes are passed through"""
+    radar, waveform = prepare(radar, waveform)
+    if isinstance(target, (Spec, dict)):
+        target = as_dict(target)
+    return target, radar, waveform, [as_dict(r) for r in return_list]
@@ -0,0 +1,150 @@
+import numpy as np
+from scipy import linalg
+from . import fft_backend as fft
+from . import constants as c
+from .beamforming import steering_vectors
+from .windows import get_window
+
+# Space-time adaptive processing (STAP) ####################################################
+# - input is a match filtered array datacube (Nr, Np, channels), not Doppler processed
+# - described by dicts like the waveform dicts (defaults in DEFAULT_STAP):
+# type: "full" adapts all Np * channels space-time degrees of freedom (DOF)
+#           "post_doppler" Doppler processes each channel first and adapts the channels of
+#           `adjacent` Doppler bins (1 is factored, 3 is extended factored post-Doppler STAP),
+#           a reduced-dimension STAP needing far fewer training range bins
+#     azimuth: look azimuth [rad]
+#     window: slow-time window type or dict (see windows.py)
+#     block: range bins sharing one covariance, guard: range bins skipped each side of a block
+#     training: training range bins per block, default 2 * DOF
+#     loading: diagonal loading added to the sample covariance, in units of the noise power
+# - each block's covariance is estimated from the nearest range bins outside the block and its
+#   guard bins with batched matrix products, then factored once (Cholesky) and the factor is
+#   reused for every range cell of the block, factorizations and solves are batched over blocks
+#   (and Doppler bins) and no inverse is formed
+# - outputs are adaptive matched filter outputs, w = R^-1 v / sqrt(v^H R^-1 v), so noise has
+#   unit power and the STAP RDM is in SNR units
+
+DEFAULT_STAP = {
+    "type": "post_doppler",
+    "azimuth": 0.0,
+    "adjacent": 3,
+    "window": "chebyshev",
+    "block": 32,
+    "guard": 2,
+    "training": None,
+    "loading": 1.0,
+}
+
+
+def stap_params(spec):
+    """STAP spec with the defaults filled in"""
+    if isinstance(spec, str):
+        spec = {"type": spec}
+    params = {**DEFAULT_STAP, **(spec or {})}
+    assert params["type"] in ["full", "post_doppler"], "Error: STAP type not found"
+    return params
+
+
+def doppler_axes(Np: int, PRF: float, fcar: float):
+    """Doppler frequency and range rate of each Doppler bin, ordered as in rdm.gen"""
+    f_axis = fft.fftshift(fft.fftfreq(Np, 1 / PRF))
+    return f_axis, -c.C * f_axis / (2 * fcar)  # f = -2* fc/c Rdot
+
+
+def training_cells(Nr: int, block: int, guard: int, Ntrain: int):
+    """Training range bins of each range block
+    outputs (B, Ntrain) nearest range bins outside each block and its guard bins"""
+    starts = np.arange(0, Nr, block)
+    stops = np.minimum(starts + block, Nr)
+    assert Ntrain <= Nr - block - 2 * guard, "Error: not enough range bins to train STAP"
+
+    r = np.arange(Nr)
+    excluded = (r >= (starts - guard)[:, np.newaxis]) & (r < (stops + guard)[:, np.newaxis])
+    distance = np.where(excluded, np.inf, abs(r - (starts + stops - 1)[:, np.newaxis] / 2))
+    train = np.argpartition(distance, Ntrain - 1, axis=1)[:, :Ntrain]
+    return np.sort(train, axis=1)
+
+
+def sample_covariance(snapshots, train, loading: float = 0.0):
+    """(B, P, DOF, DOF) sample covariance of each block from its training snapshots
+    snapshots: (Nr, P, DOF), P independent problems per range bin (e.g. Doppler bins)"""
+    Z = snapshots[train].transpose(0, 2, 1, 3)  # (B, P, Ntrain, DOF)
+    R = np.matmul(Z.swapaxes(-1, -2), Z.conj()) / train.shape[1]  # sum of z z^H
+    if loading:
+        R += loading * np.eye(R.shape[-1])
+    return R
+
+
+def stap_weights(snapshots, steering, train, loading: float = 0.0):
+    """(B, P, DOF, Nf) adaptive matched filter weights of each block
+    steering: (P, DOF, Nf) space-time steering vectors of each problem"""
+    R = sample_covariance(snapshots, train, loading)
+    L = np.linalg.cholesky(R)
+    v = np.broadcast_to(steering, R.shape[:-1] + steering.shape[-1:])
+    w = linalg.cho_solve((L, True), v)  # R^-1 v from the factor, no inverse
+    norm = np.sqrt(np.real(np.sum(np.conj(v) * w, axis=-2, keepdims=True)))
+    return w / norm
+
+
+def apply_weights(snapshots, weights, block: int):
+    """(Nr, P, Nf) STAP outputs w^H z of each range bin with its block's weights"""
+    Nr, P, DOF = snapshots.shape
+    B = weights.shape[0]
+    Z = np.zeros((B * block, P, DOF), dtype=complex)
+    Z[:Nr] = snapshots
+    Z = Z.reshape(B, block, P, DOF).transpose(0, 2, 3, 1)  # (B, P, DOF, block)
+    Y = np.matmul(weights.conj().swapaxes(-1, -2), Z)  # (B, P, Nf, block)
+    return Y.transpose(0, 3, 1, 2).reshape(B * block, P, -1)[:Nr]
+
+
+def space_time_snapshots(dc, radar: dict, params: dict):
+    """Snapshots (Nr, P, DOF) and steering vectors (P, DOF, Nf) of a STAP spec"""
+    Nr, Np, Nc = dc.shape
+    f_axis, _ = doppler_axes(Np, radar["PRF"], radar["fcar"])
+    a = steering_vectors(radar["array"], radar["fcar"], params["azimuth"])[:, 0]
+    w = get_window(params["window"], Np).weights
+    b = np.exp(2j * c.PI * np.outer(np.arange(Np), f_axis) / radar["PRF"])  # (Np, Nd)
+
+    if params["type"] == "full":
+        snapshots = dc.reshape(Nr, 1, Np * Nc)
+        steering = w[:, np.newaxis, np.newaxis] * b[:, np.newaxis, :] * a[:, np.newaxis]
+        return snapshots, steering.reshape(1, Np * Nc, Np)
+
+    # post-Doppler, each Doppler bin with its adjacent bins (circular in Doppler)
+    dc_doppler = fft.fftshift(fft.fft(dc * w[:, np.newaxis], axis=1), axes=1)
+    m = params["adjacent"]
+    bins = (np.arange(Np)[:, np.newaxis] + np.arange(m) - m // 2) % Np  # (Nd, m)
+    snapshots = dc_doppler[:, bins, :].reshape(Nr, Np, m * Nc)
+
+    # Doppler bin responses of a target at each bin's frequency
+    response = fft.fftshift(fft.fft(w[:, np.newaxis] * b, axis=0), axes=0)  # (bin, target)
+    temporal = np.take_along_axis(response.T, bins, axis=1)  # (Nd, m)
+    steering = temporal[:, :, np.newaxis] * a
+    return snapshots, steering.reshape(Np, m * Nc, 1)
+
+
+def stap_rdm(dc, radar: dict, spec=None, signal_dc=None, noise_power: float = 1.0):
+    """STAP range-Doppler map of a match filtered array datacube at the look azimuth
+    spec: STAP type string or dict, see the top of stap.py
+    signal_dc: optional datacube filtered with the weights trained on dc (e.g. noise free)
+    noise_power: noise power of each datacube sample, scales the diagonal loading
+    returns rdot_axis, STAP RDM of dc (Nr, Np), STAP RDM of signal_dc or None
+    """
+    params = stap_params(spec)
+    Nr = dc.shape[0]
+
+    snapshots, steering = space_time_snapshots(dc, radar, params)
+    Ntrain = params["training"] or 2 * snapshots.shape[-1]
+    train = training_cells(Nr, params["block"], params["guard"], Ntrain)
+    weights = stap_weights(snapshots, steering, train, params["loading"] * noise_power)
+
+    _, rdot_axis = doppler_axes(dc.shape[1], radar["PRF"], radar["fcar"])
+    squeeze = (lambda y: y[:, 0, :]) if params["type"] == "full" else (lambda y: y[..., 0])
+    rdm = squeeze(apply_weights(snapshots, weights, params["block"]))
+
+    signal_rdm = None
+    if signal_dc is not None:
+        signal_snapshots, _ = space_time_snapshots(signal_dc, radar, params)
+        signal_rdm = squeeze(apply_weights(signal_snapshots, weights, params["block"]))
+
+    return rdot_axis, rdm, signal_rdm
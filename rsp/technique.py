@@ -0,0 +1,101 @@
+import numpy as np
+from . import constants as c
+from .trajectory import target_range_and_rangerate
+from .pulse_doppler_radar import number_pulses
+
+# DRFM technique programs ##################################################################
+# - return dict {"type": "technique", "false_targets": [...]} with optional key
+#     start_time: program time [s] of the CPI's first pulse, advance it for later CPIs
+#                 (see program_cpi), pull-off profiles continue across CPIs
+# - each false target is a dict with optional keys (defaults in DEFAULT_FALSE_TARGET)
+#     range_offset: range [m] added to the target's range
+#     rdot_offset: range rate [m/s] added to the target's range rate, as a slow-time phase ramp
+#     delay: extra time delay [s]
+#     amplitude: voltage relative to the skin return (notional, like memory returns)
+#     coherent: the carrier phase follows the range offset, so the false target's Doppler is
+#               consistent with its range walk
+#     rgpo: range gate pull-off {"start": s, "velocity": m/s, "acceleration": m/s^2,
+#           "max": m}, range offset velocity * t + acceleration * t^2 / 2 after start
+#     vgpo: velocity gate pull-off {"start": s, "rate": m/s^2, "max": m/s},
+#           range rate offset rate * t after start
+#     offsets of a profile stop growing at +/- max
+# - the delay and phase of every (false target, pulse) are built as (F, Np) tables and every
+#   false target's pulses are injected into the datacube in one pass, no loop over them
+
+DEFAULT_FALSE_TARGET = {
+    "range_offset": 0.0,
+    "rdot_offset": 0.0,
+    "delay": 0.0,
+    "amplitude": 1.0,
+    "coherent": True,
+}
+DEFAULT_RGPO = {"start": 0.0, "velocity": 0.0, "acceleration": 0.0, "max": np.inf}
+DEFAULT_VGPO = {"start": 0.0, "rate": 0.0, "max": np.inf}
+
+
+def false_target_train(count: int, range_spacing: float, **false_target):
+    """count false targets spaced range_spacing [m] apart, starting at the range_offset
+    other keys (e.g. rgpo, rdot_offset) are shared by every false target"""
+    first = false_target.pop("range_offset", 0.0)
+    return [{**false_target, "range_offset": first + i * range_spacing} for i in range(count)]
+
+
+def program_cpi(technique: dict, cpi: int, radar: dict):
+    """Technique return dict for the CPI number cpi of back to back CPIs"""
+    cpi_time = number_pulses(radar) / radar["PRF"]
+    return {**technique, "start_time": technique.get("start_time", 0.0) + cpi * cpi_time}
+
+
+def _column(false_targets: list, key: str):
+    """(F, 1) column of a false target key"""
+    return np.array([ft[key] for ft in false_targets], dtype=float)[:, np.newaxis]
+
+
+def _profile_table(false_targets: list, key: str, defaults: dict):
+    """(F, 1) column of each profile parameter of the false targets"""
+    profiles = [{**defaults, **(ft.get(key) or {})} for ft in false_targets]
+    return {k: np.array([p[k] for p in profiles], dtype=float)[:, np.newaxis] for k in defaults}
+
+
+def rgpo_offset(t, rgpo: dict):
+    """Range gate pull-off range offset [m] at program times t"""
+    tau = np.maximum(t - rgpo["start"], 0)
+    offset = rgpo["velocity"] * tau + rgpo["acceleration"] * tau**2 / 2
+    return np.clip(offset, -rgpo["max"], rgpo["max"])
+
+
+def vgpo_offset(t, vgpo: dict):
+    """Velocity gate pull-off range rate offset [m/s] and its integral [m] at program times t"""
+    tau = np.maximum(t - vgpo["start"], 0)
+    rate, top = np.broadcast_arrays(vgpo["rate"], vgpo["max"])
+    # time the ramp reaches max, the integral is a parabola then a line
+    tau_max = np.divide(top, abs(rate), out=np.full(rate.shape, np.inf), where=rate != 0)
+    tau_ramp = np.minimum(tau, tau_max)
+    rdot = rate * tau_ramp
+    distance = rate * tau_ramp**2 / 2 + rdot * (tau - tau_ramp)
+    return rdot, distance
+
+
+def technique_tables(technique: dict, tgtInfo: dict, radar: dict):
+    """Delay and phase tables of a technique program
+    outputs pulse return times [s] (F, Np), phases [rad] (F, Np) and amplitudes (F,)"""
+    false_targets = [{**DEFAULT_FALSE_TARGET, **ft} for ft in technique["false_targets"]]
+
+    t_slow_axis = np.arange(number_pulses(radar)) / radar["PRF"]  # time when pulses sent
+    t_program = technique.get("start_time", 0.0) + t_slow_axis
+    tgt_range_ar, _ = target_range_and_rangerate(tgtInfo, t_slow_axis)
+
+    # range and range rate offsets of each false target at each pulse
+    range_offset = _column(false_targets, "range_offset") + rgpo_offset(
+        t_program, _profile_table(false_targets, "rgpo", DEFAULT_RGPO)
+    )
+    _, vgpo_distance = vgpo_offset(t_program, _profile_table(false_targets, "vgpo", DEFAULT_VGPO))
+    rdot_distance = _column(false_targets, "rdot_offset") * t_program + vgpo_distance
+
+    # delays follow the range offsets, phases follow the range rate offsets (and the range
+    # offsets of coherent false targets)
+    delay = 2 * (tgt_range_ar + range_offset) / c.C + _column(false_targets, "delay")
+    phase_range = tgt_range_ar + rdot_distance + _column(false_targets, "coherent") * range_offset
+    phase = -4 * c.PI * radar["fcar"] / c.C * phase_range
+
+    return t_slow_axis + delay, phase, _column(false_targets, "amplitude")[:, 0]
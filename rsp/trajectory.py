@@ -0,0 +1,93 @@
+import numpy as np
+from scipy.interpolate import CubicHermiteSpline, CubicSpline
+
+# Trajectory driven targets ###############################################################
+# - a trajectory is either a callable or a dict of sampled states
+#   - callable: trajectory(t) -> plat_pos, plat_vel, tgt_pos, tgt_vel, each of shape (t.size, 3)
+#   - dict with keys:
+#       "time": sample times [s] of shape (Ns,)
+#       "tgt_pos": target positions [m] of shape (Ns, 3)
+#       "tgt_vel": (optional) target velocities [m/s] of shape (Ns, 3)
+#       "plat_pos", "plat_vel": (optional) platform positions and velocities, stationary origin
+#       "start_time": (optional) trajectory time of the first pulse, default is time[0]
+
+
+def range_and_rangerate(plat_pos: list, plat_vel: list, tgt_pos: list, tgt_vel: list):
+    """Calculate the range vector, range, and range-rate of a target relative to a platform
+    Accepts single 3-vectors or arrays of shape (N, 3)"""
+    plat_pos = np.asarray(plat_pos, dtype=float)
+    plat_vel = np.asarray(plat_vel, dtype=float)
+    tgt_pos = np.asarray(tgt_pos, dtype=float)
+    tgt_vel = np.asarray(tgt_vel, dtype=float)
+
+    R_vec = tgt_pos - plat_pos
+
+    R_mag = np.sqrt(np.sum(R_vec**2, axis=-1))
+
+    R_unit_vec = R_vec / R_mag[..., np.newaxis]
+
+    R_dot = np.sum((tgt_vel - plat_vel) * R_unit_vec, axis=-1)
+
+    return R_vec, R_mag, R_dot
+
+
+def _interpolate_states(time, pos, vel, t):
+    """Interpolate sampled positions (and velocities) to times t"""
+    pos = np.asarray(pos, dtype=float)
+    if vel is None:
+        spline = CubicSpline(time, pos, axis=0)
+    else:
+        spline = CubicHermiteSpline(time, pos, np.asarray(vel, dtype=float), axis=0)
+    return spline(t), spline(t, 1)
+
+
+def trajectory_states(trajectory, t):
+    """Platform and target positions and velocities at times t, each of shape (t.size, 3)"""
+    t = np.atleast_1d(np.asarray(t, dtype=float))
+
+    if callable(trajectory):
+        states = trajectory(t)
+        return tuple(np.broadcast_to(np.asarray(s, dtype=float), (t.size, 3)) for s in states)
+
+    time = np.asarray(trajectory["time"], dtype=float)
+    t = trajectory.get("start_time", time[0]) + t
+    assert t.min() >= time[0] and t.max() <= time[-1], "Error: pulse times outside trajectory"
+
+    tgt_pos, tgt_vel = _interpolate_states(
+        time, trajectory["tgt_pos"], trajectory.get("tgt_vel"), t
+    )
+
+    if "plat_pos" in trajectory:
+        plat_pos, plat_vel = _interpolate_states(
+            time, trajectory["plat_pos"], trajectory.get("plat_vel"), t
+        )
+    else:
+        plat_pos = np.zeros((t.size, 3))
+        plat_vel = np.zeros((t.size, 3))
+
+    return plat_pos, plat_vel, tgt_pos, tgt_vel
+
+
+def trajectory_range_and_rangerate(trajectory, t):
+    """Range and range rate of the target at times t"""
+    _, R_mag, R_dot = range_and_rangerate(*trajectory_states(trajectory, t))
+    return R_mag, R_dot
+
+
+def target_range_and_rangerate(tgtInfo: dict, t_slow_axis):
+    """Range and range rate of the target at each pulse-transmit time
+    Uses tgtInfo["trajectory"] when given, otherwise a constant rangeRate from tgtInfo["range"]"""
+    if "trajectory" in tgtInfo:
+        return trajectory_range_and_rangerate(tgtInfo["trajectory"], t_slow_axis)
+
+    tgt_range_ar = tgtInfo["range"] + tgtInfo["rangeRate"] * t_slow_axis
+    tgt_rangeRate_ar = np.full(tgt_range_ar.shape, tgtInfo["rangeRate"], dtype=float)
+    return tgt_range_ar, tgt_rangeRate_ar
+
+
+def initial_target(tgtInfo: dict):
+    """Return tgtInfo with "range" and "rangeRate" filled in at the first pulse (copy if needed)"""
+    if "trajectory" not in tgtInfo:
+        return tgtInfo
+    R_mag, R_dot = trajectory_range_and_rangerate(tgtInfo["trajectory"], 0.0)
+    return {**tgtInfo, "range": float(R_mag[0]), "rangeRate": float(R_dot[0])}
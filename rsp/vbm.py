@@ -1,11 +1,19 @@
+import functools
 import numpy as np
 from numpy.linalg import norm
 from . import constants as c
-from .noise import band_limited_complex_noise, guassian_complex_noise
+from .noise import band_limited_complex_noise, guassian_complex_noise, uniform_random
 from .waveform import lfm_pulse
 
 # Achieve Velocity Bin Masking (VBM) by adding pahse in slow time #########################
 # - want to add phase so wvfm will sill pass radar's match filter
+# - techniques are registered by name in VBM_TECHNIQUES, memory returns pick one with the key
+#   "vbm" (default "lfm"), register_vbm adds new ones
+# - deterministic techniques (LFM) are cached by (technique, Npulses, f_delta, PRF) in a
+#   bounded LRU cache and returned read-only, random techniques take an optional numpy
+#   Generator (default noise.random_state(), the RandomState of rdm.gen's seeded() block)
+
+VBM_CACHE_SIZE = 64
 
 
 def calc_f_delta(fcar, rdot_delta):
@@ -27,40 +35,44 @@ def print_noise_stats(slowtime_noise):
 ####################################################################################################
 ### Start: noise techniques to achieve VBM in order of complexity ###
 ####################################################################################################
-def _random_phase(Npulses, *args):
+def _random_phase(Npulses, f_delta=None, PRF=None, rng=None):
     """Random phase, placing energy in all frequencies"""
-    rand_phase = 2 * c.PI * np.random.rand(Npulses)
+    rand_phase = 2 * c.PI * uniform_random(Npulses, rng)
     return np.exp(1j * rand_phase)
 
 
-def _uniform_bandwidth_phase(Npulses, f_delta, PRF):
+def _uniform_bandwidth_phase(Npulses, f_delta, PRF, rng=None):
     """Random phase within in a bandwidth"""
     # - does not require assumption on processing interval
     # - dirty result if each element is made magnitude = 1
     # - un-normalized (normalized over interval) only makes sense if possible on hardware
     # - adds much of the engery in the f_delta, but also lots of energy in other freqs
-    return band_limited_complex_noise(-f_delta / 2, +f_delta / 2, Npulses, PRF, normalize=True)
+    return band_limited_complex_noise(
+        -f_delta / 2, +f_delta / 2, Npulses, PRF, normalize=True, rng=rng
+    )
 
 
-def _gaussian_bandwidth_phase(Npulses, f_delta, PRF):
+def _gaussian_bandwidth_phase(Npulses, f_delta, PRF, rng=None):
     """Random phase in a bandwidth using a gaussian distribution"""
     # - does not require assumption on processing interval
     # - dirty result if each element is made magnitude = 1
     # - un-normalized (normalized over interval) only makes sense if possible on hardware
-    return guassian_complex_noise(0, f_delta / 2, 1, Npulses, PRF, normalize=True)
+    return guassian_complex_noise(0, f_delta / 2, 1, Npulses, PRF, normalize=True, rng=rng)
 
 
-def _gaussian_bandwidth_phase_normalized(Npulses, f_delta, PRF):
+def _gaussian_bandwidth_phase_normalized(Npulses, f_delta, PRF, rng=None):
     """Random phase normalized over a period"""
     # - A way to make the random noise cleaner is to normalize over a an interval
     # - use with un-normalized noise
     # - requires knowledge of number of pulses? (maybe)
-    slowtime_noise = guassian_complex_noise(0, f_delta / 2, 1, Npulses, PRF, normalize=False)
+    slowtime_noise = guassian_complex_noise(
+        0, f_delta / 2, 1, Npulses, PRF, normalize=False, rng=rng
+    )
     slowtime_noise = slowtime_noise / norm(slowtime_noise) * np.sqrt(slowtime_noise.size)
     return slowtime_noise
 
 
-def _lfm_phase(Npulses, f_delta, PRF):
+def _lfm_phase(Npulses, f_delta, PRF, rng=None):
     """Phase created from LFM-- an LFM in slowtime"""
     # - cleanest VBM method
     _, slowtime_noise = lfm_pulse(PRF, f_delta, Npulses / PRF, 1, normalize=False)
@@ -72,13 +84,61 @@ def _lfm_phase(Npulses, f_delta, PRF):
 ####################################################################################################
 
 
-def slowtime_noise(Npulses, fcar, rdot_delta, PRF, noiseFun=_lfm_phase, debug=False):
+VBM_TECHNIQUES = {
+    "random_phase": {"function": _random_phase, "deterministic": False},
+    "uniform_bandwidth": {"function": _uniform_bandwidth_phase, "deterministic": False},
+    "gaussian_bandwidth": {"function": _gaussian_bandwidth_phase, "deterministic": False},
+    "gaussian_bandwidth_normalized": {
+        "function": _gaussian_bandwidth_phase_normalized,
+        "deterministic": False,
+    },
+    "lfm": {"function": _lfm_phase, "deterministic": True},
+}
+
+
+def register_vbm(name: str, function, deterministic: bool = False):
+    """Add a VBM technique, function(Npulses, f_delta, PRF, rng=None) -> slow-time code
+    deterministic techniques must not use rng, their codes are cached"""
+    VBM_TECHNIQUES[name] = {"function": function, "deterministic": deterministic}
+    _cached_code.cache_clear()
+
+
+@functools.lru_cache(maxsize=VBM_CACHE_SIZE)
+def _cached_code(name: str, Npulses: int, f_delta: float, PRF: float):
+    code = np.asarray(VBM_TECHNIQUES[name]["function"](Npulses, f_delta, PRF))
+    code.flags.writeable = False
+    return code
+
+
+def vbm_code(technique, Npulses: int, f_delta: float, PRF: float, rng=None):
+    """Slow-time VBM code of a technique name (see VBM_TECHNIQUES) or function"""
+    if callable(technique):
+        return technique(Npulses, f_delta, PRF)
+    assert technique in VBM_TECHNIQUES, f"Error: VBM technique {technique} not found"
+    if VBM_TECHNIQUES[technique]["deterministic"]:
+        return _cached_code(technique, int(Npulses), float(f_delta), float(PRF))
+    return VBM_TECHNIQUES[technique]["function"](Npulses, f_delta, PRF, rng=rng)
+
+
+def slowtime_noise(Npulses, fcar, rdot_delta, PRF, noiseFun="lfm", debug=False, rng=None):
     """Create noise in slowtime for VBM
-    noiseFun choices: random_VBM, uniform_bandwidth_VMB, gaussian_bandwidth_VBM, gaussian_bandwidth_amp_VBM, lfm_VBM"""
+    noiseFun: technique name in VBM_TECHNIQUES or a function (Npulses, f_delta, PRF)"""
     f_delta = calc_f_delta(fcar, rdot_delta)
-    slowtime_noise = noiseFun(Npulses, f_delta, PRF)
+    slowtime_noise = vbm_code(noiseFun, Npulses, f_delta, PRF, rng)
 
     if debug:
         print_noise_stats(slowtime_noise)
 
     return slowtime_noise
+
+
+def slowtime_noise_batch(Npulses, fcar, rdot_deltas, PRF, technique="lfm", rng=None):
+    """VBM codes of many returns at once, row i is the code for rdot_deltas[i]
+    deterministic codes are computed once per unique rdot_delta"""
+    f_deltas = calc_f_delta(fcar, np.atleast_1d(np.asarray(rdot_deltas, dtype=float)))
+    if callable(technique) or not VBM_TECHNIQUES[technique]["deterministic"]:
+        return np.stack([vbm_code(technique, Npulses, f, PRF, rng) for f in f_deltas])
+
+    unique, inverse = np.unique(f_deltas, return_inverse=True)
+    codes = np.stack([vbm_code(technique, Npulses, f, PRF) for f in unique])
+    return codes[inverse]
@@ -1,7 +1,8 @@
 import numpy as np
 from numpy.linalg import norm
-from scipy import fft
+from . import fft_backend as fft
 from . import constants as c
+from .noise import random_state
 
 BARKER_DICT = {
     2: [1, -1],  # could also be [ 1, 1]
@@ -86,7 +87,7 @@ def barker_coded_pulse(sampleRate, BW, nChips, output_length_T=1, t_start=0, nor
 
 def random_coded_pulse(sampleRate, BW, nChips, output_length_T=1, t_start=0, normalize=True):
     """baseband random bi-phase coded pulse"""
-    code_rand = np.random.choice([1, -1], size=nChips)
+    code_rand = random_state().choice([1, -1], size=nChips)
     return coded_pulse(
         sampleRate,
         BW,
@@ -114,31 +115,32 @@ def lfm_pulse(sampleRate, BW, T, chirpUpDown, output_length_T=1, t_start=0, norm
 
 
 ## see /tests/function_tests/process_waveform.py for test of this function
-def process_waveform_dict(wvf: dict, radar: dict):
-    """Fill in wvf dict with "pulse", "time_BW_product", "pulse_width" """
+def waveform_fields(wvf: dict, sampRate: float):
+    """Derived "pulse", "time_BW_product", "pulse_width" of a wvf dict, random codes are drawn
+    from noise.random_state()"""
     if wvf["type"] == "uncoded":
-        _, pulse_wvf = uncoded_pulse(radar["sampRate"], wvf["bw"])
-        wvf["pulse"] = pulse_wvf
-        wvf["time_BW_product"] = 1
-        wvf["pulse_width"] = 1 / wvf["bw"]
+        _, pulse_wvf = uncoded_pulse(sampRate, wvf["bw"])
+        return {"pulse": pulse_wvf, "time_BW_product": 1, "pulse_width": 1 / wvf["bw"]}
 
     elif wvf["type"] == "barker":
-        _, pulse_wvf = barker_coded_pulse(radar["sampRate"], wvf["bw"], wvf["nchips"])
-        wvf["pulse"] = pulse_wvf
-        wvf["time_BW_product"] = wvf["nchips"]
-        wvf["pulse_width"] = 1 / wvf["bw"] * wvf["nchips"]
+        _, pulse_wvf = barker_coded_pulse(sampRate, wvf["bw"], wvf["nchips"])
+        pulse_width = 1 / wvf["bw"] * wvf["nchips"]
+        return {"pulse": pulse_wvf, "time_BW_product": wvf["nchips"], "pulse_width": pulse_width}
 
     elif wvf["type"] == "random":
-        _, pulse_wvf = random_coded_pulse(radar["sampRate"], wvf["bw"], wvf["nchips"])
-        wvf["pulse"] = pulse_wvf
-        wvf["time_BW_product"] = wvf["nchips"]
-        wvf["pulse_width"] = 1 / wvf["bw"] * wvf["nchips"]
+        _, pulse_wvf = random_coded_pulse(sampRate, wvf["bw"], wvf["nchips"])
+        pulse_width = 1 / wvf["bw"] * wvf["nchips"]
+        return {"pulse": pulse_wvf, "time_BW_product": wvf["nchips"], "pulse_width": pulse_width}
 
     elif wvf["type"] == "lfm":
-        _, pulse_wvf = lfm_pulse(radar["sampRate"], wvf["bw"], wvf["T"], wvf["chirpUpDown"])
-        wvf["pulse"] = pulse_wvf
-        wvf["time_BW_product"] = wvf["bw"] * wvf["T"]
-        wvf["pulse_width"] = wvf["T"]
+        _, pulse_wvf = lfm_pulse(sampRate, wvf["bw"], wvf["T"], wvf["chirpUpDown"])
+        time_BW_product = wvf["bw"] * wvf["T"]
+        return {"pulse": pulse_wvf, "time_BW_product": time_BW_product, "pulse_width": wvf["T"]}
 
     else:
         raise Exception(f"wvf type {wvf['type']} not found.")
+
+
+def process_waveform_dict(wvf: dict, radar: dict):
+    """Fill in wvf dict with "pulse", "time_BW_product", "pulse_width" """
+    wvf.update(waveform_fields(wvf, radar["sampRate"]))
@@ -1,6 +1,6 @@
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy import fft
+from . import fft_backend as fft
 from scipy.interpolate import interp1d
 from scipy import signal
 
@@ -160,6 +160,17 @@ def add_waveform_at_index(ar, waveform, index, debug=False):
     return ar
 
 
+def waveform_sample_indices(Nar: int, indices, Nwv: int):
+    """Sample positions of waveforms of length Nwv starting at indices in an array of size Nar
+    returns (pos, keep) where keep masks the samples add_waveform_at_index would add"""
+    indices = np.asarray(indices, dtype=int)
+    pos = indices[:, np.newaxis] + np.arange(Nwv)
+    # eclipsed waveforms are truncated as in add_waveform_at_index
+    eclipsed = (indices + Nwv >= Nar)[:, np.newaxis]
+    keep = (indices < Nar)[:, np.newaxis] & (~eclipsed | (pos < Nar - 1))
+    return pos, keep
+
+
 def matchfilter_with_waveform(ar, waveform):
     """Just use signal.convolve"""
     Nar = ar.size
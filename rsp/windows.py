@@ -0,0 +1,104 @@
+import functools
+from typing import NamedTuple
+import numpy as np
+from scipy import signal
+
+# Window library for slow-time (Doppler) and fast-time (range sidelobe) weighting ##########
+# - windows are described by dicts like the waveform dicts, e.g. {"type": "taylor", "sll": 35}
+# - windows are cached by (type, length, params) and returned read-only, apply them as
+#   broadcast vectors instead of building a full datacube sized matrix
+
+DEFAULT_PARAMS = {
+    "chebyshev": {"at": 60},  # sidelobe attenuation [dB]
+    "taylor": {"nbar": 4, "sll": 30},  # number of near sidelobes, sidelobe level [dB]
+    "hann": {},
+    "kaiser": {"beta": 6},
+    "rectangular": {},
+}
+
+
+class Window(NamedTuple):
+    """Cached window
+    weights: normalized to unity mean (slow time) or unity RMS (fast time)
+    coherent_gain: sum(w) / N of the peak normalized window
+    snr_loss: (sum w)^2 / (N sum w^2), the SNR ratio relative to a rectangular window
+    """
+
+    weights: np.ndarray
+    coherent_gain: float
+    snr_loss: float
+
+
+def _window_function(kind, N, params):
+    """Un-normalized window"""
+    if kind == "chebyshev":
+        return signal.windows.chebwin(N, params["at"])
+    if kind == "taylor":
+        return signal.windows.taylor(N, nbar=params["nbar"], sll=params["sll"], norm=False)
+    if kind == "hann":
+        return signal.windows.hann(N, sym=True)
+    if kind == "kaiser":
+        return signal.windows.kaiser(N, params["beta"])
+    if kind == "rectangular":
+        return np.ones(N)
+    raise Exception(f"window type {kind} not found.")
+
+
+@functools.lru_cache(maxsize=128)
+def _cached_window(kind: str, N: int, params: tuple, norm: str):
+    w = _window_function(kind, N, dict(params))
+    w_peak = w / w.max()
+    coherent_gain = np.sum(w_peak) / N
+    snr_loss = np.sum(w) ** 2 / (N * np.sum(w**2))
+
+    if norm == "mean":
+        weights = w / np.mean(w)
+    elif norm == "rms":
+        weights = w / np.sqrt(np.mean(w**2))
+    else:
+        raise Exception(f"window norm {norm} not found.")
+    weights.flags.writeable = False
+
+    return Window(weights, coherent_gain, snr_loss)
+
+
+def get_window(spec, N: int, norm: str = "mean"):
+    """Cached Window for a window spec
+    spec: None (rectangular), a window type string, or dict with key "type" and its params
+    norm: "mean" keeps a coherent sum unchanged (slow time)
+          "rms" keeps the noise power unchanged (fast time, applied to the matched filter)
+    """
+    if spec is None:
+        spec = {"type": "rectangular"}
+    elif isinstance(spec, str):
+        spec = {"type": spec}
+
+    kind = spec["type"]
+    assert kind in DEFAULT_PARAMS, f"Error: window type {kind} not in {list(DEFAULT_PARAMS)}"
+    params = {**DEFAULT_PARAMS[kind], **{k: v for k, v in spec.items() if k != "type"}}
+
+    return _cached_window(kind, int(N), tuple(sorted(params.items())), norm)
+
+
+def slowtime_window(spec, Np: int):
+    """Doppler window as a (1, Np) vector to broadcast over a (Nr, Np) datacube"""
+    return get_window(spec, Np, "mean").weights[np.newaxis, :]
+
+
+def weighted_pulse(pulse, spec):
+    """Pulse with a fast-time window for a range sidelobe reducing (mismatched) filter
+    - the window spans the pulse samples and has unity RMS, so noise power is unchanged and
+      the peak drops by the window SNR loss"""
+    if spec is None:
+        return pulse
+    return pulse * get_window(spec, pulse.size, "rms").weights
+
+
+def print_window_losses(shape: tuple, doppler_spec, Npulse_samples: int, range_spec):
+    """Print the SNR loss of the slow-time and fast-time windows"""
+    doppler = get_window(doppler_spec, shape[1])
+    print("Window SNR losses:")
+    print(f"\tDoppler: {10*np.log10(doppler.snr_loss):.2f} dB")
+    if range_spec is not None:
+        rng = get_window(range_spec, Npulse_samples, "rms")
+        print(f"\trange: {10*np.log10(rng.snr_loss):.2f} dB")
@@ -9,6 +9,7 @@ setup(
     long_description_content_type="text/orgfile",
     url="https://github.com/JohnNehls/radar-signal-processing",
     packages=find_packages(),
+    entry_points={"console_scripts": ["rsp=rsp.batch:main"]},
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: GPL-3.0 License",
@@ -17,7 +18,7 @@ setup(
     python_requires=">=3.11",
     install_requires=[
         "numpy",
-        "scipy",
+        "scipy>=1.15",  # signal.zoom_fft and batched linalg solves, as in requirements.txt
         "matplotlib",
     ],
 )
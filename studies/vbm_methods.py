@@ -2,6 +2,7 @@
 
 import matplotlib.pyplot as plt
 from rsp import rdm
+from rsp.cache import ComponentCache
 import rsp.vbm as vbm
 
 ################################################################################
@@ -29,18 +30,12 @@ waveform = {"type": "uncoded", "bw": bw}
 
 return_list = [{"type": "memory", "rdot_delta": 1.0e3, "rdot_offset": 0.0e3}]
 
-vbm_name_function_dict = {
-    "random phase VBM": vbm._random_phase,
-    "uniform bandwidth phase VBM": vbm._uniform_bandwidth_phase,
-    "gaussian bandwidth phase VBM": vbm._gaussian_bandwidth_phase,
-    "uniform bandwidth phase normalized VBM": vbm._gaussian_bandwidth_phase_normalized,
-    "LFM phase VBM": vbm._lfm_phase,
-}
-
-for name, func in vbm_name_function_dict.items():
-    return_list[0]["vbm_noise_function"] = func
-    rdm.gen(target, radar, waveform, return_list, debug=False)
+# only the memory return changes between techniques, the processed noise is reused
+components = ComponentCache()
+for name in vbm.VBM_TECHNIQUES:
+    return_list[0]["vbm"] = name
+    rdm.gen(target, radar, waveform, return_list, debug=False, components=components)
     ax = plt.gca()
-    ax.set_title(name)
+    ax.set_title(f"{name} VBM")
 
 plt.show()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+
+import sys
+import numpy as np
+import matplotlib.pyplot as plt
+from rsp import rdm
+from rsp.windows import get_window, weighted_pulse
+from rsp.waveform import lfm_pulse
+from rsp.waveform_helpers import matchfilter_with_waveform
+
+# Can make plotting non-blocking with an input flag
+if sys.argv[-1].lower() == "--no-block":
+    BLOCK = False
+else:
+    BLOCK = True
+
+print("##########################")
+print("Window library")
+print("##########################")
+
+## windows are cached and read-only ###############################
+if get_window("chebyshev", 400) is not get_window({"type": "chebyshev", "at": 60}, 400):
+    raise Exception("window cache miss for equivalent specs")
+if get_window("chebyshev", 400).weights.flags.writeable:
+    raise Exception("cached window is writeable")
+
+print(f"{'window':>12} {'coherent gain':>14} {'SNR loss [dB]':>14}")
+for spec in ["rectangular", "chebyshev", "taylor", "hann", {"type": "kaiser", "beta": 8}]:
+    w = get_window(spec, 400)
+    name = spec if isinstance(spec, str) else spec["type"]
+    print(f"{name:>12} {w.coherent_gain:14.3f} {10*np.log10(w.snr_loss):14.2f}")
+
+# known hann values: coherent gain 0.5, SNR loss 1.76 dB
+w = get_window("hann", 4001)
+if abs(w.coherent_gain - 0.5) > 1e-3 or abs(10 * np.log10(w.snr_loss) + 1.76) > 1e-2:
+    raise Exception("hann window factors are incorrect")
+
+## fast-time window lowers LFM range sidelobes ######################
+fs = 100e6
+bw = 20e6
+_, pulse = lfm_pulse(fs, bw, 5e-6, 1)
+signal = np.zeros(4 * pulse.size, dtype=complex)
+signal[pulse.size : 2 * pulse.size] = pulse
+
+fig, ax = plt.subplots()
+ax.set_title("LFM range sidelobes")
+for spec in [None, {"type": "taylor", "nbar": 5, "sll": 35}]:
+    mf, index_shift = matchfilter_with_waveform(signal, weighted_pulse(pulse, spec))
+    mf_db = 20 * np.log10(abs(mf) / abs(mf).max() + 1e-12)
+    peak = np.argmax(abs(mf))
+    mainlobe = 2 * int(fs / bw)
+    sidelobes = np.concatenate([mf_db[: peak - mainlobe], mf_db[peak + mainlobe :]])
+    print(f"{spec=}: peak sidelobe {sidelobes.max():.1f} dB")
+    ax.plot(index_shift, mf_db, label=f"{spec}")
+    if spec is not None and sidelobes.max() > -30:
+        raise Exception("Taylor window did not lower the range sidelobes")
+ax.set_xlabel("sample")
+ax.set_ylabel("dB")
+ax.set_ylim(-80, 0)
+ax.legend()
+
+## rdm.gen with range and Doppler windows ###########################
+radar = {
+    "fcar": 10e9,
+    "txPower": 1e3,
+    "txGain": 10 ** (30 / 10),
+    "rxGain": 10 ** (30 / 10),
+    "opTemp": 290,
+    "sampRate": 4 * 10e6,
+    "noiseFig": 10 ** (8 / 10),
+    "totalLosses": 10 ** (8 / 10),
+    "PRF": 200e3,
+    "dwell_time": 2e-3,
+}
+target = {"range": 3.5e3, "rangeRate": 0.5e3, "rcs": 10}
+waveform = {"type": "lfm", "bw": 10e6, "T": 2e-6, "chirpUpDown": 1}
+rdm.gen(
+    target,
+    radar,
+    waveform,
+    [{"type": "skin"}],
+    doppler_window={"type": "taylor", "sll": 40},
+    range_window={"type": "taylor", "sll": 35},
+)
+
+plt.show(block=BLOCK)
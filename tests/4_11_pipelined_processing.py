@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+
+import sys
+import time
+import numpy as np
+import matplotlib.pyplot as plt
+from rsp.pipeline import CPIPipeline, rdm_stages
+from rsp.rf_datacube import dataCube
+from rsp.rdm_helpers import add_returns, plot_rdm
+from rsp.waveform import process_waveform_dict
+
+# Can make plotting non-blocking with an input flag
+if sys.argv[-1].lower() == "--no-block":
+    BLOCK = False
+else:
+    BLOCK = True
+
+print("##########################")
+print("Pipelined CPI processing")
+print("##########################")
+
+bw = 10e6
+
+radar = {
+    "fcar": 10e9,
+    "txPower": 1e3,
+    "txGain": 10 ** (30 / 10),
+    "rxGain": 10 ** (30 / 10),
+    "opTemp": 290,
+    "sampRate": 8 * bw,
+    "noiseFig": 10 ** (8 / 10),
+    "totalLosses": 10 ** (8 / 10),
+    "PRF": 50e3,
+    "dwell_time": 10e-3,
+}
+radar["Npulses"] = int(np.ceil(radar["dwell_time"] * radar["PRF"]))
+
+waveform = {"type": "lfm", "bw": bw, "T": 5e-6, "chirpUpDown": 1}
+process_waveform_dict(waveform, radar)
+
+Ncpi = 8
+
+
+def cpis():
+    """Generate stage: noisy datacubes with a target moving between CPIs"""
+    for i in range(Ncpi):
+        dc = dataCube(radar["sampRate"], radar["PRF"], radar["Npulses"], noise=True)
+        target = {"range": 1e3 + 50 * i, "rangeRate": 0.3e3, "rcs": 10}
+        add_returns(dc, waveform, target, [{"type": "skin"}], radar, 1.0)
+        yield dc
+
+
+stages = rdm_stages(waveform, radar)
+
+# sequential reference
+np.random.seed(0)
+t0 = time.perf_counter()
+expected = []
+for dc in cpis():
+    for stage in stages:
+        dc = stage(dc)
+    expected.append(dc)
+t_sequential = time.perf_counter() - t0
+
+# pipelined
+np.random.seed(0)
+t0 = time.perf_counter()
+results = list(CPIPipeline(stages, maxsize=2).run(cpis()))
+t_pipeline = time.perf_counter() - t0
+
+print(f"sequential: {t_sequential / Ncpi * 1e3:.1f} ms/CPI")
+print(f"pipelined: {t_pipeline / Ncpi * 1e3:.1f} ms/CPI")
+
+if len(results) != Ncpi or not all(np.array_equal(a, b) for a, b in zip(results, expected)):
+    raise Exception("pipeline output differs from sequential processing or is out of order")
+
+
+## stage errors reach the consumer ###################################
+def failing_stage(dc):
+    raise ValueError("stage failure")
+
+
+try:
+    list(CPIPipeline([stages[0], failing_stage]).run(cpis()))
+    raise Exception("stage error was not raised")
+except ValueError:
+    print("stage error raised in consumer")
+
+# the consumer plots in its own thread
+r_axis = np.arange(1, results[-1].shape[0] + 1) * 3e8 / (2 * radar["sampRate"])
+f_axis = np.fft.fftshift(np.fft.fftfreq(radar["Npulses"], 1 / radar["PRF"]))
+plot_rdm(-3e8 * f_axis / (2 * radar["fcar"]), r_axis, results[-1], "last pipelined CPI")
+
+plt.show(block=BLOCK)
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+
+import sys
+import numpy as np
+import matplotlib.pyplot as plt
+from rsp import rdm
+from rsp.rdm_helpers import plot_rdm
+
+# Can make plotting non-blocking with an input flag
+if sys.argv[-1].lower() == "--no-block":
+    BLOCK = False
+else:
+    BLOCK = True
+
+print("##########################")
+print("Zoomed Doppler processing")
+print("##########################")
+
+bw = 10e6
+
+radar = {
+    "fcar": 10e9,
+    "txPower": 1e3,
+    "txGain": 10 ** (30 / 10),
+    "rxGain": 10 ** (30 / 10),
+    "opTemp": 290,
+    "sampRate": 2 * bw,
+    "noiseFig": 10 ** (8 / 10),
+    "totalLosses": 10 ** (8 / 10),
+    "PRF": 200e3,
+    "dwell_time": 2e-3,
+}
+
+waveform = {"type": "barker", "nchips": 13, "bw": bw}
+
+# rangeRate between two Doppler bins of the full FFT
+target = {"range": 3.5e3, "rangeRate": 0.5137e3, "rcs": 10}
+
+return_list = [{"type": "skin"}]
+
+rdot_full, r_axis, _, signal_full = rdm.gen(target, radar, waveform, return_list, plot=False)
+
+## zoom on Doppler bins of the full FFT gives the same values ######
+i0, i1 = np.argmin(abs(rdot_full - 0.6e3)), np.argmin(abs(rdot_full - 0.4e3))
+zoom = {"rdot_min": rdot_full[i1], "rdot_max": rdot_full[i0], "bins": i1 - i0 + 1}
+rdot_zoom, _, _, signal_zoom = rdm.gen(
+    target, radar, waveform, return_list, plot=False, doppler_zoom=zoom
+)
+if not np.allclose(rdot_zoom, rdot_full[i0 : i1 + 1]):
+    raise Exception("zoomed range-rate axis does not match the full axis")
+if not np.allclose(signal_zoom, signal_full[:, i0 : i1 + 1], atol=1e-6 * abs(signal_full).max()):
+    raise Exception("zoomed Doppler values do not match the full FFT")
+print("zoom on the full FFT grid matches doppler_process")
+
+## fine bins in a narrow band ######################################
+zoom = {"rdot_min": 0.4e3, "rdot_max": 0.6e3, "bins": 201}
+rdot_zoom, _, total_zoom, signal_zoom = rdm.gen(
+    target, radar, waveform, return_list, plot=False, doppler_zoom=zoom
+)
+rdot_peak_full = rdot_full[np.unravel_index(np.argmax(abs(signal_full)), signal_full.shape)[1]]
+rdot_peak_zoom = rdot_zoom[np.unravel_index(np.argmax(abs(signal_zoom)), signal_zoom.shape)[1]]
+print(f"full FFT peak: {rdot_peak_full:.1f} m/s, zoom peak: {rdot_peak_zoom:.1f} m/s")
+if abs(rdot_peak_zoom - target["rangeRate"]) >= abs(rdot_peak_full - target["rangeRate"]):
+    raise Exception("zoom did not refine the range-rate estimate")
+
+plot_rdm(rdot_zoom, r_axis, total_zoom, "zoomed Doppler RDM", cbarMin=0)
+
+plt.show(block=BLOCK)
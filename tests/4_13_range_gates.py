@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+
+import sys
+import time
+import numpy as np
+import matplotlib.pyplot as plt
+from rsp import rdm
+from rsp.rdm_helpers import plot_rdm
+
+# Can make plotting non-blocking with an input flag
+if sys.argv[-1].lower() == "--no-block":
+    BLOCK = False
+else:
+    BLOCK = True
+
+print("##########################")
+print("Range-gated processing")
+print("##########################")
+
+bw = 10e6
+radar = {
+    "fcar": 10e9,
+    "txPower": 1e3,
+    "txGain": 10 ** (30 / 10),
+    "rxGain": 10 ** (30 / 10),
+    "opTemp": 290,
+    "sampRate": 2 * bw,
+    "noiseFig": 10 ** (8 / 10),
+    "totalLosses": 10 ** (8 / 10),
+    "PRF": 20e3,
+    "dwell_time": 5e-3,
+}
+target = {"range": 3.5e3, "rangeRate": 0.5e3, "rcs": 10}
+waveform = {"type": "lfm", "bw": bw, "T": 2e-6, "chirpUpDown": 1}
+return_list = [{"type": "skin"}, {"type": "memory", "rdot_offset": 0.3e3, "range_offset": 50}]
+
+# gates around the target and an empty gate
+range_gates = [(3.3e3, 3.7e3), (6e3, 6.2e3)]
+
+t0 = time.perf_counter()
+full = rdm.gen(target, radar, waveform, return_list, plot=False)
+t1 = time.perf_counter()
+gated = rdm.gen(target, radar, waveform, return_list, plot=False, range_gates=range_gates)
+t2 = time.perf_counter()
+print(f"full: {full[2].shape} {t1 - t0:.3f} s, gated: {gated[2].shape} {t2 - t1:.3f} s")
+
+rdot_axis, r_axis, total_dc, signal_dc = gated
+in_gate = np.zeros(full[1].size, dtype=bool)
+for r_min, r_max in range_gates:
+    in_gate |= (full[1] >= r_min) & (full[1] <= r_max)
+
+## the gated signal RDM matches the full signal RDM at the gate rows ######
+if not np.array_equal(r_axis, full[1][in_gate]) or not np.array_equal(rdot_axis, full[0]):
+    raise Exception("range gated axes do not match the full RDM axes")
+err = abs(signal_dc - full[3][in_gate]).max() / abs(full[3]).max()
+print(f"gated signal relative error: {err:.2e}")
+if err > 1e-6:
+    raise Exception("range gated signal RDM does not match the full RDM")
+
+## noise has the same statistics #######################################
+noise_var = np.var(total_dc - signal_dc)
+print(f"gated noise variance: {noise_var:.3f}, full: {np.var(full[2] - full[3]):.3f}")
+if abs(noise_var - np.var(full[2] - full[3])) > 0.1:
+    raise Exception("range gated noise variance is incorrect")
+
+plot_rdm(rdot_axis, r_axis, total_dc, "Range-gated RDM", cbarMin=0)
+
+plt.show(block=BLOCK)
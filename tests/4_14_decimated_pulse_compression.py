@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+
+import sys
+import time
+import numpy as np
+import matplotlib.pyplot as plt
+from rsp import rdm
+from rsp import constants as c
+from rsp.rdm_helpers import plot_rdm
+
+# Can make plotting non-blocking with an input flag
+if sys.argv[-1].lower() == "--no-block":
+    BLOCK = False
+else:
+    BLOCK = True
+
+print("##########################")
+print("Decimated pulse compression")
+print("##########################")
+
+bw = 10e6
+radar = {
+    "fcar": 10e9,
+    "txPower": 1e3,
+    "txGain": 10 ** (30 / 10),
+    "rxGain": 10 ** (30 / 10),
+    "opTemp": 290,
+    "sampRate": 4 * bw,  # oversampled for injection fidelity
+    "noiseFig": 10 ** (8 / 10),
+    "totalLosses": 10 ** (8 / 10),
+    "PRF": 20e3,
+    "dwell_time": 5e-3,
+}
+target = {"range": 3.5e3, "rangeRate": 0.5e3, "rcs": 10}
+waveform = {"type": "lfm", "bw": bw, "T": 4e-6, "chirpUpDown": 1}
+return_list = [{"type": "skin"}]
+
+spacing = c.C / (2 * bw)  # range resolution, decimate by 4
+
+t0 = time.perf_counter()
+full = rdm.gen(target, radar, waveform, return_list, plot=False)
+t1 = time.perf_counter()
+rdot_axis, r_axis, total_dc, signal_dc = rdm.gen(
+    target, radar, waveform, return_list, plot=False, range_bin_spacing=spacing
+)
+t2 = time.perf_counter()
+print(f"full: {full[2].shape} {t1 - t0:.3f} s, decimated: {total_dc.shape} {t2 - t1:.3f} s")
+
+## decimated RDM is every 4th range bin of the full RDM ###############
+if not np.array_equal(r_axis, full[1][::4]) or total_dc.shape[0] != full[2].shape[0] // 4:
+    raise Exception("decimated range axis is incorrect")
+err = abs(signal_dc - full[3][::4]).max() / abs(full[3]).max()
+print(f"decimated signal relative error: {err:.2e}")
+if err > 1e-5:
+    raise Exception("decimated signal RDM does not match the full RDM")
+
+## with range gates only gate bins on the decimated grid are kept ######
+gated = rdm.gen(
+    target,
+    radar,
+    waveform,
+    return_list,
+    plot=False,
+    range_gates=[(3.3e3, 3.7e3)],
+    range_bin_spacing=spacing,
+)
+in_gate = (r_axis >= 3.3e3) & (r_axis <= 3.7e3)
+if not np.array_equal(gated[1], r_axis[in_gate]):
+    raise Exception("decimated range gate axis is incorrect")
+if abs(gated[3] - signal_dc[in_gate]).max() > 1e-5 * abs(signal_dc).max():
+    raise Exception("decimated range gate RDM does not match the decimated RDM")
+
+plot_rdm(rdot_axis, r_axis, total_dc, "Decimated RDM", cbarMin=0)
+
+plt.show(block=BLOCK)
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+
+import sys
+import time
+import numpy as np
+import matplotlib.pyplot as plt
+from rsp import rdm
+from rsp import constants as c
+from rsp.clutter import clutter_params, clutter_rcs
+from rsp.rdm_helpers import plot_rdm
+
+# Can make plotting non-blocking with an input flag
+if sys.argv[-1].lower() == "--no-block":
+    BLOCK = False
+else:
+    BLOCK = True
+
+print("##########################")
+print("Ground clutter")
+print("##########################")
+
+bw = 10e6
+radar = {
+    "fcar": 10e9,
+    "txPower": 1e3,
+    "txGain": 10 ** (30 / 10),
+    "rxGain": 10 ** (30 / 10),
+    "opTemp": 290,
+    "sampRate": 2 * bw,
+    "noiseFig": 10 ** (8 / 10),
+    "totalLosses": 10 ** (8 / 10),
+    "PRF": 20e3,
+    "dwell_time": 2048 / 20e3,
+}
+target = {"range": 3.5e3, "rangeRate": 100, "rcs": 10}
+waveform = {"type": "lfm", "bw": bw, "T": 2e-6, "chirpUpDown": 1}
+clutter = {"type": "clutter", "height": 200, "sigma_v": 0.5}
+
+## full cube of clutter at thousands of pulses ##########################
+t0 = time.perf_counter()
+rdot_axis, r_axis, total_dc, signal_dc = rdm.gen(
+    target, radar, waveform, [{"type": "skin"}, clutter], plot=False
+)
+print(f"{total_dc.shape} RDM with clutter: {time.perf_counter() - t0:.2f} s")
+
+## clutter is at zero range rate within its internal motion spread ######
+# away from zero only the Doppler window sidelobes (60 dB Chebyshev) remain
+clutter_rows = (r_axis > 1e3) & (abs(r_axis - target["range"]) > 300)  # away from the target
+clutter_power = np.mean(abs(signal_dc[clutter_rows]) ** 2, axis=0)
+near_zero = abs(rdot_axis) < 3 * clutter["sigma_v"]
+far = abs(rdot_axis) > 50
+ratio = 10 * np.log10(clutter_power[near_zero].sum() / clutter_power.sum())
+print(f"clutter power within 3 sigma_v of zero range rate: {ratio:.2f} dB")
+if ratio < -0.5 or clutter_power[far].max() > 1e-5 * clutter_power.max():
+    raise Exception("clutter spectrum is not centered at zero range rate")
+
+## clutter power follows the range equation #############################
+# a range bin of clutter holds the energy of a point target with the patch RCS
+radar["dwell_time"] = 256 / 20e3
+_, _, _, clutter_rdm = rdm.gen(target, radar, waveform, [clutter], plot=False)
+params = clutter_params(clutter)
+dR = c.C / (2 * radar["sampRate"])
+for R in [2e3, 4e3]:
+    point = {
+        "range": R,
+        "rangeRate": 0,
+        "rcs": clutter_rcs(R, *[params[k] for k in ["gamma", "height", "beamwidth"]], dR),
+    }
+    _, _, _, point_rdm = rdm.gen(point, radar, waveform, [{"type": "skin"}], plot=False)
+    bins = abs(r_axis - R) < 150
+    measured = np.mean(np.sum(abs(clutter_rdm[bins]) ** 2, axis=1))
+    expected = np.sum(abs(point_rdm) ** 2)
+    error = 10 * np.log10(measured / expected)
+    print(f"clutter energy at {R/1e3:.0f} km vs range equation: {error:.2f} dB")
+    if abs(error) > 1:
+        raise Exception("clutter power does not follow the range equation")
+
+plot_rdm(rdot_axis, r_axis, total_dc, "RDM with ground clutter", cbarMin=0)
+
+plt.show(block=BLOCK)
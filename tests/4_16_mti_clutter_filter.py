@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+
+import sys
+import numpy as np
+import matplotlib.pyplot as plt
+from rsp import rdm
+from rsp.mti import clutter_filter
+from rsp.rdm_helpers import plot_rdm
+
+# Can make plotting non-blocking with an input flag
+if sys.argv[-1].lower() == "--no-block":
+    BLOCK = False
+else:
+    BLOCK = True
+
+print("##########################")
+print("MTI clutter filters")
+print("##########################")
+
+bw = 10e6
+radar = {
+    "fcar": 10e9,
+    "txPower": 1e3,
+    "txGain": 10 ** (30 / 10),
+    "rxGain": 10 ** (30 / 10),
+    "opTemp": 290,
+    "sampRate": 2 * bw,
+    "noiseFig": 10 ** (8 / 10),
+    "totalLosses": 10 ** (8 / 10),
+    "PRF": 20e3,
+    "dwell_time": 256 / 20e3,
+}
+target = {"range": 3.5e3, "rangeRate": 100, "rcs": 1}
+waveform = {"type": "lfm", "bw": bw, "T": 2e-6, "chirpUpDown": 1}
+clutter = {"type": "clutter", "height": 200, "sigma_v": 0.1}
+
+## clutter power removed from clutter only RDMs (same seed, same clutter) ##
+ratios = {}
+_, _, _, before = rdm.gen(target, radar, waveform, [clutter], plot=False)
+for spec in ["two_pulse", "three_pulse", {"type": "fir", "taps": [1, -3, 3, -1]}, "dc_notch"]:
+    name = spec if isinstance(spec, str) else spec["type"]
+    _, _, _, after = rdm.gen(target, radar, waveform, [clutter], plot=False, clutter_filter=spec)
+    ratios[name] = 10 * np.log10(np.sum(abs(before) ** 2) / np.sum(abs(after) ** 2))
+    print(f"{name:>12}: {ratios[name]:.1f} dB")
+
+if not ratios["fir"] > ratios["three_pulse"] > ratios["two_pulse"] > 20:
+    raise Exception("higher order cancellers should cancel more clutter")
+
+## the reported ratio matches the datacube power ratio ##################
+dc = np.tile(np.exp(2j * np.pi * 1e-3 * np.arange(64)), (8, 1)).astype(np.complex64)
+power = np.sum(abs(dc) ** 2)
+ratio = clutter_filter(dc, "two_pulse")
+if abs(ratio - power / np.sum(abs(dc) ** 2)) > 1e-6 * ratio or dc.dtype != np.complex64:
+    raise Exception("clutter filter did not work in place or misreported its ratio")
+
+## the DC notch zeroes exactly its odd number of bins ###################
+rng = np.random.default_rng(0)
+for bins in [1, 5]:
+    dc = rng.standard_normal((4, 32)) + 1j * rng.standard_normal((4, 32))
+    spectrum = np.fft.fft(dc, axis=1)
+    clutter_filter(dc, {"type": "dc_notch", "bins": bins})
+    notched = abs(np.fft.fft(dc, axis=1)) < 1e-9
+    expected = np.isin(np.arange(32), np.r_[0 : bins // 2 + 1, 32 - bins // 2 : 32])
+    if (
+        not (notched == expected).all()
+        or abs(np.fft.fft(dc, axis=1) - spectrum)[:, ~expected].max() > 1e-9
+    ):
+        raise Exception(f"dc_notch of {bins} bins notched {notched.sum(axis=1)} bins")
+for bins in [0, 2]:
+    try:
+        clutter_filter(dc, {"type": "dc_notch", "bins": bins})
+    except AssertionError:
+        pass
+    else:
+        raise Exception(f"dc_notch of {bins} bins did not fail")
+
+## target in clutter is revealed by the canceller #######################
+return_list = [{"type": "skin"}, clutter]
+for spec in [None, "three_pulse"]:
+    rdot_axis, r_axis, total_dc, _ = rdm.gen(
+        target, radar, waveform, return_list, plot=False, clutter_filter=spec
+    )
+    target_cell = np.unravel_index(np.argmax(abs(total_dc)), total_dc.shape)
+    found = abs(r_axis[target_cell[0]] - target["range"]) < 30
+    found &= abs(rdot_axis[target_cell[1]] - target["rangeRate"]) < 5
+    print(f"{spec=}: target is the peak of the RDM: {found}")
+    if spec is not None and not found:
+        raise Exception("target was not revealed by the clutter filter")
+    plot_rdm(rdot_axis, r_axis, total_dc, f"Clutter filter {spec}", cbarMin=0)
+
+plt.show(block=BLOCK)
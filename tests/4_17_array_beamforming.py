@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+
+import sys
+import time
+import numpy as np
+import matplotlib.pyplot as plt
+from rsp import rdm
+from rsp.beamforming import target_steering
+
+# Can make plotting non-blocking with an input flag
+if sys.argv[-1].lower() == "--no-block":
+    BLOCK = False
+else:
+    BLOCK = True
+
+print("##########################")
+print("Array datacubes and beamforming")
+print("##########################")
+
+bw = 10e6
+radar = {
+    "fcar": 10e9,
+    "txPower": 1e3,
+    "txGain": 10 ** (30 / 10),
+    "rxGain": 10 ** (30 / 10),
+    "opTemp": 290,
+    "sampRate": 2 * bw,
+    "noiseFig": 10 ** (8 / 10),
+    "totalLosses": 10 ** (8 / 10),
+    "PRF": 20e3,
+    "dwell_time": 5e-3,
+}
+target = {"range": 3.5e3, "rangeRate": 0.5e3, "rcs": 10, "azimuth": np.radians(10)}
+waveform = {"type": "lfm", "bw": bw, "T": 2e-6, "chirpUpDown": 1}
+return_list = [{"type": "skin"}]
+
+_, _, _, single = rdm.gen(target, radar, waveform, return_list, plot=False)
+
+## channel RDMs are the single channel RDM with the steering phases #####
+array_radar = dict(radar, array={"elements": 8, "spacing": 0.5})
+t0 = time.perf_counter()
+rdot_axis, r_axis, total_dc, signal_dc = rdm.gen(
+    target, array_radar, waveform, return_list, plot=False
+)
+print(f"channel RDMs {total_dc.shape}: {time.perf_counter() - t0:.3f} s")
+
+steering = target_steering(target, array_radar)
+err = abs(signal_dc - single[..., np.newaxis] * steering).max() / abs(single).max()
+print(f"channel RDM relative error: {err:.2e}")
+if err > 1e-5:
+    raise Exception("channel RDMs do not match the single channel RDM")
+
+## a fan of beams peaks at the target azimuth with the array gain ########
+beams = np.radians(np.arange(-30, 31))
+t0 = time.perf_counter()
+rdot_axis, r_axis, total_dc, signal_dc = rdm.gen(
+    target, array_radar, waveform, return_list, plot=False, beams=beams
+)
+print(f"{beams.size} beams {total_dc.shape}: {time.perf_counter() - t0:.3f} s")
+
+beam_peak = abs(signal_dc).max(axis=(0, 1))
+peak_azimuth = np.degrees(beams[np.argmax(beam_peak)])
+gain = 20 * np.log10(beam_peak.max() / abs(single).max())
+noise_var = np.var(total_dc - signal_dc)
+print(f"peak beam {peak_azimuth:.0f} deg, array gain {gain:.2f} dB, noise variance {noise_var:.3f}")
+if peak_azimuth != 10 or abs(gain - 10 * np.log10(8)) > 0.01:
+    raise Exception("beams do not peak at the target with the array gain")
+
+fig, ax = plt.subplots()
+ax.plot(np.degrees(beams), 20 * np.log10(beam_peak / beam_peak.max()))
+ax.set_xlabel("beam azimuth [deg]")
+ax.set_ylabel("peak [dB]")
+ax.set_title("Beam scan of the target")
+
+plt.show(block=BLOCK)
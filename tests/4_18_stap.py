@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+
+import sys
+import time
+import numpy as np
+import matplotlib.pyplot as plt
+from rsp import rdm
+from rsp.stap import training_cells, sample_covariance, stap_weights
+from rsp.rdm_helpers import plot_rdm
+
+# Can make plotting non-blocking with an input flag
+if sys.argv[-1].lower() == "--no-block":
+    BLOCK = False
+else:
+    BLOCK = True
+
+print("##########################")
+print("Space-time adaptive processing")
+print("##########################")
+
+## training bins skip the block and its guard bins ######################
+train = training_cells(200, block=16, guard=2, Ntrain=40)
+for b, cells in enumerate(train):
+    if np.any((cells >= 16 * b - 2) & (cells < 16 * (b + 1) + 2)) or np.unique(cells).size != 40:
+        raise Exception("training bins overlap the block or its guard bins")
+
+## Cholesky weights equal the explicit inverse weights ##################
+rng = np.random.default_rng(0)
+snapshots = rng.standard_normal((200, 3, 6)) + 1j * rng.standard_normal((200, 3, 6))
+steering = np.exp(1j * rng.uniform(0, 2 * np.pi, (3, 6, 4)))
+weights = stap_weights(snapshots, steering, train, loading=0.1)
+R = sample_covariance(snapshots, train, loading=0.1)
+w = np.linalg.inv(R) @ steering
+w /= np.sqrt(np.real(np.sum(np.conj(steering) * w, axis=-2, keepdims=True)))
+if abs(weights - w).max() > 1e-10:
+    raise Exception("STAP weights do not match the explicit inverse weights")
+
+## airborne clutter ridge ###############################################
+bw = 10e6
+PRF = 10e3
+radar = {
+    "fcar": 10e9,
+    "txPower": 1e3,
+    "txGain": 10 ** (30 / 10),
+    "rxGain": 10 ** (30 / 10),
+    "opTemp": 290,
+    "sampRate": 2 * bw,
+    "noiseFig": 10 ** (8 / 10),
+    "totalLosses": 10 ** (8 / 10),
+    "PRF": PRF,
+    "dwell_time": 32 / PRF,
+    "array": {"elements": 8, "spacing": 0.5},
+}
+waveform = {"type": "lfm", "bw": bw, "T": 2e-6, "chirpUpDown": 1}
+target = {"range": 6e3, "rangeRate": 40, "rcs": 1, "azimuth": 0.0}
+# side looking array moving along its axis, clutter Doppler is coupled to azimuth
+clutter = {
+    "type": "clutter",
+    "height": 1000,
+    "gamma": 10 ** (5 / 10),
+    "beamwidth": np.pi / 2,
+    "azimuths": np.linspace(-np.pi / 2, np.pi / 2, 181),
+    "platform_speed": 75,
+    "sigma_v": 0.05,
+}
+
+sinr = {}
+for name, options in [
+    ("beam", {"beams": [0.0]}),
+    ("post_doppler", {"stap": "post_doppler"}),
+    ("full", {"stap": "full"}),
+]:
+    t0 = time.perf_counter()
+    rdot_axis, r_axis, total_dc, _ = rdm.gen(
+        target, radar, waveform, [{"type": "skin"}, clutter], plot=False, **options
+    )
+    dt = time.perf_counter() - t0
+    # same seed so the same clutter and noise without the target
+    _, _, interference, _ = rdm.gen(target, radar, waveform, [clutter], plot=False, **options)
+    # a single beam RDM has a channel axis of length one
+    total_dc = total_dc.reshape(r_axis.size, -1)
+    interference = interference.reshape(r_axis.size, -1)
+
+    i = np.argmin(abs(r_axis - target["range"]))
+    j = np.argmin(abs(rdot_axis - target["rangeRate"]))
+    target_power = (abs(total_dc - interference)[i - 2 : i + 3, j - 1 : j + 2] ** 2).max()
+    ring = (abs(r_axis - target["range"]) < 1500) & (abs(r_axis - target["range"]) > 100)
+    sinr[name] = 10 * np.log10(target_power / np.mean(abs(interference[ring, j]) ** 2))
+
+    window = abs(r_axis - target["range"]) < 1500
+    peak = np.unravel_index(np.argmax(abs(total_dc[window])), total_dc[window].shape)
+    found = abs(r_axis[window][peak[0]] - target["range"]) < 30 and peak[1] == j
+    print(f"{name:>12}: SINR {sinr[name]:6.1f} dB, target is the local peak: {found}, {dt:.2f} s")
+    if name != "beam" and not found:
+        raise Exception("STAP did not reveal the target")
+    plot_rdm(rdot_axis, r_axis, total_dc, f"{name} RDM", cbarMin=0)
+
+if min(sinr["post_doppler"], sinr["full"]) - sinr["beam"] < 20:
+    raise Exception("STAP did not improve the SINR over the conventional beam")
+
+plt.show(block=BLOCK)
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+
+import sys
+import time
+import numpy as np
+import matplotlib.pyplot as plt
+from rsp import rdm
+from rsp import constants as c
+from rsp.technique import false_target_train, program_cpi, technique_tables
+from rsp.pulse_doppler_radar import number_pulses
+from rsp.rdm_helpers import plot_rdm
+
+# Can make plotting non-blocking with an input flag
+if sys.argv[-1].lower() == "--no-block":
+    BLOCK = False
+else:
+    BLOCK = True
+
+print("##########################")
+print("DRFM technique programs")
+print("##########################")
+
+bw = 10e6
+radar = {
+    "fcar": 10e9,
+    "txPower": 1e3,
+    "txGain": 10 ** (30 / 10),
+    "rxGain": 10 ** (30 / 10),
+    "opTemp": 290,
+    "sampRate": 2 * bw,
+    "noiseFig": 10 ** (8 / 10),
+    "totalLosses": 10 ** (8 / 10),
+    "PRF": 20e3,
+    "dwell_time": 5e-3,
+}
+target = {"range": 2.0e3, "rangeRate": 0.2e3, "rcs": 10}
+waveform = {"type": "lfm", "bw": bw, "T": 2e-6, "chirpUpDown": 1}
+
+## a coherent false target is the skin return of a target at its range ##
+technique = {"type": "technique", "false_targets": [{"range_offset": 300}]}
+_, _, _, false_dc = rdm.gen(target, radar, waveform, [technique], plot=False)
+moved = dict(target, range=target["range"] + 300)
+_, _, _, skin_dc = rdm.gen(moved, radar, waveform, [{"type": "skin"}], plot=False)
+err = abs(false_dc / abs(false_dc).max() - skin_dc / abs(skin_dc).max()).max()
+print(f"false target vs moved skin return relative error: {err:.2e}")
+if err > 1e-6:
+    raise Exception("false target does not match the skin return at its range")
+
+## range gate pull-off walks a train of false targets across CPIs ########
+rgpo = {"start": 0.0, "velocity": 20e3, "max": 400}
+technique = {
+    "type": "technique",
+    "false_targets": false_target_train(8, 150, range_offset=100, rgpo=rgpo),
+}
+t_slow = np.arange(number_pulses(radar)) / radar["PRF"]
+for cpi in range(3):
+    return_time, _, _ = technique_tables(program_cpi(technique, cpi, radar), target, radar)
+    offset = (return_time - t_slow) * c.C / 2 - (target["range"] + target["rangeRate"] * t_slow)
+    t_program = cpi * radar["dwell_time"] + t_slow
+    expected = 100 + np.minimum(rgpo["velocity"] * t_program, rgpo["max"])
+    print(f"CPI {cpi}: RGPO range offset {offset[0, 0]:5.1f} to {offset[0, -1]:5.1f} m")
+    if abs(offset[0] - expected).max() > 1e-3:
+        raise Exception("RGPO range offsets are wrong")
+
+# the pull-off holds at max from the fifth CPI
+rdot_axis, r_axis, total_dc, signal_dc = rdm.gen(
+    target, radar, waveform, [{"type": "skin"}, program_cpi(technique, 4, radar)], plot=False
+)
+plot_rdm(rdot_axis, r_axis, total_dc, "RGPO false target train, fifth CPI")
+peak_ranges = r_axis[abs(signal_dc).max(axis=1) > 0.5 * abs(signal_dc).max()]
+print(f"returns at ranges: {np.unique(np.round(peak_ranges, -1))}")
+false_ranges = target["range"] + 100 + rgpo["max"] + 150 * np.arange(8)
+if not all(np.any(abs(peak_ranges - r) < 10) for r in false_ranges):
+    raise Exception("pulled off false targets not found")
+
+## velocity gate pull-off moves the false target in Doppler #############
+vgpo = {"start": 0.0, "rate": 8e3, "max": 80}  # inside the unambiguous +/-150 m/s
+slow = dict(target, rangeRate=50)
+technique = {"type": "technique", "false_targets": [{"range_offset": 600, "vgpo": vgpo}]}
+for cpi in range(3):
+    rdot_axis, r_axis, _, signal_dc = rdm.gen(
+        slow, radar, waveform, [program_cpi(technique, cpi, radar)], plot=False
+    )
+    _, j = np.unravel_index(np.argmax(abs(signal_dc)), signal_dc.shape)
+    print(f"CPI {cpi}: VGPO false target range rate {rdot_axis[j]:.1f} m/s")
+rdot_expected = slow["rangeRate"] + vgpo["max"]
+if abs(rdot_axis[j] - rdot_expected) > abs(rdot_axis[1] - rdot_axis[0]):
+    raise Exception("VGPO false target is not at the pulled off range rate")
+
+## dozens of false targets in one pass ###################################
+train = false_target_train(48, 60, range_offset=200, rdot_offset=-50)
+t0 = time.perf_counter()
+rdm.gen(target, radar, waveform, [{"type": "technique", "false_targets": train}], plot=False)
+t_technique = time.perf_counter() - t0
+memories = [{"type": "memory", **ft} for ft in train]
+t0 = time.perf_counter()
+rdm.gen(target, radar, waveform, memories, plot=False)
+t_memory = time.perf_counter() - t0
+print(f"{len(train)} false targets: technique {t_technique:.2f} s, memory returns {t_memory:.2f} s")
+
+plt.show(block=BLOCK)
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+
+import sys
+import time
+import numpy as np
+import matplotlib.pyplot as plt
+from rsp import rdm
+from rsp.cache import ComponentCache
+from rsp.rdm_helpers import plot_rdm
+
+# Can make plotting non-blocking with an input flag
+if sys.argv[-1].lower() == "--no-block":
+    BLOCK = False
+else:
+    BLOCK = True
+
+print("##########################")
+print("Processed component cache")
+print("##########################")
+
+bw = 10e6
+radar = {
+    "fcar": 10e9,
+    "txPower": 1e3,
+    "txGain": 10 ** (30 / 10),
+    "rxGain": 10 ** (30 / 10),
+    "opTemp": 290,
+    "sampRate": 2 * bw,
+    "noiseFig": 10 ** (8 / 10),
+    "totalLosses": 10 ** (8 / 10),
+    "PRF": 20e3,
+    "dwell_time": 20e-3,
+}
+target = {"range": 3.5e3, "rangeRate": 0.1e3, "rcs": 10}
+waveform = {"type": "lfm", "bw": bw, "T": 4e-6, "chirpUpDown": 1}
+return_list = [
+    {"type": "skin"},
+    {"type": "memory", "rdot_delta": 0.3e3, "rdot_offset": -0.2e3},
+    {"type": "memory", "range_offset": 600, "rdot_offset": 0.1e3},
+]
+
+components = ComponentCache()
+_, _, full_total, full_signal = rdm.gen(target, radar, waveform, return_list, plot=False)
+t0 = time.perf_counter()
+_, _, total_dc, signal_dc = rdm.gen(
+    target, radar, waveform, return_list, plot=False, components=components
+)
+t_first = time.perf_counter() - t0
+
+# processing is linear, the sum of the processed components is the processed sum
+err = abs(total_dc - full_total).max() / abs(full_total).max()
+print(f"components vs full pipeline relative error: {err:.2e}")
+if err > 1e-5 or abs(signal_dc - full_signal).max() / abs(full_signal).max() > 1e-5:
+    raise Exception("sum of processed components does not match the full pipeline")
+
+# a technique sweep only reprocesses the return that changes
+times = []
+for rdot_offset in [-0.1e3, 0.0, 0.2e3]:
+    return_list[1]["rdot_offset"] = rdot_offset
+    hits, misses = components.hits, components.misses
+    t0 = time.perf_counter()
+    rdot_axis, r_axis, total_dc, signal_dc = rdm.gen(
+        target, radar, waveform, return_list, plot=False, components=components
+    )
+    times.append(time.perf_counter() - t0)
+    if components.misses - misses != 1 or components.hits - hits != 3:
+        raise Exception("unchanged components were reprocessed")
+print(f"first run {t_first:.3f} s, sweep runs {np.mean(times):.3f} s, {len(components)} components")
+
+_, _, full_total, _ = rdm.gen(target, radar, waveform, return_list, plot=False)
+if abs(total_dc - full_total).max() / abs(full_total).max() > 1e-5:
+    raise Exception("swept RDM does not match the full pipeline")
+
+plot_rdm(rdot_axis, r_axis, total_dc, "RDM from cached components", cbarMin=0)
+plt.show(block=BLOCK)
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+
+import sys
+import time
+import numpy as np
+import matplotlib.pyplot as plt
+from rsp.detection import pd_vs_snr, pd_vs_range, swerling_amplitudes
+from rsp.specs import Radar, Waveform
+
+# Can make plotting non-blocking with an input flag
+if sys.argv[-1].lower() == "--no-block":
+    BLOCK = False
+else:
+    BLOCK = True
+
+print("##########################")
+print("Detection performance Monte Carlo")
+print("##########################")
+
+## Swerling fluctuations have unit mean power ###########################
+rng = np.random.default_rng(0)
+for model in range(5):
+    g = swerling_amplitudes(model, 20000, 8, rng)
+    if abs(np.mean(abs(g) ** 2) - 1) > 0.03:
+        raise Exception(f"Swerling {model} fluctuation does not have unit mean power")
+    # pulse to pulse models (II, IV) decorrelate, scan to scan models (0, I, III) do not
+    correlation = abs(np.mean(g[:, 0] * np.conj(g[:, 1])))
+    if (correlation < 0.05) != (model in [2, 4]):
+        raise Exception(f"Swerling {model} pulse to pulse correlation is {correlation:.2f}")
+
+bw = 1e6
+radar = {
+    "fcar": 10e9,
+    "txPower": 1e3,
+    "txGain": 10 ** (30 / 10),
+    "rxGain": 10 ** (30 / 10),
+    "opTemp": 290,
+    "sampRate": 2 * bw,
+    "noiseFig": 10 ** (8 / 10),
+    "totalLosses": 10 ** (8 / 10),
+    "PRF": 10e3,
+    "dwell_time": 3.2e-3,
+}
+waveform = {"type": "uncoded", "bw": bw}
+cfar = {"guard": 1, "train": 8, "pfa": 1e-3}
+snr = 10 ** (np.arange(-12, 1, 2) / 10)  # single-pulse SNR
+
+## the fast mode matches the full datacube synthesis ####################
+fig, ax = plt.subplots()
+results = {}
+for swerling in [0, 1, 2]:
+    for fast in [False, True]:
+        t0 = time.perf_counter()
+        result = pd_vs_snr(
+            snr, radar, waveform, trials=300, swerling=swerling, cfar=cfar, fast=fast
+        )
+        dt = time.perf_counter() - t0
+        results[swerling, fast] = result
+        mode = "fast" if fast else "full"
+        print(f"Swerling {swerling} {mode}: {dt:.2f} s, Pd {np.round(result['pd'], 2)}")
+        print(f"\tPfa {result['pfa']:.2e} in {result['pfa_interval']} (design {cfar['pfa']})")
+        rdm_snr_db = 10 * np.log10(result["rdm_snr"])
+        ax.plot(
+            rdm_snr_db, result["pd"], "--" if fast else "-", label=f"Swerling {swerling} {mode}"
+        )
+
+    full, fast = results[swerling, False], results[swerling, True]
+    if abs(full["pd"] - fast["pd"]).max() > 0.12:
+        raise Exception("fast mode Pd does not match the full Monte Carlo")
+    lo = max(full["pfa_interval"][0], fast["pfa_interval"][0])
+    hi = min(full["pfa_interval"][1], fast["pfa_interval"][1])
+    if lo > hi:
+        raise Exception("fast mode Pfa does not match the full Monte Carlo")
+
+# fluctuation loss, a Swerling I target is harder to detect at high Pd
+if results[1, False]["pd"][-1] >= results[0, False]["pd"][-1]:
+    raise Exception("Swerling I target should have a fluctuation loss")
+# Swerling II returns decorrelate pulse to pulse, the Doppler FFT does not integrate them
+swerling_4 = pd_vs_snr(snr, radar, waveform, trials=300, swerling=4, cfar=cfar, fast=True)
+print(f"Swerling 4 fast: Pd {np.round(swerling_4['pd'], 2)}")
+for pd in [results[2, False]["pd"][-1], swerling_4["pd"][-1]]:
+    if pd > 0.5 * results[1, False]["pd"][-1]:
+        raise Exception("pulse to pulse decorrelated targets should not integrate coherently")
+
+ax.set_xlabel("RDM peak SNR [dB]")
+ax.set_ylabel("Pd")
+ax.set_title(f"CA-CFAR Pd, design Pfa {cfar['pfa']}")
+ax.legend()
+
+## Pd falls with range ##################################################
+target = {"rcs": 1, "rangeRate": 100}
+ranges = np.linspace(2e3, 26e3, 7)
+# frozen specs work as the dicts do, they are not changed
+radar_spec, waveform_spec = Radar.from_dict(radar), Waveform.from_dict(waveform)
+result = pd_vs_range(
+    target, radar_spec, waveform_spec, ranges, trials=2000, swerling=1, cfar=cfar, fast=True
+)
+if "Npulses" in radar or "pulse" in waveform:
+    raise Exception("Monte Carlo changed its input dicts")
+print(f"Pd vs range {np.round(result['pd'], 2)}")
+if not result["pd"][0] > 0.9 > 0.1 > result["pd"][-1]:
+    raise Exception("Pd should fall from near one to near zero over the ranges")
+
+fig, ax = plt.subplots()
+ax.plot(ranges * 1e-3, result["pd"])
+ax.fill_between(ranges * 1e-3, *result["pd_interval"].T, alpha=0.3)
+ax.set_xlabel("range [km]")
+ax.set_ylabel("Pd")
+ax.set_title("Swerling I Pd vs range")
+
+plt.show(block=BLOCK)
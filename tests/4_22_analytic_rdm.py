@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+
+import sys
+import time
+import numpy as np
+import matplotlib.pyplot as plt
+from rsp import rdm
+from rsp.cache import ComponentCache
+from rsp.scene import Scene
+from rsp.rdm_helpers import plot_rdm
+
+# Can make plotting non-blocking with an input flag
+if sys.argv[-1].lower() == "--no-block":
+    BLOCK = False
+else:
+    BLOCK = True
+
+print("##########################")
+print("Analytic RDM synthesis")
+print("##########################")
+
+bw = 10e6
+radar = {
+    "fcar": 10e9,
+    "txPower": 1e3,
+    "txGain": 10 ** (30 / 10),
+    "rxGain": 10 ** (30 / 10),
+    "opTemp": 290,
+    "sampRate": 2 * bw,
+    "noiseFig": 10 ** (8 / 10),
+    "totalLosses": 10 ** (8 / 10),
+    "PRF": 20e3,
+    "dwell_time": 5e-3,
+}
+waveforms = [
+    {"type": "lfm", "bw": bw, "T": 2e-6, "chirpUpDown": 1},
+    {"type": "barker", "nchips": 13, "bw": bw},
+]
+targets = [
+    {"range": 2.0e3, "rangeRate": 0.2e3, "rcs": 10},
+    {"range": 9.3e3, "rangeRate": -0.4e3, "rcs": 10},  # range ambiguous
+]
+
+
+def compare(target, waveform, analytic, **kwargs):
+    """Relative error of the analytic signal and total RDMs against the full pipeline"""
+    full = rdm.gen(target, radar, waveform, [{"type": "skin"}], plot=False, **kwargs)
+    fast = rdm.gen(
+        target, radar, waveform, [{"type": "skin"}], plot=False, analytic=analytic, **kwargs
+    )
+    peak = abs(full[3]).max()
+    return abs(fast[3] - full[3]).max() / peak, abs(fast[2] - full[2]).max() / peak
+
+
+## the whole Doppler axis reproduces the full pipeline ##################
+for waveform in waveforms:
+    for target in targets:
+        for kwargs in [{}, {"doppler_window": "hann", "range_window": "taylor"}]:
+            err, total_err = compare(target, waveform, {"doppler_bins": 100}, **kwargs)
+            print(f"{waveform['type']:>6} at {target['range']:.0f} m {kwargs}: {err:.1e}")
+            if err > 1e-6 or total_err > 1e-6:
+                raise Exception("analytic RDM does not match the full pipeline")
+
+## near range and range unambiguous edge targets, pulses cross into the next pulse #####
+# - the first return is before the CPI's first sample and starts at it, the others run from
+#   the end of one pulse's range bins into the next (the unambiguous range is 7.5 km)
+for waveform in waveforms:
+    for edge_range in [50.0, 100.0, 7490.0, 7495.0]:
+        target = {"range": edge_range, "rangeRate": 0.2e3, "rcs": 10}
+        err, total_err = compare(target, waveform, {"doppler_bins": 100})
+        print(f"{waveform['type']:>6} at {edge_range:.0f} m: {err:.1e}")
+        if err > 1e-6 or total_err > 1e-6:
+            raise Exception("analytic RDM of a pulse crossing range bins does not match")
+
+## a local patch drops only the far Doppler sidelobes ###################
+for doppler_window, tol in [("chebyshev", 2e-3), ("hann", 2e-4)]:
+    err, _ = compare(targets[1], waveforms[0], True, doppler_window=doppler_window)
+    print(f"32 bin patch, {doppler_window} window: {err:.1e}")
+    if err > tol:
+        raise Exception("analytic RDM patch error above the window sidelobes")
+
+zoom = {"rdot_min": -450, "rdot_max": -350, "bins": 64}
+err, _ = compare(targets[1], waveforms[0], {"doppler_bins": 64}, doppler_zoom=zoom)
+print(f"Doppler zoom: {err:.1e}")
+if err > 1e-6:
+    raise Exception("analytic zoomed RDM does not match the full pipeline")
+
+## range migration, the target crosses a range bin during the CPI #######
+radar["dwell_time"] = 20e-3
+err, _ = compare(targets[1], waveforms[0], {"doppler_bins": 400})
+print(f"range migrating target: {err:.1e}")
+if err > 1e-6:
+    raise Exception("analytic RDM of a range migrating target does not match the full pipeline")
+
+## scenes and timing, the processed noise from the components cache #####
+scene = Scene([dict(t) for t in targets] + [{"range": 5.0e3, "rangeRate": -0.1e3, "rcs": 1}])
+t0 = time.perf_counter()
+_, _, full_total, full_signal = rdm.gen(scene, radar, waveforms[0], [{"type": "skin"}], plot=False)
+t_full = time.perf_counter() - t0
+
+components = ComponentCache()
+args = (scene, radar, waveforms[0], [{"type": "skin"}])
+rdm.gen(*args, plot=False, analytic=True, components=components)
+t0 = time.perf_counter()
+rdot_axis, r_axis, total_dc, signal_dc = rdm.gen(
+    *args, plot=False, analytic=True, components=components
+)
+t_analytic = time.perf_counter() - t0
+err = abs(signal_dc - full_signal).max() / abs(full_signal).max()
+print(f"scene: full {t_full:.3f} s, analytic {t_analytic:.3f} s, error {err:.1e}")
+if err > 2e-3 or abs(total_dc - full_total).max() / abs(full_total).max() > 2e-3:
+    raise Exception("analytic scene RDM does not match the full pipeline")
+if t_analytic > t_full:
+    raise Exception("analytic RDM is slower than the full pipeline")
+
+plot_rdm(rdot_axis, r_axis, total_dc, "Analytic scene RDM", cbarMin=0)
+plt.show(block=BLOCK)
@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+
+import sys
+import numpy as np
+import matplotlib.pyplot as plt
+from rsp import rdm
+from rsp.memory import track_peak
+from rsp.scene import Scene
+from rsp.specs import prepare
+from rsp.rf_datacube import number_range_bins, range_axis, range_gate_rows
+from rsp.rdm_helpers import plot_rdm
+
+# Can make plotting non-blocking with an input flag
+if sys.argv[-1].lower() == "--no-block":
+    BLOCK = False
+else:
+    BLOCK = True
+
+print("##########################")
+print("Memory budget")
+print("##########################")
+
+bw = 10e6
+radar = {
+    "fcar": 10e9,
+    "txPower": 1e3,
+    "txGain": 10 ** (30 / 10),
+    "rxGain": 10 ** (30 / 10),
+    "opTemp": 290,
+    "sampRate": 2 * bw,
+    "noiseFig": 10 ** (8 / 10),
+    "totalLosses": 10 ** (8 / 10),
+    "PRF": 20e3,
+    "dwell_time": 20e-3,
+}
+waveform = {"type": "lfm", "bw": bw, "T": 2e-6, "chirpUpDown": 1}
+target = {"range": 2.0e3, "rangeRate": 0.2e3, "rcs": 10}
+return_list = [{"type": "skin"}, {"type": "memory", "range_offset": 300}]
+short_radar = dict(radar, dwell_time=2e-3)  # 40 pulses, fixed per range bin memory matters
+
+
+def cube_bytes(radar, range_gates=None, **kwargs):
+    """Size [bytes] of the (Nr, Np) complex64 datacube a run processes"""
+    radar, waveform_dict = prepare(radar, waveform)
+    Nr = number_range_bins(radar["sampRate"], radar["PRF"])
+    if range_gates is not None:
+        r_axis = range_axis(radar["sampRate"], Nr)
+        Nr = range_gate_rows(r_axis, range_gates, waveform_dict["pulse"].size)[0].size
+    return Nr * radar["Npulses"] * np.dtype(np.complex64).itemsize
+
+
+def peak_and_error(radar=radar, **kwargs):
+    """Peak memory [datacubes] of a memory budget run and its relative error against the
+    default processing"""
+    args = (target, radar, waveform, return_list)
+    rdm.gen(*args, plot=False, **kwargs)  # warm up the window and FFT plan caches
+    full = rdm.gen(*args, plot=False, **{k: v for k, v in kwargs.items() if k != "memory_budget"})
+    reported = {}
+    with track_peak() as peak:
+        budget = rdm.gen(*args, plot=False, memory_peak=reported, **kwargs)
+    # the reported peak is of the processing, inside the whole call's peak
+    if not 0 < reported["bytes"] <= peak["bytes"]:
+        raise Exception("memory budget run did not report its peak memory")
+    if not np.array_equal(budget[0], full[0]) or not np.array_equal(budget[1], full[1]):
+        raise Exception("memory budget axes do not match the default processing")
+    err = max(abs(b - f).max() / abs(f).max() for b, f in zip(budget[2:], full[2:]))
+    return peak["bytes"] / cube_bytes(radar, **kwargs), err, budget
+
+
+## the default processing holds many datacubes ##########################
+rdm.gen(target, radar, waveform, return_list, plot=False)
+with track_peak() as peak:
+    rdm.gen(target, radar, waveform, return_list, plot=False)
+default_peak = peak["bytes"] / cube_bytes(radar)
+print(f"default processing: {default_peak:.2f} datacubes")
+
+## budgets are kept and the RDMs match ##################################
+for memory_budget in [2.5, 3, 4, 8]:
+    used, err, _ = peak_and_error(memory_budget=memory_budget)
+    print(f"budget {memory_budget}: {used:.2f} datacubes, error {err:.1e}")
+    if used > memory_budget or err > 1e-5:
+        raise Exception("memory budget run is over budget or does not match")
+if used > default_peak / 2:
+    raise Exception("memory budget does not save memory")
+
+options = [
+    {"range_gates": [(1.5e3, 2.5e3), (4e3, 4.5e3)]},
+    {"range_bin_spacing": 15},
+    {"clutter_filter": "three_pulse", "doppler_window": "hann", "range_window": "taylor"},
+]
+for radar_x in [radar, short_radar]:
+    for kwargs in options:
+        used, err, _ = peak_and_error(radar_x, memory_budget=3, **kwargs)
+        print(
+            f"{radar_x['dwell_time']} s, budget 3 {kwargs}: {used:.2f} datacubes, error {err:.1e}"
+        )
+        if used > 3 or err > 1e-5:
+            raise Exception("memory budget run is over budget or does not match")
+
+## scenes ###############################################################
+scene = Scene([target, {"range": 5.0e3, "rangeRate": -0.1e3, "rcs": 1}])
+args = (scene, radar, waveform, [{"type": "skin"}])
+full = rdm.gen(*args, plot=False)
+with track_peak() as peak:
+    rdot_axis, r_axis, total_dc, signal_dc = rdm.gen(*args, plot=False, memory_budget=3)
+if peak["bytes"] / cube_bytes(radar) > 3:
+    raise Exception("memory budget scene run is over budget")
+if abs(total_dc - full[2]).max() / abs(full[2]).max() > 1e-5:
+    raise Exception("memory budget scene RDM does not match the default processing")
+
+# budgets that cannot be met fail, e.g. a 20 pulse CPI's fixed per range bin memory
+unsupported = [
+    ({"memory_budget": 2}, radar, return_list),
+    ({"memory_budget": 3, "debug": True}, radar, return_list),
+    ({"memory_budget": 3}, radar, [{"type": "clutter"}]),
+    ({"memory_budget": 2.5}, dict(radar, dwell_time=1e-3), return_list),
+]
+for kwargs, radar_x, returns in unsupported:
+    try:
+        rdm.gen(target, radar_x, waveform, returns, plot=False, **kwargs)
+    except AssertionError:
+        pass
+    else:
+        raise Exception(f"unsupported memory budget run {kwargs} did not fail")
+
+plot_rdm(rdot_axis, r_axis, total_dc, "Scene RDM within a 3 datacube budget", cbarMin=0)
+plt.show(block=BLOCK)
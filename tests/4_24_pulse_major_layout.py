@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+
+import sys
+import time
+import numpy as np
+import matplotlib.pyplot as plt
+from rsp import rdm
+from rsp.specs import prepare
+from rsp.rf_datacube import dataCube, matchfilter, range_axis
+from rsp.rdm_helpers import add_returns, plot_rtm
+
+# Can make plotting non-blocking with an input flag
+if sys.argv[-1].lower() == "--no-block":
+    BLOCK = False
+else:
+    BLOCK = True
+
+print("##########################")
+print("Pulse-major datacube layout")
+print("##########################")
+
+bw = 10e6
+radar = {
+    "fcar": 10e9,
+    "txPower": 1e3,
+    "txGain": 10 ** (30 / 10),
+    "rxGain": 10 ** (30 / 10),
+    "opTemp": 290,
+    "sampRate": 2 * bw,
+    "noiseFig": 10 ** (8 / 10),
+    "totalLosses": 10 ** (8 / 10),
+    "PRF": 20e3,
+    "dwell_time": 20e-3,
+}
+waveform = {"type": "lfm", "bw": bw, "T": 2e-6, "chirpUpDown": 1}
+target = {"range": 2.0e3, "rangeRate": 0.2e3, "rcs": 10}
+return_list = [
+    {"type": "skin"},
+    {"type": "memory", "range_offset": 300},
+    {"type": "technique", "false_targets": [{"range_offset": 600}]},
+]
+
+## datacubes have the same axes, each pulse is contiguous ################
+radar_dict, waveform_dict = prepare(radar, waveform)
+cube_args = (radar["sampRate"], radar["PRF"], radar_dict["Npulses"])
+cubes = {}
+for layout in ["range", "pulse"]:
+    dc = dataCube(*cube_args, layout=layout)
+    t0 = time.perf_counter()
+    add_returns(dc, waveform_dict, target, return_list, radar_dict, 1.0)
+    t_inject = time.perf_counter() - t0
+    rtm = dc.copy(order="A")
+    t0 = time.perf_counter()
+    matchfilter(dc, waveform_dict["pulse"], pedantic=False)
+    t_mf = time.perf_counter() - t0
+    print(f"{layout} layout: injection {t_inject*1e3:.2f} ms, match filter {t_mf*1e3:.2f} ms")
+    cubes[layout] = (rtm, dc)
+
+if not cubes["pulse"][0].flags.f_contiguous or cubes["pulse"][0].shape != cubes["range"][0].shape:
+    raise Exception("pulse layout datacube is not pulse-major with the same axes")
+for range_cube, pulse_cube in zip(cubes["range"], cubes["pulse"]):
+    if not np.array_equal(range_cube, pulse_cube):
+        raise Exception("pulse layout injection or match filter does not match")
+
+## RDMs do not depend on the layout #####################################
+array_radar = dict(radar, array={"elements": 4, "spacing": 0.5})
+options = [
+    ({}, radar),
+    ({"range_gates": [(1.5e3, 2.5e3)], "range_window": "taylor"}, radar),
+    ({"range_bin_spacing": 15, "clutter_filter": "three_pulse"}, radar),
+    ({"doppler_zoom": {"rdot_min": 100, "rdot_max": 300, "bins": 64}}, radar),
+    ({"beams": [0.0, 0.1]}, array_radar),
+    ({"stap": "post_doppler"}, array_radar),
+]
+for kwargs, radar_x in options:
+    args = (target, radar_x, waveform, return_list)
+    range_outputs = rdm.gen(*args, plot=False, **kwargs)
+    pulse_outputs = rdm.gen(*args, plot=False, layout="pulse", **kwargs)
+    same = all(np.array_equal(a, b) for a, b in zip(range_outputs, pulse_outputs))
+    print(f"{kwargs}: {'same' if same else 'different'} RDMs")
+    if not same:
+        raise Exception("pulse layout RDMs do not match the range layout")
+
+# memory budget runs match to float32 precision
+args = (target, radar, waveform, return_list)
+range_outputs = rdm.gen(*args, plot=False, memory_budget=3)
+pulse_outputs = rdm.gen(*args, plot=False, memory_budget=3, layout="pulse")
+err = abs(pulse_outputs[2] - range_outputs[2]).max() / abs(range_outputs[2]).max()
+if err > 1e-6:
+    raise Exception("pulse layout memory budget RDM does not match the range layout")
+
+try:
+    dataCube(*cube_args, layout="channel")
+except AssertionError:
+    pass
+else:
+    raise Exception("unknown datacube layout did not fail")
+
+r_axis = range_axis(radar["sampRate"], cubes["pulse"][0].shape[0])
+plot_rtm(r_axis, cubes["pulse"][0], "Pulse-major RTM: unprocessed")
+plt.show(block=BLOCK)
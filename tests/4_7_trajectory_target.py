@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+
+import sys
+import numpy as np
+import matplotlib.pyplot as plt
+from rsp import rdm
+from rsp.trajectory import range_and_rangerate
+
+# Can make plotting non-blocking with an input flag
+if sys.argv[-1].lower() == "--no-block":
+    BLOCK = False
+else:
+    BLOCK = True
+
+print("##########################")
+print("Trajectory driven targets")
+print("##########################")
+
+bw = 10e6
+
+radar = {
+    "fcar": 10e9,
+    "txPower": 1e3,
+    "txGain": 10 ** (30 / 10),
+    "rxGain": 10 ** (30 / 10),
+    "opTemp": 290,
+    "sampRate": 2 * bw,
+    "noiseFig": 10 ** (8 / 10),
+    "totalLosses": 10 ** (8 / 10),
+    "PRF": 200e3,
+    "dwell_time": 2e-3,
+}
+
+waveform = {"type": "barker", "nchips": 13, "bw": bw}
+
+return_list = [{"type": "skin"}]
+
+## vectorized geometry matches the single vector calculation ######
+plat_pos = np.array([[0, 0, 3048], [10, 20, 3000]])
+plat_vel = np.array([[300, 0, 0], [250, 10, 0]])
+tgt_pos = np.array([[5e3, 0, 3048], [4e3, 1e3, 2000]])
+tgt_vel = np.array([[-300, 0, 0], [-200, 50, 5]])
+_, R_ar, Rdot_ar = range_and_rangerate(plat_pos, plat_vel, tgt_pos, tgt_vel)
+for i in range(2):
+    _, R, Rdot = range_and_rangerate(plat_pos[i], plat_vel[i], tgt_pos[i], tgt_vel[i])
+    if not np.isclose(R, R_ar[i]) or not np.isclose(Rdot, Rdot_ar[i]):
+        raise Exception("vectorized range_and_rangerate is incorrect")
+
+## constant velocity trajectory matches constant rangeRate target #
+target = {"range": 3.5e3, "rangeRate": 0.5e3, "rcs": 10}
+time = np.linspace(0, radar["dwell_time"], 11)
+traj = {
+    "time": time,
+    "tgt_pos": np.outer(target["range"] + target["rangeRate"] * time, [1, 0, 0]),
+    "tgt_vel": np.outer(np.full(time.size, target["rangeRate"]), [1, 0, 0]),
+}
+traj_target = {"trajectory": traj, "rcs": 10}
+
+_, _, _, signal_const = rdm.gen(target, radar, waveform, return_list, plot=False)
+_, _, _, signal_traj = rdm.gen(traj_target, radar, waveform, return_list, plot=False)
+
+if not np.allclose(signal_const, signal_traj, atol=1e-6 * abs(signal_const).max()):
+    raise Exception("trajectory target does not match constant rangeRate target")
+print("constant velocity trajectory matches constant rangeRate target")
+
+
+## maneuvering target seen from a moving platform ##################
+def maneuver(t):
+    """Platform flying along x while the target turns toward the platform"""
+    omega = 2 * np.pi / 10e-3  # rad/s turn rate
+    plat_pos = np.column_stack([200 * t, np.zeros(t.size), np.full(t.size, 1e3)])
+    plat_vel = np.column_stack([np.full(t.size, 200), np.zeros(t.size), np.zeros(t.size)])
+    tgt_pos = np.column_stack(
+        [3e3 + 50 * np.sin(omega * t), 50 * np.cos(omega * t), np.zeros(t.size)]
+    )
+    tgt_vel = np.column_stack(
+        [50 * omega * np.cos(omega * t), -50 * omega * np.sin(omega * t), np.zeros(t.size)]
+    )
+    return plat_pos, plat_vel, tgt_pos, tgt_vel
+
+
+rdm.gen({"trajectory": maneuver, "rcs": 10}, radar, waveform, return_list)
+plt.gca().set_title("maneuvering target from a moving platform")
+
+plt.show(block=BLOCK)
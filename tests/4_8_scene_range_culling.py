@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+
+import sys
+import time
+import numpy as np
+import matplotlib.pyplot as plt
+from rsp import rdm
+from rsp.scene import Scene
+from rsp.pulse_doppler_radar import range_unambiguous
+
+# Can make plotting non-blocking with an input flag
+if sys.argv[-1].lower() == "--no-block":
+    BLOCK = False
+else:
+    BLOCK = True
+
+print("##########################")
+print("Scene range culling")
+print("##########################")
+
+bw = 10e6
+
+radar = {
+    "fcar": 10e9,
+    "txPower": 1e3,
+    "txGain": 10 ** (30 / 10),
+    "rxGain": 10 ** (30 / 10),
+    "opTemp": 290,
+    "sampRate": 2 * bw,
+    "noiseFig": 10 ** (8 / 10),
+    "totalLosses": 10 ** (8 / 10),
+    "PRF": 200e3,
+    "dwell_time": 0.1e-3,
+}
+
+waveform = {"type": "barker", "nchips": 13, "bw": bw}
+
+Ru = range_unambiguous(radar["PRF"])
+Npulses = int(np.ceil(radar["dwell_time"] * radar["PRF"]))
+
+## large catalog, most targets are beyond the last pulse of the CPI #
+rng = np.random.default_rng(0)
+Ntargets = 100_000
+ranges = rng.uniform(0, 20 * Npulses * Ru, Ntargets)
+rangeRates = rng.uniform(-3e3, 3e3, Ntargets)
+catalog = [{"range": r, "rangeRate": rd, "rcs": 10} for r, rd in zip(ranges, rangeRates)]
+
+t0 = time.perf_counter()
+scene = Scene(catalog)
+print(f"build index for {Ntargets} targets: {time.perf_counter() - t0:.3f} s")
+
+
+def first_principles(range_interval):
+    """Targets with an echo landing in the CPI (and in the range interval), from the range of
+    every target at every pulse, and targets within their CPI range drift of being visible"""
+    T = Npulses / radar["PRF"]
+    m = np.arange(Npulses)
+    R = ranges[:, np.newaxis] + rangeRates[:, np.newaxis] * m / radar["PRF"]
+    # the echo of pulse m arrives at m / PRF + 2 R / c, before the CPI ends at Npulses / PRF
+    lands = (R > 0) & (m + R / Ru < Npulses)
+    slack = abs(rangeRates) * T
+    if range_interval is None:
+        return lands.any(axis=1), abs(ranges - Npulses * Ru) <= slack
+
+    # apparent range of each echo in the unambiguous range window
+    apparent = R % Ru
+    lo, hi = range_interval
+    visible = (lands & (apparent >= lo) & (apparent <= hi)).any(axis=1)
+    # distance to the interval, which repeats every Ru
+    distance = np.min(
+        [np.maximum(lo + k * Ru - apparent, apparent - hi - k * Ru) for k in [-1, 0, 1]], axis=0
+    )
+    near = np.where(lands, distance, np.inf).min(axis=1) <= slack
+    return visible, near
+
+
+for range_interval in [None, (100, 150), (Ru - 20, Ru)]:
+    t0 = time.perf_counter()
+    indices = scene.visible(radar, range_interval)
+    dt = time.perf_counter() - t0
+    print(f"{range_interval=}: {indices.size} visible targets in {dt*1e3:.2f} ms")
+    visible, near = first_principles(range_interval)
+    if not np.isin(np.flatnonzero(visible), indices).all():
+        raise Exception("scene index culled a target with echoes in the CPI")
+    # the index checks the range span over the CPI, it can keep targets crossing between pulses
+    if not near[np.setdiff1d(indices, np.flatnonzero(visible))].all():
+        raise Exception("scene index keeps targets without echoes in the CPI")
+
+## RDM of a small scene, the far target is culled #################
+scene = Scene(
+    [
+        {"range": 3.5e3, "rangeRate": 0.5e3, "rcs": 10},
+        {"range": 2.0e3 + Ru, "rangeRate": -1.0e3, "rcs": 10},  # second time around
+        {"range": 5.0e3, "rangeRate": 0.0, "rcs": 10, "return_list": [{"type": "memory"}]},
+        {"range": 2 * Npulses * Ru, "rangeRate": 0.0, "rcs": 10},  # returns after the CPI
+    ]
+)
+print(f"visible targets: {scene.visible(radar)}")
+radar["dwell_time"] = 2e-3
+rdm.gen(scene, radar, waveform, [{"type": "skin"}])
+plt.gca().set_title("scene of targets")
+
+plt.show(block=BLOCK)
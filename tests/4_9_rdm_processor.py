@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+
+import sys
+import time
+import tracemalloc
+import numpy as np
+import matplotlib.pyplot as plt
+from rsp.processor import RDMProcessor
+from rsp.rf_datacube import dataCube, matchfilter, doppler_process
+from rsp.rdm_helpers import add_returns, create_window, plot_rdm
+from rsp.scene import Scene
+
+# Can make plotting non-blocking with an input flag
+if sys.argv[-1].lower() == "--no-block":
+    BLOCK = False
+else:
+    BLOCK = True
+
+print("##########################")
+print("Reusable RDM processor")
+print("##########################")
+
+bw = 10e6
+
+radar = {
+    "fcar": 10e9,
+    "txPower": 1e3,
+    "txGain": 10 ** (30 / 10),
+    "rxGain": 10 ** (30 / 10),
+    "opTemp": 290,
+    "sampRate": 2 * bw,
+    "noiseFig": 10 ** (8 / 10),
+    "totalLosses": 10 ** (8 / 10),
+    "PRF": 200e3,
+    "dwell_time": 2e-3,
+}
+
+waveform = {"type": "lfm", "bw": bw, "T": 1.0e-6, "chirpUpDown": 1}
+
+target = {"range": 3.5e3, "rangeRate": 0.5e3, "rcs": 10}
+
+proc = RDMProcessor(radar, waveform)
+
+## processor matches the step by step processing in rdm.gen #######
+dc = dataCube(radar["sampRate"], radar["PRF"], proc.Np, noise=True)
+add_returns(dc, proc.waveform, target, [{"type": "skin"}], proc.radar, 1.0)
+
+expected = dc.copy()
+matchfilter(expected, proc.waveform["pulse"], pedantic=True)
+expected = expected * create_window(expected.shape, plot=False)
+doppler_process(expected, radar["sampRate"])
+
+processed = proc.process(dc)
+if not np.allclose(processed, expected, atol=1e-5 * abs(expected).max()):
+    raise Exception("RDMProcessor does not match rdm.gen processing")
+print("processor matches rdm.gen processing")
+
+## steady state processing does not allocate cube sized buffers ###
+tracemalloc.start()
+t0 = time.perf_counter()
+for _ in range(20):
+    proc.process(dc)
+dt = (time.perf_counter() - t0) / 20
+peak = tracemalloc.get_traced_memory()[1]
+tracemalloc.stop()
+print(f"process: {dt*1e3:.2f} ms/CPI, peak allocation {peak / dc.nbytes:.3f} cubes")
+if peak > 0.5 * dc.nbytes:  # small fixed ufunc buffers are allowed
+    raise Exception("RDMProcessor.process allocated a cube sized buffer")
+
+## simulate a scene every CPI ######################################
+scene = Scene([target, {"range": 5.0e3, "rangeRate": -1.0e3, "rcs": 1}])
+for _ in range(3):
+    rdm = proc.simulate(scene)
+plot_rdm(proc.rdot_axis, proc.r_axis, rdm, "RDMProcessor.simulate scene", cbarMin=0)
+
+plt.show(block=BLOCK)
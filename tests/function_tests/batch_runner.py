@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+
+import os
+import json
+import tempfile
+import numpy as np
+from rsp import rdm
+from rsp.batch import main, load_scenario, scenario_jobs, run_scenario, JobLog
+from rsp.datacube_io import load_rdm
+from rsp.reports import ReportFile
+
+bw = 10e6
+scenario = {
+    "radar": {
+        "fcar": 10e9,
+        "txPower": 1e3,
+        "txGain": 10 ** (30 / 10),
+        "rxGain": 10 ** (30 / 10),
+        "opTemp": 290,
+        "sampRate": 2 * bw,
+        "noiseFig": 10 ** (8 / 10),
+        "totalLosses": 10 ** (8 / 10),
+        "PRF": 20e3,
+        "dwell_time": 2e-3,
+    },
+    "waveform": {"type": "lfm", "bw": bw, "T": 2e-6, "chirpUpDown": 1},
+    "targets": [
+        {"range": 2.0e3, "rangeRate": 0.2e3, "rcs": 10},
+        {"range": 4.0e3, "rangeRate": -0.1e3, "rcs": 10},
+    ],
+    "seeds": {"start": 5, "count": 3},
+}
+
+with tempfile.TemporaryDirectory() as directory:
+    path = os.path.join(directory, "scenario.json")
+    with open(path, "w") as f:
+        json.dump(scenario, f)
+    out = os.path.join(directory, "out")
+    jobs = scenario_jobs(load_scenario(path))
+    print(f"{len(jobs)} jobs")
+
+    # an interrupted run: two jobs done, a half written job line and report record
+    main([path, "-o", out, "--limit", "2"])
+    with open(os.path.join(out, "jobs.jsonl"), "a") as f:
+        f.write('{"job": 2, "key": "')
+    truth = ReportFile(os.path.join(out, "truth.rpt"))
+    truth.append(truth.read(0, 1))
+
+    # the rerun only runs the remaining jobs and drops the partial records
+    main([path, "-o", out])
+    records = JobLog(os.path.join(out, "jobs.jsonl")).records
+    print(f"{len(records)} jobs logged, {np.mean([r['seconds'] for r in records]):.3f} s per job")
+    if sorted(r["job"] for r in records) != list(range(len(jobs))):
+        raise Exception("resumed run did not complete every job exactly once")
+    if len(truth) != len(jobs) or sorted(truth.read()["cpi"]) != list(range(len(jobs))):
+        raise Exception("truth reports of the interrupted job were not dropped")
+
+    # results match rdm.gen
+    job = jobs[4]
+    expected = rdm.gen(
+        dict(job["target"]),
+        dict(job["radar"]),
+        dict(job["waveform"]),
+        job["return_list"],
+        seed=job["seed"],
+        plot=False,
+    )
+    rdot_axis, r_axis, data, metadata = load_rdm(os.path.join(out, "rdm", "000004.rdc"))
+    if not np.array_equal(data, expected[2]) or metadata["target"] != job["target"]:
+        raise Exception("batch RDM does not match rdm.gen")
+
+    # a completed run has nothing left to do, a worker pool gives the same results
+    main([path, "-o", out])
+    if len(JobLog(os.path.join(out, "jobs.jsonl")).records) != len(jobs):
+        raise Exception("completed jobs were rerun")
+    main([path, "-o", out, "--restart", "--workers", "2"])
+    _, _, pooled, _ = load_rdm(os.path.join(out, "rdm", "000004.rdc"))
+    if not np.array_equal(pooled, data) or len(ReportFile(truth.path)) != len(jobs):
+        raise Exception("worker pool results differ")
+
+    # scene scenarios run the targets together, one job per seed
+    scene = dict(load_scenario(path), scene=True, save=None)
+    if len(scenario_jobs(scene)) != 3:
+        raise Exception("scene scenario should have one job per seed")
+    records = run_scenario(scene, os.path.join(directory, "scene"))
+    truth = ReportFile(os.path.join(directory, "scene", "truth.rpt")).read()
+    if len(records) != 3 or sorted(set(truth["target"])) != [0, 1]:
+        raise Exception("scene scenario did not report both targets")
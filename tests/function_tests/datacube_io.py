@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+
+import os
+import tempfile
+import numpy as np
+from rsp import rdm
+from rsp.waveform import process_waveform_dict
+from rsp.datacube_io import save_rdm, load_rdm, save_datacube, CubeFile
+
+bw = 10e6
+
+target = {"range": 3.5e3, "rangeRate": 0.5e3, "rcs": 10}
+
+radar = {
+    "fcar": 10e9,
+    "txPower": 1e3,
+    "txGain": 10 ** (30 / 10),
+    "rxGain": 10 ** (30 / 10),
+    "opTemp": 290,
+    "sampRate": 2 * bw,
+    "noiseFig": 10 ** (8 / 10),
+    "totalLosses": 10 ** (8 / 10),
+    "PRF": 200e3,
+    "dwell_time": 2e-3,
+}
+
+waveform = {"type": "barker", "nchips": 13, "bw": bw}
+
+rdot_axis, r_axis, total_dc, signal_dc = rdm.gen(
+    target, radar, waveform, [{"type": "skin"}], plot=False
+)
+process_waveform_dict(waveform, radar)  # the pulse array is stored in the metadata
+
+with tempfile.TemporaryDirectory() as directory:
+    print(f"in memory: {total_dc.nbytes / 1e3:.0f} kB {total_dc.dtype}")
+
+    # lossless round trip, with and without compression
+    for compression in [None, "zlib"]:
+        path = os.path.join(directory, f"rdm_{compression}.rdc")
+        save_rdm(
+            path,
+            rdot_axis,
+            r_axis,
+            signal_dc,
+            radar,
+            target,
+            waveform,
+            chunks=(32, 64),
+            compression=compression,
+        )
+        print(f"{compression=}: {os.path.getsize(path) / 1e3:.0f} kB")
+        rdot_ax, r_ax, data, metadata = load_rdm(path)
+        if not (np.array_equal(data, signal_dc) and np.array_equal(r_ax, r_axis)):
+            raise Exception("lossless round trip failed")
+        if not np.array_equal(metadata["waveform"]["pulse"], waveform["pulse"]):
+            raise Exception("metadata round trip failed")
+
+        # partial window read matches the slice of the full RDM
+        rdot_ax, r_ax, data, _ = load_rdm(path, (3e3, 4e3), (0, 1e3))
+        rows = (r_axis >= 3e3) & (r_axis <= 4e3)
+        cols = (rdot_axis >= 0) & (rdot_axis <= 1e3)
+        if not np.array_equal(data, signal_dc[rows][:, cols]):
+            raise Exception("partial window read failed")
+
+    # reduced precision
+    path = os.path.join(directory, "rdm_c64.rdc")
+    save_rdm(path, rdot_axis, r_axis, total_dc, precision="complex64", compression="zlib")
+    data = CubeFile(path).read()
+    print(f"complex64: {os.path.getsize(path) / 1e3:.0f} kB")
+    if not np.allclose(data, total_dc, rtol=1e-6, atol=1e-6 * abs(total_dc).max()):
+        raise Exception("complex64 storage error too large")
+
+    path = os.path.join(directory, "rdm_db16.rdc")
+    save_rdm(path, rdot_axis, r_axis, total_dc, precision="db16", compression="zlib")
+    data = CubeFile(path).read()
+    print(f"db16: {os.path.getsize(path) / 1e3:.0f} kB")
+    if np.max(abs(data.astype(float) - 20 * np.log10(abs(total_dc)))) > 0.05:
+        raise Exception("db16 storage error too large")
+
+    # raw datacube
+    path = os.path.join(directory, "raw.rdc")
+    raw = np.random.standard_normal((100, 400)) + 1j * np.random.standard_normal((100, 400))
+    save_datacube(path, raw, r_axis, radar)
+    cube = CubeFile(path)
+    if not np.array_equal(cube.read(slice(10, 20), slice(300, 400)), raw[10:20, 300:400]):
+        raise Exception("raw datacube partial read failed")
@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+
+import time
+import threading
+import numpy as np
+from rsp import fft_backend
+from rsp.fft_backend import fft_context, get_config, set_backend
+
+x = np.random.standard_normal((512, 1024)) + 1j * np.random.standard_normal((512, 1024))
+expected = np.fft.fft(x, axis=0)
+
+backends = ["scipy", "numpy"] + (["pyfftw"] if fft_backend.pyfftw is not None else [])
+for backend in backends:
+    for workers in [1, -1]:
+        with fft_context(backend, workers=workers):
+            y = x.copy()
+            t0 = time.perf_counter()
+            fft_backend.fft(y, axis=0, out=y)  # in place
+            dt = time.perf_counter() - t0
+        print(f"{backend=} {workers=}: {dt*1e3:.1f} ms")
+        if not np.allclose(y, expected):
+            raise Exception(f"{backend} FFT is incorrect")
+
+# the context is restored and only applies to the current thread
+with fft_context("numpy"):
+    seen = {}
+    thread = threading.Thread(target=lambda: seen.update(get_config()))
+    thread.start()
+    thread.join()
+    if get_config()["backend"] != "numpy" or seen["backend"] != "scipy":
+        raise Exception("FFT context leaked across threads")
+if get_config()["backend"] != "scipy":
+    raise Exception("FFT context was not restored")
+
+# set_backend applies to every thread
+set_backend(workers=2)
+seen = {}
+thread = threading.Thread(target=lambda: seen.update(get_config()))
+thread.start()
+thread.join()
+if seen["workers"] != 2:
+    raise Exception("set_backend did not apply to other threads")
+set_backend(workers=1)
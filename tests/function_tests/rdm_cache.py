@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+
+import time
+import tempfile
+import numpy as np
+from rsp import rdm
+from rsp.cache import RDMCache
+
+bw = 10e6
+
+target = {"range": 3.5e3, "rangeRate": 0.5e3, "rcs": 10}
+
+radar = {
+    "fcar": 10e9,
+    "txPower": 1e3,
+    "txGain": 10 ** (30 / 10),
+    "rxGain": 10 ** (30 / 10),
+    "opTemp": 290,
+    "sampRate": 2 * bw,
+    "noiseFig": 10 ** (8 / 10),
+    "totalLosses": 10 ** (8 / 10),
+    "PRF": 200e3,
+    "dwell_time": 2e-3,
+}
+
+waveform = {"type": "lfm", "bw": bw, "T": 10 / 40e6, "chirpUpDown": 1}
+
+return_list = [{"type": "memory", "rdot_delta": 3.0e3, "rdot_offset": 0.3e3}, {"type": "skin"}]
+
+with tempfile.TemporaryDirectory() as directory:
+    cache = RDMCache(directory, max_bytes=2 * 2**20)
+
+    t0 = time.perf_counter()
+    computed = rdm.gen(target, radar, waveform, return_list, seed=1, plot=False, cache=cache)
+    t1 = time.perf_counter()
+    loaded = rdm.gen(target, radar, waveform, return_list, seed=1, plot=False, cache=cache)
+    t2 = time.perf_counter()
+    print(f"compute: {t1 - t0:.3f} s, load: {(t2 - t1) * 1e3:.1f} ms")
+
+    for a, b in zip(computed, loaded):
+        if not np.array_equal(a, b):
+            raise Exception("cached result does not match computed result")
+
+    # key of the first run, the only option set by default is the Doppler window
+    key = cache.key(target, radar, waveform, return_list, 1, doppler_window="chebyshev")
+    if cache.get(key) is None:
+        raise Exception("computed result was not cached")
+
+    # a new seed is a new entry, the cache is bounded so the oldest entry is evicted
+    for seed in range(2, 6):
+        rdm.gen(target, radar, waveform, return_list, seed=seed, plot=False, cache=cache)
+    print(f"{len(cache.entries())} entries, {cache.size() / 2**20:.2f} MiB")
+    if cache.size() > cache.max_bytes:
+        raise Exception("cache exceeded its size bound")
+    if cache.get(key) is not None:
+        raise Exception("least recently used entry was not evicted")
+
+    # closures of one factory share a name, they are not cached unless keyed by what they capture
+    def accelerating(acceleration):
+        def trajectory(t):
+            tgt_pos = np.zeros((t.size, 3))
+            tgt_pos[:, 0] = 3.5e3 + 0.5e3 * t + acceleration * t**2 / 2
+            tgt_vel = np.zeros((t.size, 3))
+            tgt_vel[:, 0] = 0.5e3 + acceleration * t
+            return np.zeros((t.size, 3)), np.zeros((t.size, 3)), tgt_pos, tgt_vel
+
+        return trajectory
+
+    cache = RDMCache(directory + "/closures")
+    slow, fast = accelerating(0.0), accelerating(5e5)
+    args = (radar, waveform, [{"type": "skin"}])
+    slow_rdm = rdm.gen({"trajectory": slow, "rcs": 10}, *args, plot=False, cache=cache)[3]
+    fast_rdm = rdm.gen({"trajectory": fast, "rcs": 10}, *args, plot=False, cache=cache)[3]
+    if np.array_equal(slow_rdm, fast_rdm) or cache.entries():
+        raise Exception("closure trajectories were cached under the same key")
+
+    slow.cache_key, fast.cache_key = {"acceleration": 0.0}, {"acceleration": 5e5}
+    for trajectory, expected in [(slow, slow_rdm), (fast, fast_rdm)]:
+        rdm.gen({"trajectory": trajectory, "rcs": 10}, *args, plot=False, cache=cache)
+        loaded = rdm.gen({"trajectory": trajectory, "rcs": 10}, *args, plot=False, cache=cache)
+        if not np.array_equal(loaded[3], expected):
+            raise Exception("keyed closure trajectories were not cached apart")
+    if len(cache.entries()) != 2:
+        raise Exception("keyed closure trajectories were not cached")
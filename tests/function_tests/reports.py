@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+
+import os
+import tempfile
+import numpy as np
+from rsp import rdm
+from rsp.scene import Scene
+from rsp import reports
+from rsp.reports import ReportFile, TRUTH_DTYPE, DETECTION_DTYPE, cpi_reports
+
+bw = 10e6
+
+radar = {
+    "fcar": 10e9,
+    "txPower": 1e3,
+    "txGain": 10 ** (30 / 10),
+    "rxGain": 10 ** (30 / 10),
+    "opTemp": 290,
+    "sampRate": 2 * bw,
+    "noiseFig": 10 ** (8 / 10),
+    "totalLosses": 10 ** (8 / 10),
+    "PRF": 20e3,
+    "dwell_time": 5e-3,
+}
+waveform = {"type": "lfm", "bw": bw, "T": 2e-6, "chirpUpDown": 1}
+target = {"range": 2.0e3, "rangeRate": 0.1e3, "rcs": 10}
+return_list = [
+    {"type": "skin"},
+    {"type": "technique", "false_targets": [{"range_offset": 600}, {"rdot_offset": -40}]},
+]
+
+# truth records of every return, measured peaks near their apparent positions
+rdot_axis, r_axis, total_dc, _ = rdm.gen(target, radar, waveform, return_list, plot=False)
+truth, detections = cpi_reports(
+    0, target, radar, waveform, return_list, rdot_axis, r_axis, total_dc
+)
+print(truth[["type", "index", "range", "rangeRate"]])
+print(detections[["range", "rangeRate", "snr_db"]][:5])
+if truth.dtype != TRUTH_DTYPE or list(truth["type"]) != [b"skin", b"technique", b"technique"]:
+    raise Exception("truth records are wrong")
+if abs(truth["range"][1] - truth["range"][0] - 600) > 1e-6:
+    raise Exception("false target truth range is wrong")
+if abs(truth["rangeRate"][2] - truth["rangeRate"][0] + 40) > 1e-6:
+    raise Exception("false target truth range rate is wrong")
+dr, drdot = 2 * (r_axis[1] - r_axis[0]), 2 * abs(rdot_axis[1] - rdot_axis[0])  # two cells
+for record in truth:
+    near = (abs(detections["range"] - record["apparent_range"]) <= dr) & (
+        abs(detections["rangeRate"] - record["apparent_rangeRate"]) <= drdot
+    )
+    if not near.any():
+        raise Exception(f"no detection at the truth position of {record}")
+
+# a scene's visible targets over several CPIs appended to memory mapped report files
+scene = Scene(
+    [
+        {"range": 3.0e3, "rangeRate": -0.2e3, "rcs": 10},
+        {"range": 9.5e3, "rangeRate": 0.3e3, "rcs": 10},  # range ambiguous
+        {"range": 800e3, "rangeRate": 0.0, "rcs": 10},  # returns after the CPI
+    ]
+)
+with tempfile.TemporaryDirectory() as directory:
+    truth_file = ReportFile(os.path.join(directory, "truth.rpt"), TRUTH_DTYPE, {"radar": radar})
+    detection_file = ReportFile(os.path.join(directory, "detections.rpt"), DETECTION_DTYPE)
+    for cpi in range(4):
+        rdot_axis, r_axis, total_dc, _ = rdm.gen(
+            scene, radar, waveform, [{"type": "skin"}], seed=cpi, plot=False
+        )
+        truth, detections = cpi_reports(
+            cpi, scene, radar, waveform, [{"type": "skin"}], rdot_axis, r_axis, total_dc
+        )
+        truth_file.append(truth)
+        detection_file.append(detections)
+
+    # reopened files are read memory mapped
+    truth_file = ReportFile(truth_file.path)
+    records = truth_file.read()
+    print(f"{len(truth_file)} truth, {len(ReportFile(detection_file.path))} detection records")
+    if not isinstance(records, np.memmap) or len(records) != 8:
+        raise Exception("report file did not memory map the appended records")
+    if set(records["target"]) != {0, 1} or abs(records["apparent_range"][1] - 2e3) > 1:
+        raise Exception("scene truth records are wrong")
+    if not np.array_equal(truth_file.metadata["radar"]["PRF"], radar["PRF"]):
+        raise Exception("report metadata round trip failed")
+    if not np.array_equal(np.concatenate(list(truth_file.batches(3))), records):
+        raise Exception("batched scan does not match the records")
+
+    # an interrupted append leaves a partial record that is ignored then overwritten
+    with open(truth_file.path, "ab") as f:
+        f.write(truth[:1].tobytes()[:10])
+    if len(truth_file) != 8 or truth_file.append(truth) != 10:
+        raise Exception("partial record was not dropped")
+
+    try:
+        ReportFile(truth_file.path, DETECTION_DTYPE)
+    except AssertionError:
+        pass
+    else:
+        raise Exception("opening a report file with the wrong dtype did not fail")
+
+    if reports.pa is not None:
+        path = os.path.join(directory, "truth.parquet")
+        reports.write_parquet(path, truth_file, batch_size=4)
+        table = reports.pq.read_table(path)
+        if table.num_rows != 10 or table.column("type")[0].as_py() != "skin":
+            raise Exception("Parquet round trip failed")
+    else:
+        print("pyarrow not installed, Parquet output not tested")
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+
+import copy
+import dataclasses
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from rsp import rdm
+from rsp.scene import Scene
+from rsp.cache import hash_inputs, UncacheableInput
+from rsp.specs import Radar, Waveform, Target, Return
+
+bw = 10e6
+radar = {
+    "fcar": 10e9,
+    "txPower": 1e3,
+    "txGain": 10 ** (30 / 10),
+    "rxGain": 10 ** (30 / 10),
+    "opTemp": 290,
+    "sampRate": 2 * bw,
+    "noiseFig": 10 ** (8 / 10),
+    "totalLosses": 10 ** (8 / 10),
+    "PRF": 20e3,
+    "dwell_time": 2e-3,
+}
+waveform = {"type": "random", "bw": bw, "nchips": 13}
+target = {"range": 3.0e3, "rangeRate": 0.2e3, "rcs": 10}
+return_list = [
+    {"type": "skin"},
+    {"type": "memory", "rdot_delta": 0.5e3, "vbm": "random_phase", "range_offset": 200},
+]
+inputs = copy.deepcopy([target, radar, waveform, return_list])
+
+# specs are validated, frozen, slotted and hash like their dicts
+specs = [Target.from_dict(target), Radar.from_dict(radar), Waveform.from_dict(waveform)]
+specs.append([Return.from_dict(r) for r in return_list])
+radar_spec = specs[1]
+if radar_spec.Npulses != 40 or radar_spec["PRF"] != radar["PRF"]:
+    raise Exception("radar spec values are wrong")
+if radar_spec != Radar(**radar) or len({radar_spec, Radar(**radar)}) != 1:
+    raise Exception("equal specs do not compare or hash equal")
+if hash_inputs(*specs) != hash_inputs(target, radar, waveform, return_list):
+    raise Exception("specs and dicts give different cache keys")
+
+
+# closures of one factory compare by identity, specs holding them have no cache key
+def constant_velocity(rangeRate):
+    def trajectory(t):
+        tgt_pos = np.zeros((t.size, 3))
+        tgt_pos[:, 0] = 3.0e3 + rangeRate * t
+        tgt_vel = np.zeros((t.size, 3))
+        tgt_vel[:, 0] = rangeRate
+        return np.zeros((t.size, 3)), np.zeros((t.size, 3)), tgt_pos, tgt_vel
+
+    return trajectory
+
+
+closing, opening = constant_velocity(-100.0), constant_velocity(100.0)
+closing_spec = Target(rcs=10, extra={"trajectory": closing})
+if closing_spec == Target(rcs=10, extra={"trajectory": opening}):
+    raise Exception("specs with different closure trajectories compare equal")
+same = Target(rcs=10, extra={"trajectory": closing})
+if (
+    closing_spec != same
+    or len({closing_spec, same}) != 1
+    or closing_spec == Target(rcs=1, extra={"trajectory": closing})
+):
+    raise Exception("specs with the same closure trajectory do not compare or hash equal")
+try:
+    closing_spec.key
+except UncacheableInput:
+    pass
+else:
+    raise Exception("spec with a closure trajectory has a cache key")
+closing.cache_key = {"rangeRate": -100.0}
+if Target(rcs=10, extra={"trajectory": closing}).key is None:
+    raise Exception("spec with a keyed closure trajectory has no cache key")
+
+try:
+    radar_spec.PRF = 10e3
+except dataclasses.FrozenInstanceError:
+    pass
+else:
+    raise Exception("radar spec is not frozen")
+if hasattr(radar_spec, "__dict__"):
+    raise Exception("radar spec is not slotted")
+for bad in [{"type": "lfm", "bw": bw}, {"type": "barker", "bw": bw, "nchips": 6}]:
+    try:
+        Waveform.from_dict(bad)
+    except AssertionError:
+        pass
+    else:
+        raise Exception(f"invalid waveform {bad} was accepted")
+
+# derived values are computed once, the pulse is read-only
+lfm = Waveform("lfm", bw, T=2e-6, chirpUpDown=1)
+pulse = lfm.derived(radar["sampRate"])["pulse"]
+if lfm.derived(radar["sampRate"])["pulse"] is not pulse or pulse.flags.writeable:
+    raise Exception("derived pulse is not cached read-only")
+
+# gen does not change its inputs or the global random state, specs give the same RDMs
+np.random.seed(1)
+expected = np.random.rand()
+np.random.seed(1)
+results = rdm.gen(target, radar, waveform, return_list, seed=3, plot=False)
+if np.random.rand() != expected:
+    raise Exception("gen changed the global random state")
+if repr([target, radar, waveform, return_list]) != repr(inputs):
+    raise Exception("gen changed its inputs")
+spec_results = rdm.gen(*specs, seed=3, plot=False)
+if not all(np.array_equal(a, b) for a, b in zip(results, spec_results)):
+    raise Exception("specs and dicts give different RDMs")
+
+# the same specs run concurrently in a thread pool
+seeds = range(6)
+serial = [rdm.gen(*specs, seed=seed, plot=False)[2] for seed in seeds]
+with ThreadPoolExecutor(4) as pool:
+    threaded = list(pool.map(lambda seed: rdm.gen(*specs, seed=seed, plot=False)[2], seeds))
+if not all(np.array_equal(a, b) for a, b in zip(serial, threaded)):
+    raise Exception("concurrent gen calls interfere")
+print(f"{len(seeds)} concurrent gen calls match the serial calls")
+
+# scenes of target specs
+scene = Scene([specs[0], Target(range=5.0e3, rangeRate=-0.1e3, rcs=1)])
+_, _, _, signal_dc = rdm.gen(scene, radar_spec, lfm, [Return("skin")], plot=False)
+dict_scene = Scene([target, {"range": 5.0e3, "rangeRate": -0.1e3, "rcs": 1}])
+_, _, _, expected = rdm.gen(dict_scene, radar, lfm.as_dict(), [{"type": "skin"}], plot=False)
+if not np.array_equal(signal_dc, expected):
+    raise Exception("scene of target specs differs from the scene of dicts")
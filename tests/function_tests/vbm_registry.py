@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+
+import time
+import numpy as np
+from rsp import vbm
+from rsp import constants as c
+
+Npulses, fcar, PRF = 2000, 10e9, 200e3
+rdot_deltas = np.array([0.5e3, 1.0e3, 0.5e3, 2.0e3])
+f_delta = vbm.calc_f_delta(fcar, rdot_deltas[0])
+
+# deterministic codes are computed once, cached and read-only
+vbm._cached_code.cache_clear()
+t0 = time.perf_counter()
+code = vbm.slowtime_noise(Npulses, fcar, rdot_deltas[0], PRF)
+t_first = time.perf_counter() - t0
+t0 = time.perf_counter()
+again = vbm.slowtime_noise(Npulses, fcar, rdot_deltas[0], PRF)
+t_cached = time.perf_counter() - t0
+print(f"LFM code: {t_first*1e6:.0f} us, cached {t_cached*1e6:.0f} us")
+if again is not code or code.flags.writeable:
+    raise Exception("LFM code was not cached read-only")
+if not np.array_equal(code, vbm._lfm_phase(Npulses, f_delta, PRF)):
+    raise Exception("cached LFM code does not match the technique")
+
+# the cache is bounded
+for n in range(vbm.VBM_CACHE_SIZE + 10):
+    vbm.vbm_code("lfm", 100 + n, f_delta, PRF)
+if vbm._cached_code.cache_info().currsize > vbm.VBM_CACHE_SIZE:
+    raise Exception("VBM code cache is not bounded")
+
+# random techniques draw from a supplied generator
+for name, technique in vbm.VBM_TECHNIQUES.items():
+    if technique["deterministic"]:
+        continue
+    a = vbm.vbm_code(name, Npulses, f_delta, PRF, rng=np.random.default_rng(1))
+    b = vbm.vbm_code(name, Npulses, f_delta, PRF, rng=np.random.default_rng(1))
+    d = vbm.vbm_code(name, Npulses, f_delta, PRF, rng=np.random.default_rng(2))
+    if not np.array_equal(a, b) or np.allclose(a, d):
+        raise Exception(f"{name} does not follow its generator")
+
+# the global random state gives the same codes as drawing phases one at a time
+np.random.seed(3)
+code = vbm.vbm_code("gaussian_bandwidth", 64, f_delta, PRF)
+np.random.seed(3)
+freqs = np.fft.fftfreq(64, 1 / PRF)
+sigma = f_delta / 2
+f = 1 / (sigma * np.sqrt(2 * c.PI)) * np.exp(-((freqs**2 / (2 * sigma**2)) ** 1)) + 0j
+for i in range(f.size):
+    f[i] *= np.exp(1j * 2 * c.PI * np.random.rand())
+expected = np.fft.ifft(f) * np.sqrt(64)
+if not np.allclose(code, expected / abs(expected)):
+    raise Exception("gaussian bandwidth code changed for the global random state")
+
+# batched codes, one row per return
+codes = vbm.slowtime_noise_batch(Npulses, fcar, rdot_deltas, PRF)
+for rdot_delta, row in zip(rdot_deltas, codes):
+    if not np.array_equal(row, vbm.slowtime_noise(Npulses, fcar, rdot_delta, PRF)):
+        raise Exception("batched LFM codes do not match the single codes")
+codes = vbm.slowtime_noise_batch(
+    Npulses, fcar, rdot_deltas, PRF, "random_phase", rng=np.random.default_rng(0)
+)
+if codes.shape[0] != rdot_deltas.size or np.allclose(codes[0], codes[2]):
+    raise Exception("batched random codes should be independent")
+
+# registered techniques are available by name
+vbm.register_vbm("constant", lambda Npulses, f_delta, PRF, rng=None: np.ones(Npulses), True)
+if not np.array_equal(vbm.vbm_code("constant", 10, f_delta, PRF), np.ones(10)):
+    raise Exception("registered VBM technique not found")
+del vbm.VBM_TECHNIQUES["constant"]